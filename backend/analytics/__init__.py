@@ -0,0 +1,12 @@
+"""
+Analytics package.
+
+Columnar copies of the OLTP SQLite data for heavy, read-only analysis:
+
+- `analytics.parquet_export`: incremental export of `buildings` to a
+  Parquet dataset partitioned by department and scrape date
+- `analytics.duckdb_mirror`: a DuckDB file whose views read that dataset
+- `analytics.run_export`: CLI entrypoint
+
+Requires the optional `pyarrow` (export) and `duckdb` (mirror) packages.
+"""
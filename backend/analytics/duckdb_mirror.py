@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+"""
+DuckDB analytics mirror over the Parquet export.
+
+The DuckDB file holds no data of its own, only views over the Parquet
+dataset written by `parquet_export`, so it never needs a refresh: new
+export files are picked up by the next query. Heavy aggregates (price/m²
+by department, yield studies...) then run on columnar files instead of
+the OLTP SQLite database.
+
+Views:
+
+- `buildings_history`: every exported version of every building
+- `buildings`: latest version per a_id, tombstones removed
+
+Example:
+
+    import duckdb
+    con = duckdb.connect("backend/data/analytics.duckdb", read_only=True)
+    con.sql("SELECT dept, median(c_pricePerSqMeter) FROM buildings GROUP BY dept")
+"""
+
+from pathlib import Path
+
+import duckdb
+
+from .parquet_export import PARQUET_DIR
+
+DUCKDB_PATH = Path(__file__).resolve().parents[1] / "data" / "analytics.duckdb"
+
+
+def build_duckdb_mirror(
+    parquet_dir: Path = PARQUET_DIR,
+    db_path: Path = DUCKDB_PATH,
+) -> Path:
+    """
+    Create (or replace) the views of the DuckDB mirror. Returns db_path.
+    """
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    pattern = (parquet_dir.resolve() / "**" / "*.parquet").as_posix()
+    # DuckDB does not accept prepared parameters in view definitions.
+    pattern_sql = pattern.replace("'", "''")
+
+    con = duckdb.connect(str(db_path))
+    try:
+        con.execute(
+            f"""
+            CREATE OR REPLACE VIEW buildings_history AS
+            SELECT *
+            FROM read_parquet('{pattern_sql}', hive_partitioning = true, union_by_name = true)
+            """
+        )
+        con.execute(
+            """
+            CREATE OR REPLACE VIEW buildings AS
+            SELECT * EXCLUDE (_deleted)
+            FROM buildings_history
+            -- Runs that only exported last-seen updates share _export_seq.
+            QUALIFY row_number() OVER (
+                PARTITION BY a_id
+                ORDER BY _export_seq DESC, _exported_at DESC, a_lastSeenAt DESC
+            ) = 1
+                AND NOT _deleted
+            """
+        )
+    finally:
+        con.close()
+
+    return db_path
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+"""
+Incremental Parquet export of the `buildings` table.
+
+Layout (Hive partitioning, readable by pandas / pyarrow / DuckDB / Spark):
+
+    data/parquet/buildings/dept=75/scrape_date=2025-01-31/part-<seq>-<run>-<n>-0.parquet
+
+Each run only exports the buildings touched since the previous run, using
+the `building_changes` log (Table 5): the state file remembers the last
+change `seq` exported. Last-seen updates are not logged, so the buildings
+seen again since the previous run (a_lastSeenAt) are exported too. A
+building that changed again is appended as a new version; every row
+carries the `_export_seq` and `_exported_at` of the run that wrote it, so
+readers keep the latest version per `a_id`, by both (the DuckDB mirror
+does this).
+Deleted buildings are written as tombstones (`_deleted = true`) under
+`dept=_deleted`. A full export (`full`, or no state file) first deletes
+the existing dataset: it rewrites every current row, and rows left from
+earlier runs could be buildings deleted since.
+
+Once exported, change log entries older than CHANGE_LOG_RETENTION_HOURS
+are pruned from Table 5, which otherwise grows with every write.
+
+Types are fixed rather than inferred: `a_publicationDate` becomes a date,
+the a_*At columns UTC timestamps, and `a_images` a list of URLs.
+"""
+
+import json
+import shutil
+import time
+import uuid
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from .. import config
+from ..db import repositories as db_repo
+
+# Default output location for the Parquet dataset and its state file.
+PARQUET_DIR = Path(__file__).resolve().parents[1] / "data" / "parquet" / "buildings"
+STATE_FILENAME = "_export_state.json"
+
+# Rows converted and written per batch (bounds memory use).
+EXPORT_BATCH_SIZE = 10_000
+
+# Partition value for tombstones and rows without a usable value.
+DELETED_PARTITION = "_deleted"
+UNKNOWN_PARTITION = "unknown"
+
+BUILDINGS_SCHEMA = pa.schema(
+    [
+        ("a_id", pa.int64()),
+        ("a_url", pa.string()),
+        ("a_title", pa.string()),
+        ("a_city", pa.string()),
+        ("a_postalCode", pa.string()),
+        ("a_price", pa.int64()),
+        ("a_surfaceArea", pa.float64()),
+        ("a_description", pa.string()),
+        ("a_images", pa.list_(pa.string())),
+        ("a_publicationDate", pa.date32()),
+        ("a_dpe", pa.string()),
+        ("a_ges", pa.string()),
+        ("llm_residential_office", pa.string()),
+        ("llm_nbFlats", pa.int64()),
+        ("llm_flatSizes", pa.list_(pa.float64())),
+        ("llm_other", pa.string()),
+        ("c_treated", pa.int8()),
+        ("c_INSEE", pa.string()),
+        ("c_pricePerSqMeter", pa.float64()),
+        ("c_taxHab", pa.float64()),
+        ("c_taxFonc", pa.float64()),
+        ("c_vacancy", pa.float64()),
+        ("c_vacancyCat", pa.int8()),
+        ("c_revenue", pa.float64()),
+        ("c_revenueCat", pa.int8()),
+        ("c_dept", pa.string()),
+        ("c_region", pa.string()),
+        ("a_publishedAt", pa.timestamp("s", tz="UTC")),
+        ("a_firstSeenAt", pa.timestamp("s", tz="UTC")),
+        ("a_lastSeenAt", pa.timestamp("s", tz="UTC")),
+        ("_export_seq", pa.int64()),
+        ("_exported_at", pa.timestamp("s", tz="UTC")),
+        ("_deleted", pa.bool_()),
+        ("dept", pa.string()),
+        ("scrape_date", pa.string()),
+    ]
+)
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("dept", pa.string()), ("scrape_date", pa.string())]),
+    flavor="hive",
+)
+
+
+# -------------------- conversions --------------------
+
+
+def _parse_date(value: Optional[str]) -> Optional[date]:
+    """Parse a_publicationDate (MM-DD-YYYY, or ISO) into a date."""
+    if not value:
+        return None
+    for fmt in ("%m-%d-%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value[:10], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an a_*At value ("2024-05-01T08:30:00Z") into a UTC datetime."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def _split_urls(value: Optional[str]) -> Optional[List[str]]:
+    """Split the comma-joined (or JSON) a_images value into a list."""
+    if not value:
+        return None
+    text = value.strip()
+    if text.startswith("["):
+        try:
+            return [str(u) for u in json.loads(text)]
+        except ValueError:
+            pass
+    return [u.strip() for u in text.split(",") if u.strip()]
+
+
+def _split_sizes(value: Optional[str]) -> Optional[List[float]]:
+    """Split llm_flatSizes ("80,120,90") into floats; "0" means no flats."""
+    if not value:
+        return None
+    sizes: List[float] = []
+    for part in str(value).split(","):
+        try:
+            size = float(part.strip())
+        except ValueError:
+            continue
+        if size > 0:
+            sizes.append(size)
+    return sizes
+
+
+def _department(row: Dict[str, Any]) -> str:
+    """Department used for partitioning: c_dept, else the postal prefix."""
+    if row.get("c_dept"):
+        return str(row["c_dept"])
+    postal = (row.get("a_postalCode") or "").strip()
+    if len(postal) < 2:
+        return UNKNOWN_PARTITION
+    # Overseas departments (971..976) use three digits.
+    return postal[:3] if postal.startswith("97") else postal[:2]
+
+
+def _to_record(row: Dict[str, Any], export_seq: int, exported_at: datetime) -> Dict[str, Any]:
+    record = dict(row)
+    published = _parse_date(row.get("a_publicationDate"))
+    record["a_publicationDate"] = published
+    for col in ("a_publishedAt", "a_firstSeenAt", "a_lastSeenAt"):
+        record[col] = _parse_timestamp(row.get(col))
+    record["a_images"] = _split_urls(row.get("a_images"))
+    record["llm_flatSizes"] = _split_sizes(row.get("llm_flatSizes"))
+    record["_export_seq"] = export_seq
+    record["_exported_at"] = exported_at
+    record["_deleted"] = False
+    record["dept"] = _department(row)
+    record["scrape_date"] = published.isoformat() if published else UNKNOWN_PARTITION
+    return record
+
+
+def _tombstone(a_id: int, export_seq: int, exported_at: datetime) -> Dict[str, Any]:
+    return {
+        "a_id": a_id,
+        "_export_seq": export_seq,
+        "_exported_at": exported_at,
+        "_deleted": True,
+        "dept": DELETED_PARTITION,
+        "scrape_date": DELETED_PARTITION,
+    }
+
+
+# -------------------- state --------------------
+
+
+def _load_state(output_dir: Path) -> Dict[str, Any]:
+    path = output_dir / STATE_FILENAME
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _save_state(output_dir: Path, state: Dict[str, Any]) -> None:
+    # Write-then-rename so an interrupted run never leaves a corrupt state.
+    path = output_dir / STATE_FILENAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    tmp.replace(path)
+
+
+# -------------------- export --------------------
+
+
+def _clear_dataset(output_dir: Path) -> None:
+    """Delete the partitions written by earlier runs (the state file stays)."""
+    for path in output_dir.iterdir():
+        if path.is_dir() and path.name.startswith("dept="):
+            shutil.rmtree(path)
+
+
+def _write_batch(
+    records: Sequence[Dict[str, Any]],
+    output_dir: Path,
+    export_seq: int,
+    run_id: str,
+    batch_no: int,
+) -> None:
+    table = pa.Table.from_pylist(list(records), schema=BUILDINGS_SCHEMA)
+    ds.write_dataset(
+        table,
+        output_dir,
+        format="parquet",
+        partitioning=PARTITIONING,
+        # Runs with no new change (only last-seen updates) share export_seq.
+        basename_template=f"part-{export_seq}-{run_id}-{batch_no}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+
+def export_buildings_parquet(
+    output_dir: Path = PARQUET_DIR,
+    full: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Append the buildings changed since the last export to the dataset.
+
+    :param output_dir: dataset root (created if needed)
+    :param full: ignore the saved state and export every current row
+    :param batch_size: rows per written batch
+
+    Returns a summary: {"export_seq", "rows", "deleted", "pruned"}, where
+    `pruned` counts the change log entries deleted after the export.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    state = _load_state(output_dir)
+    first_run = full or "last_seq" not in state
+    last_seq = int(state.get("last_seq", 0))
+
+    # Everything up to this seq is covered by this run; later changes are
+    # picked up by the next one.
+    export_seq = db_repo.get_last_change_seq()
+    exported_at = datetime.now(timezone.utc).replace(microsecond=0)
+    run_id = uuid.uuid4().hex[:8]
+    # Buildings seen from this time on are picked up by the next run.
+    seen_after = exported_at.strftime(db_repo.TIMESTAMP_FORMAT)
+    summary = {"export_seq": export_seq, "rows": 0, "deleted": 0, "pruned": 0}
+
+    seen_since: List[int] = []
+    if not first_run:
+        previous = state.get("seen_after")
+        if previous is None and state.get("exported_at"):
+            # State written before last-seen dates were tracked here.
+            previous = datetime.fromisoformat(state["exported_at"]).strftime(
+                db_repo.TIMESTAMP_FORMAT
+            )
+        if previous is not None:
+            seen_since = db_repo.get_building_ids_seen_since(previous)
+        if export_seq <= last_seq and not seen_since:
+            return summary
+
+    batch: List[Dict[str, Any]] = []
+    batch_no = 0
+
+    def flush() -> None:
+        nonlocal batch, batch_no
+        if batch:
+            _write_batch(batch, output_dir, export_seq, run_id, batch_no)
+            batch_no += 1
+            batch = []
+
+    if first_run:
+        # Stream the whole table, in place of whatever was there.
+        _clear_dataset(output_dir)
+        for row in db_repo.iter_buildings(chunk_size=batch_size):
+            batch.append(_to_record(dict(row), export_seq, exported_at))
+            summary["rows"] += 1
+            if len(batch) >= batch_size:
+                flush()
+    else:
+        changed = db_repo.get_changed_building_ids(last_seq, export_seq)
+        deleted = [a_id for a_id, is_deleted in changed if is_deleted]
+        live = sorted(
+            {a_id for a_id, is_deleted in changed if not is_deleted}.union(seen_since)
+        )
+
+        for a_id in deleted:
+            batch.append(_tombstone(a_id, export_seq, exported_at))
+        summary["deleted"] = len(deleted)
+
+        # Bounded IN (...) lists, well under SQLite's variable limit.
+        for start in range(0, len(live), 1000):
+            for row in db_repo.get_buildings_by_ids(live[start:start + 1000]):
+                batch.append(_to_record(row, export_seq, exported_at))
+                summary["rows"] += 1
+            if len(batch) >= batch_size:
+                flush()
+
+    flush()
+    _save_state(
+        output_dir,
+        {
+            "last_seq": export_seq,
+            "exported_at": exported_at.isoformat(),
+            "seen_after": seen_after,
+        },
+    )
+    retention_sec = config.CHANGE_LOG_RETENTION_HOURS * 3600
+    summary["pruned"] = db_repo.prune_building_changes(export_seq, time.time() - retention_sec)
+    return summary
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+"""
+Manual entrypoint for the analytics export.
+
+Recommended usage (from project root):
+
+    python -m backend.analytics.run_export            # incremental export
+    python -m backend.analytics.run_export --full     # re-export every row
+    python -m backend.analytics.run_export --duckdb   # also (re)create the DuckDB views
+
+This will:
+
+1. Append the buildings changed since the last run to
+   `backend/data/parquet/buildings/` (partitioned by dept / scrape_date).
+2. Optionally write `backend/data/analytics.duckdb`, whose views read
+   those Parquet files.
+"""
+
+import argparse
+
+from .parquet_export import PARQUET_DIR, export_buildings_parquet
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export buildings to Parquet.")
+    parser.add_argument("--full", action="store_true", help="export every row, not only changes")
+    parser.add_argument("--duckdb", action="store_true", help="(re)create the DuckDB mirror")
+    args = parser.parse_args()
+
+    summary = export_buildings_parquet(full=args.full)
+    print(
+        f"[INFO] Exported {summary['rows']} buildings and {summary['deleted']} "
+        f"deletions (change seq {summary['export_seq']}) to {PARQUET_DIR}"
+    )
+    if summary["pruned"]:
+        print(f"[INFO] Pruned {summary['pruned']} exported change log entries")
+
+    if args.duckdb:
+        # Imported here so the export works without duckdb installed.
+        from .duckdb_mirror import build_duckdb_mirror
+
+        db_path = build_duckdb_mirror()
+        print(f"[INFO] DuckDB mirror ready at: {db_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,59 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Sequence
 
 import io
 import csv
+import asyncio
+import hashlib
+import sqlite3
+import time
+import zlib
 
-from fastapi import FastAPI, HTTPException
+import orjson
+
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from . import config
+from .db import async_repositories as adb
 from .db import repositories as db_repo  # 👈 note the `.db` (relative import)
+from .db.executor import shutdown_executor
+from .db.writer import get_writer, start_writer, stop_writer
+from .scraping.jobs import JobConflictError, ScrapeJobManager
+from .serialization import BuildingSnapshotCache, FastJSONResponse, RawJSONResponse
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # All API writes go through one writer thread with group commits.
+    start_writer()
+    yield
+    # Stop running scrape jobs, let queued DB work finish, then stop the DB
+    # threads.
+    scrape_jobs.shutdown()
+    shutdown_executor()
+    stop_writer()
+
+
+# Endpoints are `async def` and run their DB work on the dedicated DB
+# executor (backend/db/executor.py) through `async_repositories`, not on
+# Starlette's shared threadpool.
+app = FastAPI(
+    title="Real Estate Aggregator API",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
+)
 
+# Pre-encoded JSON per building, used by the list endpoints.
+building_snapshots = BuildingSnapshotCache(maxsize=config.JSON_SNAPSHOT_MAXSIZE)
 
-app = FastAPI(title="Real Estate Aggregator API")
+# Background scraping jobs (each in its own worker process).
+scrape_jobs = ScrapeJobManager()
 
 # ---------------------------------------------------------
 # CORS (useful in dev if you ever call localhost:8000 directly)
@@ -29,6 +69,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Change-Seq", "ETag"],
 )
 
 
@@ -41,24 +82,405 @@ class SearchLinkCreate(BaseModel):
     source: str
 
 
+class ScrapeJobCreate(BaseModel):
+    # None = every search link
+    search_link_ids: Optional[List[int]] = None
+    max_pages_per_search: int = 3
+    # Re-fetch ads already stored and record their changes
+    revisit: bool = False
+
+
+# ---------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------
+
+def _list_columns(view: str, fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Resolve the `view` / `fields` query parameters of list endpoints into a
+    column projection (None = full rows).
+
+    `fields` (comma-separated column names) takes precedence over `view`.
+    """
+    if fields:
+        return [f.strip() for f in fields.split(",") if f.strip()]
+    if view == "summary":
+        return list(db_repo.BUILDING_SUMMARY_COLUMNS)
+    if view == "full":
+        return None
+    raise HTTPException(status_code=400, detail="view must be 'summary' or 'full'")
+
+
+# Cache-Control hints for conditional read endpoints. "no-cache" means
+# "revalidate every time" (cheap thanks to ETags), not "do not cache".
+CACHE_CONTROL_DATA = "private, no-cache"
+CACHE_CONTROL_REFERENCE = "private, max-age=60"
+
+
+async def _check_not_modified(
+    request: Request,
+    response: Response,
+    tables: Sequence[str],
+    cache_control: str = CACHE_CONTROL_DATA,
+) -> None:
+    """
+    Set ETag / Cache-Control on a read endpoint's response, and answer 304
+    if the client's copy is still current.
+
+    The ETag combines the request URL (path + query) with the data versions
+    of the tables the endpoint reads, so checking it costs one indexed read
+    of `data_versions` and never touches the rows themselves.
+    """
+    versions = await adb.get_data_versions(tables)
+    key = "|".join(
+        [request.url.path, request.url.query]
+        + [f"{name}:{versions[name]}" for name in tables]
+    )
+    etag = 'W/"' + hashlib.sha1(key.encode("utf-8")).hexdigest()[:24] + '"'
+
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match", "")
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    if etag in candidates or "*" in candidates:
+        raise HTTPException(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+
+
+async def _building_list_response(
+    buildings: List[Dict[str, Any]],
+    columns: Optional[List[str]],
+    response: Response,
+) -> Response:
+    """
+    Serialize a list of buildings for a list endpoint.
+
+    With JSON snapshots enabled, `buildings` only needs `a_id`: the body is
+    assembled from cached per-building fragments in the projection
+    `columns`. Otherwise the rows themselves are encoded.
+
+    Headers already set on `response` (ETag, cursor...) are carried over.
+    """
+    headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+    if not config.JSON_SNAPSHOTS:
+        return FastJSONResponse(buildings, headers=headers)
+
+    try:
+        body = await adb.run_read(
+            building_snapshots.render_list, [b["a_id"] for b in buildings], columns
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return RawJSONResponse(body, headers=headers)
+
+
+# Change log entries read per poll of the change stream.
+CHANGE_STREAM_BATCH = 500
+
+
+def _sse_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """Encode one server-sent event."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\n".encode("utf-8") + b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+async def _iter_building_changes(
+    request: Request,
+    after_seq: int,
+    columns: Optional[List[str]],
+) -> AsyncIterator[bytes]:
+    """
+    Stream the building change log (Table 5) as server-sent events, starting
+    after `after_seq`.
+
+    Each poll reads a batch of log entries and coalesces them per building:
+    a building still present is sent once as an "upsert" with its current
+    row (projected on `columns`), a removed one as a "delete". Event ids are
+    change seqs, so a reconnecting client resumes with `Last-Event-ID`.
+
+    If entries after `after_seq` were pruned from the log (see
+    parquet_export.py), the deltas are lost: a "reset" event is sent
+    instead, and the client must reload its data.
+    """
+    # Tell EventSource how long to wait before reconnecting.
+    yield b"retry: 3000\n\n"
+    last_sent = time.monotonic()
+
+    while not await request.is_disconnected():
+        changes = await adb.get_building_changes(after_seq, CHANGE_STREAM_BATCH)
+        if not changes:
+            if time.monotonic() - last_sent >= config.CHANGE_STREAM_KEEPALIVE_SEC:
+                yield b": keep-alive\n\n"
+                last_sent = time.monotonic()
+            await asyncio.sleep(config.CHANGE_STREAM_POLL_SEC)
+            continue
+
+        if changes[0]["seq"] > after_seq + 1:
+            # Seqs have no gaps but for pruning: resume after the newest.
+            after_seq = await adb.get_last_change_seq()
+            yield _sse_event("reset", {"seq": after_seq}, after_seq)
+            last_sent = time.monotonic()
+            continue
+
+        # Latest seq per building, in seq order.
+        latest: Dict[int, int] = {}
+        for change in changes:
+            latest.pop(change["a_id"], None)
+            latest[change["a_id"]] = change["seq"]
+        rows = await adb.get_buildings_by_ids(list(latest), columns)
+        by_id = {row["a_id"]: row for row in rows}
+
+        for a_id, seq in latest.items():
+            row = by_id.get(a_id)
+            if row is None:
+                yield _sse_event("delete", {"a_id": a_id}, seq)
+            else:
+                yield _sse_event("upsert", row, seq)
+        after_seq = changes[-1]["seq"]
+        last_sent = time.monotonic()
+
+
+# Flush the CSV buffer to the client once it holds this many characters.
+CSV_FLUSH_SIZE = 64 * 1024
+
+
+def _iter_csv(rows: Iterable[Any], columns: Sequence[str]) -> Iterator[bytes]:
+    """
+    Encode rows as CSV, yielding UTF-8 chunks of roughly CSV_FLUSH_SIZE.
+
+    The header is yielded on its own first, so the client gets its first
+    byte before any row has been read. Memory use is bounded by one buffer
+    plus whatever the row iterator holds (one DB chunk).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+
+    for row in rows:
+        writer.writerow([row[col] for col in columns])
+        if buffer.tell() >= CSV_FLUSH_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Gzip a stream of chunks on the fly. Each chunk is sync-flushed so the
+    client can decompress what it has received so far.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _csv_response(rows: Iterable[Any], filename: str, gzip: bool) -> StreamingResponse:
+    """Wrap a row iterator in a streaming CSV download."""
+    columns = db_repo.BUILDING_COLUMNS
+    body: Iterator[bytes] = _iter_csv(rows, columns)
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        body = _gzip_chunks(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type="text/csv; charset=utf-8", headers=headers)
+
+
 # ---------------------------------------------------------
 # Buildings endpoints
 # ---------------------------------------------------------
 
 @app.get("/api/buildings")
-def list_buildings() -> List[Dict[str, Any]]:
+async def list_buildings(
+    request: Request,
+    response: Response,
+    city: Optional[str] = None,
+    postal_code: Optional[str] = None,
+    department: Optional[str] = None,
+    min_price: Optional[int] = Query(None, ge=0),
+    max_price: Optional[int] = Query(None, ge=0),
+    min_surface: Optional[float] = Query(None, ge=0),
+    max_surface: Optional[float] = Query(None, ge=0),
+    min_price_per_sqm: Optional[float] = Query(None, ge=0),
+    max_price_per_sqm: Optional[float] = Query(None, ge=0),
+    new_within_hours: Optional[float] = Query(None, gt=0),
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    view: str = "summary",
+    fields: Optional[str] = None,
+) -> Response:
     """
-    Return all buildings in the DB (Table 1).
+    Return one page of buildings (Table 1), filtered and sorted.
+
+    By default only the card fields are returned (`view=summary`); use
+    `view=full` or `fields=a_id,a_title,...` to choose the columns.
+
+    `new_within_hours=24` keeps the buildings first scraped in the last 24
+    hours; they are then sorted by `first_seen_desc` by default (an index
+    range scan) instead of `newest`.
+
+    The cursor for the next page is sent in the `X-Next-Cursor` response
+    header (absent on the last page). `X-Change-Seq` is the last change
+    (Table 5) before the page was read: pass it as `after` to GET
+    /api/buildings/changes to receive every change made since.
+    """
+    columns = _list_columns(view, fields)
+    await _check_not_modified(request, response, db_repo.BUILDING_VERSIONS)
+    # Read before the page: changes racing with it are replayed, not lost.
+    response.headers["X-Change-Seq"] = str(await adb.get_last_change_seq())
+    first_seen_after = None
+    if new_within_hours is not None:
+        first_seen_after = db_repo.utc_timestamp(time.time() - new_within_hours * 3600)
+    if sort is None:
+        sort = "first_seen_desc" if first_seen_after else "newest"
+    try:
+        buildings, next_cursor = await adb.get_buildings_page(
+            city=city,
+            postal_code=postal_code,
+            department=department,
+            min_price=min_price,
+            max_price=max_price,
+            min_surface=min_surface,
+            max_surface=max_surface,
+            min_price_per_sqm=min_price_per_sqm,
+            max_price_per_sqm=max_price_per_sqm,
+            first_seen_after=first_seen_after,
+            sort=sort,
+            cursor=cursor,
+            limit=limit,
+            # Snapshots only need the ids of the page.
+            columns=["a_id"] if config.JSON_SNAPSHOTS else columns,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return await _building_list_response(buildings, columns, response)
+
+
+@app.get("/api/buildings/search")
+async def search_buildings(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    view: str = "summary",
+    fields: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Full-text search over titles, descriptions and amenities, best match
+    first. Each result carries a highlighted `snippet` and its `score`.
+
+    Words must all match; use double quotes for exact phrases, e.g.
+    `"immeuble de rapport" ascenseur`. Paginated like GET /api/buildings.
+    """
+    columns = _list_columns(view, fields)
+    await _check_not_modified(request, response, db_repo.BUILDING_VERSIONS)
+    try:
+        results, next_cursor = await adb.search_buildings(
+            q, cursor=cursor, limit=limit, columns=columns
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return results
+
+
+@app.get("/api/buildings/changes")
+async def stream_building_changes(
+    request: Request,
+    after: Optional[int] = Query(None, ge=0),
+    view: str = "summary",
+    fields: Optional[str] = None,
+) -> StreamingResponse:
+    """
+    Server-sent events for buildings inserted, updated or deleted from now
+    on (by the scraper, the enrichment or the API).
+
+    Events: `upsert` (data = the building, projected like GET
+    /api/buildings), `delete` (data = {"a_id": ...}) and `reset` (data =
+    {"seq": ...}: the changes since `after` are no longer in the log, reload
+    the buildings). To resume, pass the last event id received as `after`,
+    or let EventSource send it back in the `Last-Event-ID` header.
     """
-    return db_repo.get_all_buildings()
+    columns = _list_columns(view, fields)
+    # Validate up front: once streaming, errors can no longer become a 400.
+    unknown = [
+        col
+        for col in columns or ()
+        if col not in db_repo.BUILDING_COLUMNS and col not in db_repo.BUILDING_DERIVED_COLUMNS
+    ]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown building column(s): {', '.join(unknown)}"
+        )
+
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        after_seq = int(last_event_id)
+    elif after is not None:
+        after_seq = after
+    else:
+        after_seq = await adb.get_last_change_seq()
+
+    return StreamingResponse(
+        _iter_building_changes(request, after_seq, columns),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/buildings/recent-changes")
+async def list_recent_changes(
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+) -> List[Dict[str, Any]]:
+    """
+    Content changes (price drops, edited ads...) seen by revisits since
+    `since` (ISO 8601, default: the last 24 hours), newest first. Each
+    entry lists the changed fields as {field: [old, new]}.
+    """
+    if since is None:
+        start = datetime.now(timezone.utc) - timedelta(hours=24)
+    else:
+        try:
+            start = datetime.fromisoformat(since.replace("Z", "+00:00"))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="since must be an ISO 8601 datetime")
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+    since_utc = start.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return await adb.get_recent_changes(since_utc, limit=limit)
+
+
+@app.get("/api/buildings/{building_id}/price-history")
+async def get_building_price_history(building_id: int) -> List[Dict[str, Any]]:
+    """
+    Prices of a building over time (one entry per price seen), oldest first.
+    """
+    if not await adb.building_exists(building_id):
+        raise HTTPException(status_code=404, detail="Building not found")
+    return await adb.get_price_history(building_id)
 
 
 @app.get("/api/buildings/{building_id}")
-def get_building(building_id: int) -> Dict[str, Any]:
+async def get_building(building_id: int, request: Request, response: Response) -> Dict[str, Any]:
     """
     Return one building by a_id, or 404.
     """
-    building = db_repo.get_building_by_id(building_id)
+    await _check_not_modified(request, response, db_repo.BUILDING_VERSIONS)
+    building = await adb.get_building_by_id(building_id)
     if not building:
         raise HTTPException(status_code=404, detail="Building not found")
     return building
@@ -69,33 +491,50 @@ def get_building(building_id: int) -> Dict[str, Any]:
 # ---------------------------------------------------------
 
 @app.get("/api/cart")
-def get_cart() -> List[Dict[str, Any]]:
+async def get_cart(
+    request: Request,
+    response: Response,
+    view: str = "summary",
+    fields: Optional[str] = None,
+) -> Response:
     """
     Return all buildings currently in the cart (join of Table 4 + Table 1).
+
+    Same `view` / `fields` projection as GET /api/buildings.
     """
-    return db_repo.get_cart_buildings()
+    columns = _list_columns(view, fields)
+    await _check_not_modified(request, response, ("cart", *db_repo.BUILDING_VERSIONS))
+    try:
+        buildings = await adb.get_cart_buildings(
+            columns=["a_id"] if config.JSON_SNAPSHOTS else columns
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return await _building_list_response(buildings, columns, response)
 
 
 @app.post("/api/cart/{building_id}")
-def add_cart_item(building_id: int) -> Dict[str, str]:
+async def add_cart_item(building_id: int) -> Dict[str, str]:
     """
     Add a building to the cart.
     """
-    # Optional: ensure building exists
-    building = db_repo.get_building_by_id(building_id)
-    if not building:
+    if not await adb.building_exists(building_id):
         raise HTTPException(status_code=404, detail="Building not found")
 
-    db_repo.add_to_cart(building_id)
+    try:
+        await adb.add_to_cart(building_id)
+    except sqlite3.IntegrityError:
+        # Deleted between the check and the insert.
+        raise HTTPException(status_code=404, detail="Building not found")
     return {"status": "ok"}
 
 
 @app.delete("/api/cart/{building_id}")
-def remove_cart_item(building_id: int) -> Dict[str, str]:
+async def remove_cart_item(building_id: int) -> Dict[str, str]:
     """
     Remove a building from the cart.
     """
-    db_repo.remove_from_cart(building_id)
+    await adb.remove_from_cart(building_id)
     return {"status": "ok"}
 
 
@@ -104,23 +543,25 @@ def remove_cart_item(building_id: int) -> Dict[str, str]:
 # ---------------------------------------------------------
 
 @app.get("/api/settings/search-links")
-def list_search_links() -> List[Dict[str, Any]]:
+async def list_search_links(request: Request, response: Response) -> List[Dict[str, Any]]:
     """
     Return all search links (Table 2).
     """
-    return db_repo.get_search_links()
+    await _check_not_modified(request, response, ("search_links",))
+    return await adb.get_search_links()
 
 
 @app.get("/api/settings/sources")
-def list_sources() -> List[str]:
+async def list_sources(request: Request, response: Response) -> List[str]:
     """
     Return all possible sources (Table 3).
     """
-    return db_repo.get_sources()
+    await _check_not_modified(request, response, ("sources",), CACHE_CONTROL_REFERENCE)
+    return await adb.get_sources()
 
 
 @app.post("/api/settings/search-links")
-def create_search_link(payload: SearchLinkCreate) -> Dict[str, Any]:
+async def create_search_link(payload: SearchLinkCreate) -> Dict[str, Any]:
     """
     Add a new search link (URL + source).
     """
@@ -130,11 +571,124 @@ def create_search_link(payload: SearchLinkCreate) -> Dict[str, Any]:
     if not payload.source.strip():
         raise HTTPException(status_code=400, detail="Source is required")
 
-    if payload.source not in db_repo.get_sources():
+    if payload.source not in await adb.get_sources():
         raise HTTPException(status_code=400, detail="Unknown source")
 
-    new_id = db_repo.add_search_link(payload.url.strip(), payload.source.strip())
+    new_id = await adb.add_search_link(payload.url.strip(), payload.source.strip())
     return {"id": new_id, "url": payload.url.strip(), "source": payload.source.strip()}
 
 
-# ---------------------------
+# ---------------------------------------------------------
+# Scraping jobs
+# ---------------------------------------------------------
+
+@app.post("/api/scrape/jobs", status_code=202)
+async def start_scrape_job(payload: ScrapeJobCreate) -> Dict[str, Any]:
+    """
+    Start the scraping pipeline in a background worker process and return
+    the job (poll GET /api/scrape/jobs/{id} for progress).
+
+    Returns 409 if a running job already scrapes one of the search links.
+    """
+    if payload.max_pages_per_search < 1:
+        raise HTTPException(status_code=400, detail="max_pages_per_search must be >= 1")
+
+    known_ids = [row["id"] for row in await adb.get_search_links()]
+    if payload.search_link_ids is None:
+        link_ids = known_ids
+    else:
+        unknown = sorted(set(payload.search_link_ids) - set(known_ids))
+        if unknown:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Unknown search link(s): {', '.join(map(str, unknown))}",
+            )
+        link_ids = list(dict.fromkeys(payload.search_link_ids))
+    if not link_ids:
+        raise HTTPException(status_code=400, detail="No search links to scrape")
+
+    try:
+        # Spawning the worker process takes a moment: keep it off the loop.
+        job = await asyncio.to_thread(
+            scrape_jobs.start,
+            link_ids,
+            max_pages_per_search=payload.max_pages_per_search,
+            revisit=payload.revisit,
+        )
+    except JobConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return job.to_dict()
+
+
+@app.get("/api/scrape/jobs")
+async def list_scrape_jobs() -> List[Dict[str, Any]]:
+    """Return running and recently finished scraping jobs, newest first."""
+    return [job.to_dict() for job in scrape_jobs.list()]
+
+
+@app.get("/api/scrape/jobs/{job_id}")
+async def get_scrape_job(job_id: str) -> Dict[str, Any]:
+    """Return the live progress of a scraping job."""
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.delete("/api/scrape/jobs/{job_id}")
+async def cancel_scrape_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a running scraping job (no-op if it already finished)."""
+    job = scrape_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+# ---------------------------------------------------------
+# Export endpoints (CSV)
+# ---------------------------------------------------------
+
+@app.get("/api/export/buildings")
+async def export_buildings(gzip: bool = False) -> StreamingResponse:
+    """
+    Stream every building (all columns) as CSV.
+
+    Rows are read from the DB in chunks and encoded as they go, so memory
+    use does not depend on the table size. `gzip=true` compresses the
+    stream (sent with `Content-Encoding: gzip`).
+    """
+    rows = db_repo.iter_buildings(columns=db_repo.BUILDING_COLUMNS)
+    return _csv_response(rows, "buildings.csv", gzip)
+
+
+@app.get("/api/export/cart")
+async def export_cart(gzip: bool = False) -> StreamingResponse:
+    """
+    Stream the buildings in the cart (all columns) as CSV.
+    Same streaming and `gzip` behaviour as /api/export/buildings.
+    """
+    rows = db_repo.iter_cart_buildings(columns=db_repo.BUILDING_COLUMNS)
+    return _csv_response(rows, "cart.csv", gzip)
+
+
+# ---------------------------------------------------------
+# Diagnostics
+# ---------------------------------------------------------
+
+@app.get("/api/stats/cache")
+async def cache_stats() -> List[Dict[str, Any]]:
+    """
+    Return hit / miss counters of the repository read caches and of the
+    JSON snapshot cache.
+    """
+    return db_repo.get_cache_stats() + [building_snapshots.stats()]
+
+
+@app.get("/api/stats/writer")
+async def writer_stats() -> Dict[str, Any]:
+    """
+    Return counters of the single-writer actor (transactions vs operations
+    shows how much group commit is coalescing).
+    """
+    writer = get_writer()
+    return writer.stats() if writer else {"running": False}
@@ -0,0 +1,182 @@
+"""
+Load test of the read API.
+
+Runs `--clients` concurrent clients for `--duration` seconds against the
+API, each sending one request after another, picked at random from a
+mixed workload (building list, building detail, cart, sources), and
+reports the requests per second and the p50 / p99 latencies.
+
+The server is either one already running (`--url`), or one started here
+with uvicorn (single worker) from the checkout at `--root` (default: this
+one). To compare two versions, check the older one out next to this one:
+
+    git worktree add /tmp/before <commit>
+    python -m backend.bench_api --root /tmp/before --json before.json
+    python -m backend.bench_api --compare before.json
+
+A started server runs on a copy of the checkout's `realestate.db`,
+initialized with its own `init_db` (the copy is deleted afterwards). Only
+GET requests are sent. Needs httpx (also used by FastAPI's test client)
+and uvicorn.
+
+Usage (from project root):
+
+    python -m backend.bench_api [--clients 64] [--duration 10] [--root PATH]
+    python -m backend.bench_api --url http://127.0.0.1:8000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Number of building ids fetched up front for the detail requests.
+DETAIL_IDS = 200
+
+# Run in the server process: point the app at the database copy first.
+_SERVE = """
+import sys
+from pathlib import Path
+from backend.db import connection, init_db
+connection.DB_PATH = init_db.DB_PATH = Path(sys.argv[1])
+init_db.init_db()
+import uvicorn
+uvicorn.run("backend.app:app", port=int(sys.argv[2]), log_level="warning")
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(
+    root: Path, db_path: Path, port: int, timeout: float = 30.0
+) -> subprocess.Popen:
+    """Start uvicorn (one worker) on the app of the checkout at `root`, using `db_path`."""
+    proc = subprocess.Popen(
+        [sys.executable, "-c", _SERVE, str(db_path), str(port)],
+        cwd=root,
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"server exited with code {proc.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"server not listening on port {port} after {timeout:.0f}s")
+
+
+def _percentile(latencies: List[float], pct: float) -> float:
+    return latencies[min(int(len(latencies) * pct), len(latencies) - 1)]
+
+
+async def run_load(url: str, clients: int = 64, duration: float = 10.0) -> Dict[str, Any]:
+    """Run the workload against `url`; returns req/s, p50 / p99 (ms) and errors."""
+    import httpx
+
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        resp = await client.get("/api/buildings", params={"limit": DETAIL_IDS})
+        resp.raise_for_status()
+        ids = [item["a_id"] for item in resp.json()] or [1]
+        paths = [
+            "/api/buildings?view=full&limit=50",
+            "/api/cart",
+            "/api/settings/sources",
+        ]
+
+        latencies: List[float] = []
+        errors = 0
+
+        async def client_loop(stop: float) -> None:
+            nonlocal errors
+            while time.monotonic() < stop:
+                path = random.choice(paths + [None])
+                if path is None:
+                    path = f"/api/buildings/{random.choice(ids)}"
+                start = time.monotonic()
+                try:
+                    resp = await client.get(path)
+                    if resp.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.monotonic() - start)
+
+        stop = time.monotonic() + duration
+        await asyncio.gather(*(client_loop(stop) for _ in range(clients)))
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 1) if latencies else None,
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the read API.")
+    parser.add_argument("--url", help="API of a running server (default: start one)")
+    parser.add_argument("--root", type=Path, default=PROJECT_ROOT, help="checkout to serve")
+    parser.add_argument("--clients", type=int, default=64, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--json", type=Path, help="save the result to this file")
+    parser.add_argument("--compare", type=Path, help="result saved earlier with --json")
+    args = parser.parse_args()
+
+    proc: Optional[subprocess.Popen] = None
+    tmp_dir: Optional[str] = None
+    url = args.url
+    try:
+        if url is None:
+            root = args.root.resolve()
+            tmp_dir = tempfile.mkdtemp(prefix="bench-api-")
+            db_path = Path(tmp_dir) / "realestate.db"
+            shutil.copy(root / "backend" / "db" / "realestate.db", db_path)
+            port = _free_port()
+            proc = start_server(root, db_path, port)
+            url = f"http://127.0.0.1:{port}"
+        result = asyncio.run(run_load(url, args.clients, args.duration))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(
+        f"{args.clients} clients, {args.duration:.0f}s: {result['rps']} req/s, "
+        f"p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms, {result['errors']} errors"
+    )
+    if args.compare:
+        before = json.loads(args.compare.read_text(encoding="utf-8"))
+        print(
+            f"before: {before['rps']} req/s, p50 {before['p50_ms']} ms, "
+            f"p99 {before['p99_ms']} ms"
+        )
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
+        print(f"Result written to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
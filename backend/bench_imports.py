@@ -0,0 +1,140 @@
+"""
+Import-time benchmark of the backend entry points.
+
+Short-lived commands (inspecting the database, seeding, a single scraping
+run, the API's worker processes) pay for every module they import before
+doing anything. This runs `python -X importtime -c "import <module>"` in a
+fresh interpreter for each entry point, keeps the best of a few runs, and
+reports the cumulative import time and which heavy third-party packages
+(HTTP / HTML parsing, numpy, Arrow, DuckDB) got pulled in.
+
+Usage (from project root):
+
+    python -m backend.bench_imports [--runs 5] [--top 10] [module ...]
+    python -m backend.bench_imports --json importtime.json
+    python -m backend.bench_imports --compare importtime.json
+
+`--json` saves the results, `--compare` prints the change against results
+saved earlier (e.g. before a change); `--top` lists the slowest imports
+(self time) of each module.
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_MODULES: Tuple[str, ...] = (
+    "backend.app",
+    "backend.db.inspect_buildings",
+    "backend.db.seed",
+    "backend.scraping.sources",
+    "backend.scraping.engine",
+    "backend.scraping.jobs",
+    "backend.scraping.scheduler",
+    "backend.scraping.queue_worker",
+    "backend.scraping.run_scraping",
+)
+
+# Packages worth knowing about when an entry point imports them.
+HEAVY_PACKAGES: Tuple[str, ...] = ("requests", "bs4", "numpy", "pyarrow", "duckdb", "fastapi")
+
+# "import time:  self [us] | cumulative | imported package"
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) for each line of `-X importtime` output."""
+    entries = []
+    for line in stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            entries.append((m.group(4), int(m.group(1)), int(m.group(2))))
+    return entries
+
+
+def measure(module: str, runs: int = 5, top: int = 0) -> Dict[str, Any]:
+    """
+    Import `module` in `runs` fresh interpreters; returns the best
+    cumulative time (ms), the heavy packages it imported, and its `top`
+    slowest imports by self time (from the best run).
+    """
+    best: Optional[List[Tuple[str, int, int]]] = None
+    best_us = 0
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            last = proc.stderr.strip().splitlines()[-1:] or ["?"]
+            raise RuntimeError(f"import {module} failed: {last[0]}")
+        entries = parse_importtime(proc.stderr)
+        total = next((cum for name, _, cum in entries if name == module), 0)
+        if best is None or total < best_us:
+            best, best_us = entries, total
+
+    imported = {name for name, _, _ in best or ()}
+    slowest = sorted(best or (), key=lambda entry: -entry[1])[:top]
+    return {
+        "module": module,
+        "ms": round(best_us / 1000, 1),
+        "modules_imported": len(imported),
+        "heavy": [pkg for pkg in HEAVY_PACKAGES if pkg in imported],
+        "slowest": [{"module": name, "self_ms": round(us / 1000, 1)} for name, us, _ in slowest],
+    }
+
+
+def run_benchmark(
+    modules: Sequence[str] = DEFAULT_MODULES,
+    runs: int = 5,
+    top: int = 0,
+    compare: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """Measure each module and print a report; returns the results."""
+    results = []
+    print(f"{'module':<34} {'ms':>8} {'delta':>8} {'mods':>5}  heavy imports")
+    for module in modules:
+        result = measure(module, runs=runs, top=top)
+        results.append(result)
+        delta = ""
+        if compare and module in compare:
+            delta = f"{result['ms'] - compare[module]:+.1f}"
+        heavy = ", ".join(result["heavy"]) or "-"
+        print(
+            f"{module:<34} {result['ms']:>8.1f} {delta:>8} "
+            f"{result['modules_imported']:>5}  {heavy}"
+        )
+        for entry in result["slowest"]:
+            print(f"    {entry['self_ms']:>8.1f} ms  {entry['module']}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the import time of entry points.")
+    parser.add_argument("modules", nargs="*", help="modules to import (default: entry points)")
+    parser.add_argument("--runs", type=int, default=5, help="runs per module (best is kept)")
+    parser.add_argument("--top", type=int, default=0, help="list the N slowest imports")
+    parser.add_argument("--json", type=Path, help="save the results to this file")
+    parser.add_argument("--compare", type=Path, help="results saved earlier with --json")
+    args = parser.parse_args()
+
+    compare = None
+    if args.compare:
+        saved = json.loads(args.compare.read_text(encoding="utf-8"))
+        compare = {result["module"]: result["ms"] for result in saved}
+    results = run_benchmark(args.modules or DEFAULT_MODULES, args.runs, args.top, compare)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Results written to: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,62 @@
-# Central backend configuration (database path, API keys, settings).
-#
-# This file is currently a placeholder. Implement the actual logic here.
+"""
+Central backend configuration (database path, API keys, settings).
 
+Values are read from environment variables (see `.env.example`), with
+defaults suited to local development.
+"""
+
+import os
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+
+# Serve list endpoints from pre-encoded per-building JSON fragments
+# (see backend/serialization.py) instead of re-encoding every row.
+JSON_SNAPSHOTS: bool = _env_bool("JSON_SNAPSHOTS", True)
+
+# Maximum number of pre-encoded building fragments kept in memory.
+JSON_SNAPSHOT_MAXSIZE: int = int(os.getenv("JSON_SNAPSHOT_MAXSIZE", "50000"))
+
+# Reader threads (one SQLite connection each) used by the async endpoints.
+DB_READER_THREADS: int = int(os.getenv("DB_READER_THREADS", "4"))
+
+# How often the change stream (GET /api/buildings/changes) polls the
+# building change log, and how often it sends a keep-alive when idle.
+CHANGE_STREAM_POLL_SEC: float = float(os.getenv("CHANGE_STREAM_POLL_SEC", "1.0"))
+CHANGE_STREAM_KEEPALIVE_SEC: float = float(os.getenv("CHANGE_STREAM_KEEPALIVE_SEC", "15"))
+
+# Building change log entries are pruned once exported to Parquet, but
+# only after this long, so change stream clients can still resume.
+CHANGE_LOG_RETENTION_HOURS: float = float(os.getenv("CHANGE_LOG_RETENTION_HOURS", "24"))
+
+
+# ---------------------------------------------------------------------------
+# LLM enrichment
+# ---------------------------------------------------------------------------
+
+# Run the LLM stage when enriching scraped ads inline (see
+# backend/scraping/enrichment/pipeline.py); the CSV stages always run.
+ENRICHMENT_LLM: bool = _env_bool("ENRICHMENT_LLM", False)
+
+# OpenAI-compatible chat completions endpoint (`{LLM_API_BASE}/chat/completions`).
+LLM_API_BASE: str = os.getenv("LLM_API_BASE", "https://api.openai.com/v1")
+LLM_API_KEY: str = os.getenv("LLM_API_KEY", "")
+LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT_SEC: float = float(os.getenv("LLM_TIMEOUT_SEC", "60"))
+
+# Requests in flight at once, and descriptions sent per prompt (1 = no batching).
+LLM_MAX_IN_FLIGHT: int = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+LLM_BATCH_SIZE: int = int(os.getenv("LLM_BATCH_SIZE", "10"))
+
+# Prices in USD per million tokens, for the cost reported by each run.
+LLM_PRICE_PROMPT_PER_1M: float = float(os.getenv("LLM_PRICE_PROMPT_PER_1M", "0.15"))
+LLM_PRICE_COMPLETION_PER_1M: float = float(os.getenv("LLM_PRICE_COMPLETION_PER_1M", "0.60"))
@@ -0,0 +1,69 @@
+"""
+Async variants of the repository functions, for the FastAPI endpoints.
+
+Each function has the same name and signature as in `repositories`, and
+runs the original on the DB executor (see `executor.py`): reads on the
+reader pool, writes through the single-writer actor (see `writer.py`).
+
+    from backend.db import async_repositories as adb
+
+    building = await adb.get_building_by_id(12)
+"""
+
+import functools
+from typing import Any, Awaitable, Callable, TypeVar
+
+from . import repositories as db_repo
+from .executor import get_executor
+
+T = TypeVar("T")
+
+
+def _reader(fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await get_executor().read(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def _writer(fn: Callable[..., T]) -> Callable[..., Awaitable[T]]:
+    @functools.wraps(fn)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        return await get_executor().write(fn, *args, **kwargs)
+
+    return wrapper
+
+
+async def run_read(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run any blocking function that reads the DB on the reader pool."""
+    return await get_executor().read(fn, *args, **kwargs)
+
+
+# Buildings (Table 1)
+get_buildings_page = _reader(db_repo.get_buildings_page)
+search_buildings = _reader(db_repo.search_buildings)
+get_building_by_id = _reader(db_repo.get_building_by_id)
+building_exists = _reader(db_repo.building_exists)
+get_buildings_by_ids = _reader(db_repo.get_buildings_by_ids)
+
+# Building change log (Table 5)
+get_last_change_seq = _reader(db_repo.get_last_change_seq)
+get_building_changes = _reader(db_repo.get_building_changes)
+
+# Building versions (Table 13)
+get_recent_changes = _reader(db_repo.get_recent_changes)
+get_price_history = _reader(db_repo.get_price_history)
+
+# Data versions (Table 6)
+get_data_versions = _reader(db_repo.get_data_versions)
+
+# Cart (Table 4)
+get_cart_buildings = _reader(db_repo.get_cart_buildings)
+add_to_cart = _writer(db_repo.add_to_cart)
+remove_from_cart = _writer(db_repo.remove_from_cart)
+
+# Search links (Table 2) & sources (Table 3)
+get_search_links = _reader(db_repo.get_search_links)
+get_sources = _reader(db_repo.get_sources)
+add_search_link = _writer(db_repo.add_search_link)
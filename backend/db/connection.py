@@ -7,23 +7,64 @@ All parts of the backend (API, scraping engine, enrichment) should use
 - DB file location
 - row_factory (dict-like rows)
 - foreign key enforcement
+- WAL journal mode and busy timeout (readers never block the writer)
+- per-thread persistent connections for the DB executor threads
 """
 
 import sqlite3
+import threading
 from pathlib import Path
 
 # Path to the SQLite database file (created by init_db.py)
 DB_PATH = Path(__file__).resolve().parent / "realestate.db"
 
+# Seconds a statement waits on a locked database before SQLITE_BUSY.
+BUSY_TIMEOUT_SEC = 10.0
+
+_local = threading.local()
+_wal_lock = threading.Lock()
+_wal_enabled = False
+
+
+def open_connection() -> sqlite3.Connection:
+    """Open and configure a new connection to the project database."""
+    global _wal_enabled
+
+    conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_SEC)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON;")
+
+    # WAL is a persistent property of the DB file: set it once per process.
+    if not _wal_enabled:
+        with _wal_lock:
+            if not _wal_enabled:
+                conn.execute("PRAGMA journal_mode = WAL;")
+                _wal_enabled = True
+    return conn
+
 
 def get_connection() -> sqlite3.Connection:
     """
-    Open a new SQLite connection to the project database.
+    Return a SQLite connection to the project database.
 
     - Enables foreign keys.
     - Uses sqlite3.Row for row_factory so rows can be cast to dicts easily.
+
+    In threads bound with `bind_thread_connection()` (the DB executor
+    threads) this is the thread's persistent connection; everywhere else a
+    new connection is opened.
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn
+    return open_connection()
+
+
+def bind_thread_connection() -> None:
+    """
+    Give the calling thread a persistent connection, returned by every
+    later `get_connection()` call in that thread. Used as a thread-pool
+    initializer so pooled threads do not reconnect on every query.
+    """
+    _local.conn = open_connection()
+
@@ -0,0 +1,83 @@
+"""
+Dedicated thread pools for database work from async code.
+
+The API's `async def` endpoints must not block the event loop on SQLite,
+and sending every call to Starlette's shared threadpool means DB work
+competes with everything else for its slots and opens a new connection
+per call. `DBExecutor` instead owns:
+
+- a fixed pool of reader threads, each with one persistent connection
+- a small pool of write-client threads, which hand writes to the
+  single-writer actor (see `writer.py`) and wait for the group commit
+
+With the database in WAL mode, readers keep working while the writer
+commits.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from .connection import bind_thread_connection
+
+T = TypeVar("T")
+
+
+class DBExecutor:
+    """
+    Run blocking repository functions on dedicated DB threads.
+
+    :param readers: number of reader threads (and connections)
+    :param write_clients: number of writes that may wait on the writer at
+        once (more concurrent writes means bigger group commits)
+    """
+
+    def __init__(self, readers: int = 4, write_clients: int = 8) -> None:
+        self._readers = ThreadPoolExecutor(
+            max_workers=readers,
+            thread_name_prefix="db-reader",
+            initializer=bind_thread_connection,
+        )
+        self._writer = ThreadPoolExecutor(
+            max_workers=write_clients,
+            thread_name_prefix="db-write-client",
+            initializer=bind_thread_connection,
+        )
+
+    async def read(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `fn(*args, **kwargs)` on a reader thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, functools.partial(fn, *args, **kwargs))
+
+    async def write(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `fn(*args, **kwargs)` on a write-client thread and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self) -> None:
+        """Wait for pending work and stop the threads."""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+
+
+_executor: Optional[DBExecutor] = None
+
+
+def get_executor() -> DBExecutor:
+    """Return the process-wide DBExecutor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        # Imported here to keep `backend.db` free of config imports.
+        from ..config import DB_READER_THREADS
+
+        _executor = DBExecutor(readers=DB_READER_THREADS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    """Stop the process-wide DBExecutor, if it was started."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
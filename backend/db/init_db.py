@@ -6,16 +6,154 @@ Usage (from project root):
     python backend/db/init_db.py
 
 This will create a file called `realestate.db` in the same folder as this script.
+
+On an existing database, it also creates the tables / indexes added since,
+and applies the pending migrations (see MIGRATIONS below).
 """
 
 import sqlite3
 from pathlib import Path
+from typing import Callable, List
 
 # Database file will live in backend/db/realestate.db
 DB_PATH = Path(__file__).resolve().parent / "realestate.db"
 SCHEMA_PATH = Path(__file__).resolve().parent / "schema.sql"
 
 
+def _rebuild_fts_if_needed(conn: sqlite3.Connection) -> None:
+    """
+    Populate the full-text index from existing rows.
+
+    The FTS triggers only index rows written after they exist, so a database
+    created before `buildings_fts` starts with an empty index.
+    """
+    indexed = conn.execute("SELECT COUNT(*) FROM buildings_fts_docsize").fetchone()[0]
+    total = conn.execute("SELECT COUNT(*) FROM buildings").fetchone()[0]
+    if indexed != total:
+        conn.execute("INSERT INTO buildings_fts (buildings_fts) VALUES ('rebuild')")
+        print(f"Full-text index rebuilt ({total} buildings).")
+
+
+# -------------------- migrations --------------------
+#
+# schema.sql only creates what is missing (CREATE ... IF NOT EXISTS); it
+# cannot add a column to an existing table. Such changes are migrations,
+# applied in order after the schema; `PRAGMA user_version` counts the ones
+# already applied. A fresh database runs them too, right after schema.sql
+# created the tables in their final shape, so each migration must check
+# what is already there.
+
+
+def _add_columns(conn: sqlite3.Connection, table: str, columns: List[str]) -> None:
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for column in columns:
+        name = column.split()[0]
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+
+
+# Update triggers of Table 5 (change log) and Table 6 (data versions), as
+# in schema.sql: updates of a_firstSeenAt / a_lastSeenAt alone are not
+# changes of the building.
+_BUILDING_CONTENT_COLUMNS = """
+  a_url, a_title, a_city, a_postalCode, a_price, a_surfaceArea, a_description, a_images,
+  a_publicationDate, a_dpe, a_ges, a_publishedAt, llm_residential_office, llm_nbFlats,
+  llm_flatSizes, llm_other, c_treated, c_INSEE, c_pricePerSqMeter, c_taxHab, c_taxFonc,
+  c_vacancy, c_vacancyCat, c_revenue, c_revenueCat, c_dept, c_region
+"""
+_BUILDING_UPDATE_TRIGGERS = {
+    "building_changes_au": (
+        "INSERT INTO building_changes (a_id, op) VALUES (new.a_id, 'update');"
+    ),
+    "data_versions_buildings_au": (
+        "UPDATE data_versions SET version = version + 1 WHERE name = 'buildings';"
+    ),
+}
+
+
+def _restrict_update_triggers(conn: sqlite3.Connection) -> None:
+    """(Re)create the building update triggers on content columns only."""
+    for name, body in _BUILDING_UPDATE_TRIGGERS.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(
+            f"CREATE TRIGGER {name} AFTER UPDATE OF {_BUILDING_CONTENT_COLUMNS} "
+            f"ON buildings BEGIN {body} END"
+        )
+
+
+def _migrate_seen_timestamps(conn: sqlite3.Connection) -> None:
+    """
+    Sortable first-seen / last-seen / publication timestamps on buildings
+    (ISO 8601 UTC, "YYYY-MM-DDTHH:MM:SSZ"), backfilled and indexed.
+
+    First seen is backfilled from the insert entry of the change log
+    (Table 5), else from a_publicationDate (MM-DD-YYYY, the scrape date),
+    else now; last seen starts equal to it. a_publishedAt (the listing's
+    own date) is unknown for existing rows and stays NULL.
+    """
+    _add_columns(
+        conn, "buildings", ["a_publishedAt TEXT", "a_firstSeenAt TEXT", "a_lastSeenAt TEXT"]
+    )
+    # The backfill is not a change of any building (see migration 2).
+    _restrict_update_triggers(conn)
+    conn.execute(
+        """
+        UPDATE buildings SET a_firstSeenAt = COALESCE(
+            (
+                SELECT substr(MIN(c.changed_at), 1, 19) || 'Z' FROM building_changes c
+                WHERE c.a_id = buildings.a_id AND c.op = 'insert'
+            ),
+            CASE WHEN a_publicationDate GLOB '[0-9][0-9]-[0-9][0-9]-[0-9][0-9][0-9][0-9]'
+                THEN substr(a_publicationDate, 7, 4) || '-' || substr(a_publicationDate, 1, 2)
+                    || '-' || substr(a_publicationDate, 4, 2) || 'T00:00:00Z'
+            END,
+            strftime('%Y-%m-%dT%H:%M:%SZ', 'now')
+        )
+        WHERE a_firstSeenAt IS NULL
+        """
+    )
+    conn.execute("UPDATE buildings SET a_lastSeenAt = a_firstSeenAt WHERE a_lastSeenAt IS NULL")
+    # Indexes on the new columns live here, not in schema.sql: on an old
+    # database, schema.sql runs before the columns exist.
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_buildings_first_seen ON buildings(a_firstSeenAt)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_buildings_last_seen ON buildings(a_lastSeenAt)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_buildings_published ON buildings(a_publishedAt)")
+
+
+def _migrate_update_triggers(conn: sqlite3.Connection) -> None:
+    """
+    Stop logging changes (Table 5) and bumping the buildings version
+    (Table 6) when only the seen timestamps of a building are updated:
+    every scrape that finds known ads would otherwise notify the change
+    stream and invalidate the API's caches.
+    """
+    _restrict_update_triggers(conn)
+
+
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _migrate_seen_timestamps,
+    _migrate_update_triggers,
+]
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Apply the migrations not applied yet, one transaction each. Returns how many ran."""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        conn.execute("BEGIN")
+        try:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        print(f"Migration {number} applied ({migration.__name__}).")
+    return max(len(MIGRATIONS) - version, 0)
+
+
 def init_db() -> None:
     """Create the SQLite database and apply the schema."""
     if not SCHEMA_PATH.exists():
@@ -30,6 +168,8 @@ def init_db() -> None:
 
         # Apply the full schema (tables, indexes, initial data)
         conn.executescript(schema_sql)
+        apply_migrations(conn)
+        _rebuild_fts_if_needed(conn)
         conn.commit()
         print(f"Database initialized successfully at: {DB_PATH}")
     finally:
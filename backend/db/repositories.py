@@ -5,12 +5,33 @@ This module provides simple functions that hide raw SQL from the rest of
 the application: API, scraping engine, etc.
 
 All functions open and close their own connections using `get_connection()`.
+Writes go through `writer.run_write()`, which funnels them into the
+single-writer actor (group commits) when one is running in the process.
+
+Some reads are served from in-process caches (see `backend/db/cache.py`):
+
+- single buildings by a_id: LRU + TTL, invalidated by the write functions
+  of this module (writes from other processes show up within the TTL)
+- the small reference tables (`sources`, `search_links`): whole result,
+  TTL + write-through invalidation
+- list / search / cart queries: whole result, keyed by the data versions
+  of the tables they read (Table 6), so any write, from any process,
+  makes the next call miss
+
+Cached results are shared between callers: treat them as read-only.
 """
 
+import base64
+import functools
+import json
+import re
 import sqlite3
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+from .cache import MISSING, TTLCache
 from .connection import get_connection
+from .writer import run_write
 
 # Columns we insert for new buildings (a_id is auto-incremented).
 BUILDING_INSERT_COLUMNS: Tuple[str, ...] = (
@@ -40,8 +61,81 @@ BUILDING_INSERT_COLUMNS: Tuple[str, ...] = (
     "c_revenueCat",
     "c_dept",
     "c_region",
+    "a_publishedAt",
+    "a_firstSeenAt",
+    "a_lastSeenAt",
 )
 
+# Timestamp columns, set to the time of the write when the caller has none.
+BUILDING_SEEN_COLUMNS: Tuple[str, ...] = ("a_firstSeenAt", "a_lastSeenAt")
+
+# Data versions (Table 6) a read of buildings depends on: their content
+# ("buildings", bumped by triggers) and their last-seen dates
+# ("buildings_seen", bumped by touch_buildings_seen(), which the triggers
+# and the change log leave out).
+BUILDING_VERSIONS: Tuple[str, ...] = ("buildings", "buildings_seen")
+
+# Format of the ISO 8601 timestamps (UTC) stored in the database.
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+# Every column of the buildings table, used to validate caller-supplied
+# projections before they are interpolated into SQL.
+BUILDING_COLUMNS: Tuple[str, ...] = ("a_id",) + BUILDING_INSERT_COLUMNS
+
+# Derived (computed) columns that may be requested in a projection, as
+# name -> SQL expression. `a_mainImage` is the first URL of `a_images`, so
+# list views can show a thumbnail without shipping the whole gallery.
+BUILDING_DERIVED_COLUMNS: Dict[str, str] = {
+    "a_mainImage": "substr(a_images, 1, instr(a_images || ',', ',') - 1)",
+}
+
+# Columns needed to render a building card / cart item. List endpoints
+# return this projection by default; the full row is only fetched for the
+# detail view.
+BUILDING_SUMMARY_COLUMNS: Tuple[str, ...] = (
+    "a_id",
+    "a_title",
+    "a_city",
+    "a_postalCode",
+    "a_price",
+    "a_surfaceArea",
+    "c_pricePerSqMeter",
+    "llm_residential_office",
+    "a_mainImage",
+)
+
+# BM25 column weights for full-text search (a_title, a_description,
+# llm_other): a hit in the title counts more than one in the description.
+FTS_WEIGHTS: Tuple[float, float, float] = (5.0, 1.0, 2.0)
+
+# Quoted phrases or single bare terms in a user search query.
+_FTS_TOKEN_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+# Default number of rows fetched per round-trip by the chunked iterators.
+DEFAULT_CHUNK_SIZE = 500
+
+# In-process read caches (sizes / TTLs in entries and seconds).
+_building_cache = TTLCache("building_by_id", maxsize=2048, ttl=30.0)
+_reference_cache = TTLCache("reference_tables", maxsize=8, ttl=300.0)
+_result_cache = TTLCache("query_results", maxsize=256, ttl=300.0)
+
+# Sort keys accepted by get_buildings_page(): name -> (column, direction).
+# Every sort column has an index whose implicit rowid suffix makes
+# (column, a_id) a usable keyset.
+BUILDING_SORT_KEYS: Dict[str, Tuple[str, str]] = {
+    "newest": ("a_id", "DESC"),
+    "oldest": ("a_id", "ASC"),
+    "price_asc": ("a_price", "ASC"),
+    "price_desc": ("a_price", "DESC"),
+    "surface_asc": ("a_surfaceArea", "ASC"),
+    "surface_desc": ("a_surfaceArea", "DESC"),
+    "price_per_sqm_asc": ("c_pricePerSqMeter", "ASC"),
+    "price_per_sqm_desc": ("c_pricePerSqMeter", "DESC"),
+    "first_seen_desc": ("a_firstSeenAt", "DESC"),
+    "last_seen_desc": ("a_lastSeenAt", "DESC"),
+    "published_desc": ("a_publishedAt", "DESC"),
+}
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -52,6 +146,174 @@ def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
     return dict(row)
 
 
+def utc_timestamp(seconds: Optional[float] = None) -> str:
+    """ISO 8601 UTC timestamp (TIMESTAMP_FORMAT) of `seconds` since the epoch (default: now)."""
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(seconds))
+
+
+def _insert_values(building: Dict[str, Any], now: str) -> List[Any]:
+    values: List[Any] = []
+    for col in BUILDING_INSERT_COLUMNS:
+        if col == "c_treated":
+            values.append(building.get(col, 0))  # ensure default 0
+        elif col in BUILDING_SEEN_COLUMNS:
+            values.append(building.get(col) or now)
+        else:
+            values.append(building.get(col))
+    return values
+
+
+def _freeze(value: Any) -> Any:
+    """Turn call arguments into a hashable cache-key component."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _cached_by_version(*tables: str):
+    """
+    Cache a read function's whole result, keyed by its arguments and the
+    current data versions of `tables`.
+
+    Looking up the versions is one indexed read of `data_versions`; any
+    write to one of the tables bumps its version, so stale entries are never
+    returned, only left to age out of the LRU.
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            versions = get_data_versions(tables)
+            key = (fn.__name__, _freeze(args), _freeze(kwargs), tuple(versions.values()))
+            return _result_cache.get_or_load(key, lambda: fn(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def get_cache_stats() -> List[Dict[str, Any]]:
+    """Return hit / miss counters of the repository caches, for tuning."""
+    return [cache.stats() for cache in (_building_cache, _reference_cache, _result_cache)]
+
+
+def _encode_cursor(values: Sequence[Any]) -> str:
+    """Encode keyset values into an opaque, URL-safe pagination cursor."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Decode a cursor produced by `_encode_cursor` holding `size` values, or
+    raise ValueError. Values go into SQL parameters, so only scalars are
+    accepted, and the last one (an a_id or an offset) must be an integer.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+    if (
+        not isinstance(values, list)
+        or len(values) != size
+        or not all(v is None or isinstance(v, (int, float, str)) for v in values)
+        or not _is_int(values[-1])
+    ):
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+
+def _department_bounds(department: str) -> Tuple[str, str]:
+    """
+    Return the [low, high) postal-code range for a department prefix,
+    e.g. "75" -> ("75", "76"), so the filter stays an index range scan.
+    """
+    return department, department[:-1] + chr(ord(department[-1]) + 1)
+
+
+def _fts_query(q: str) -> str:
+    """
+    Turn free text typed by a user into a safe FTS5 MATCH expression.
+
+    Quoted parts are kept as phrases ("immeuble de rapport"), every other
+    word becomes its own quoted term, and all of them must match. Quoting
+    everything means FTS5 operators and punctuation in the input are never
+    interpreted as query syntax.
+    """
+    parts: List[str] = []
+    for phrase, word in _FTS_TOKEN_RE.findall(q):
+        text = (phrase or word).replace('"', "").strip()
+        if text:
+            parts.append(f'"{text}"')
+    if not parts:
+        raise ValueError("Empty search query")
+    return " ".join(parts)
+
+
+def _iter_keyset(sql: str, chunk_size: int) -> Iterator[sqlite3.Row]:
+    """
+    Run a keyset-paginated query chunk by chunk and yield its rows.
+
+    `sql` must take exactly two parameters, the last a_id seen and the chunk
+    size (`... a_id > ? ORDER BY a_id ASC LIMIT ?`), and return an `a_id`
+    column. A connection is only used while a chunk is fetched, never
+    across a yield, so a slow consumer holds no lock on the database.
+    """
+    last_id = 0
+
+    while True:
+        with get_connection() as conn:
+            rows = conn.execute(sql, (last_id, chunk_size)).fetchall()
+
+        if not rows:
+            return
+
+        yield from rows
+
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1]["a_id"]
+
+
+def _projection(columns: Optional[Sequence[str]], table_alias: str = "") -> str:
+    """
+    Build the SELECT column list for a projection over `buildings`.
+
+    `a_id` is always included (it is the keyset cursor). Columns may be real
+    columns or keys of BUILDING_DERIVED_COLUMNS. Unknown column names raise
+    ValueError so they never reach the SQL string.
+    """
+    prefix = f"{table_alias}." if table_alias else ""
+    if not columns:
+        return f"{prefix}*"
+
+    unknown = [
+        col
+        for col in columns
+        if col not in BUILDING_COLUMNS and col not in BUILDING_DERIVED_COLUMNS
+    ]
+    if unknown:
+        raise ValueError(f"Unknown building column(s): {', '.join(unknown)}")
+
+    selected: List[str] = []
+    for col in dict.fromkeys(["a_id", *columns]):
+        expr = BUILDING_DERIVED_COLUMNS.get(col)
+        if expr is None:
+            selected.append(f"{prefix}{col}")
+        else:
+            if prefix:
+                expr = expr.replace("a_images", f"{prefix}a_images")
+            selected.append(f"{expr} AS {col}")
+    return ", ".join(selected)
+
+
 # ---------------------------------------------------------------------------
 # Buildings (Table 1)
 # ---------------------------------------------------------------------------
@@ -77,6 +339,169 @@ def get_all_buildings(limit: Optional[int] = None, offset: int = 0) -> List[Dict
     return [_row_to_dict(row) for row in rows]
 
 
+@_cached_by_version(*BUILDING_VERSIONS)
+def get_buildings_page(
+    *,
+    city: Optional[str] = None,
+    postal_code: Optional[str] = None,
+    department: Optional[str] = None,
+    min_price: Optional[int] = None,
+    max_price: Optional[int] = None,
+    min_surface: Optional[float] = None,
+    max_surface: Optional[float] = None,
+    min_price_per_sqm: Optional[float] = None,
+    max_price_per_sqm: Optional[float] = None,
+    first_seen_after: Optional[str] = None,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Return one page of buildings matching the given filters.
+
+    Pagination is keyset-based: pass the returned cursor back to get the
+    next page. Unlike LIMIT/OFFSET, the cost of a page does not grow with
+    its position, only with `limit`.
+
+    When sorting on a nullable column (price, surface, price per m²), rows
+    where that column is NULL are excluded, since they have no position in
+    the ordering.
+
+    :param department: postal-code prefix, e.g. "75" or "2A"
+    :param first_seen_after: only buildings first scraped at or after this
+        ISO 8601 UTC timestamp (e.g. "new in the last 24h": a range scan on
+        `idx_buildings_first_seen`)
+    :param sort: one of BUILDING_SORT_KEYS
+    :param cursor: opaque cursor from a previous call (None = first page)
+    :param limit: maximum number of rows to return
+    :param columns: columns to fetch (None = all, see BUILDING_SUMMARY_COLUMNS
+        for list views). `a_id` and the sort column are always included.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Raises ValueError on an unknown sort key or a malformed cursor.
+    """
+    if sort not in BUILDING_SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort}")
+    sort_col, direction = BUILDING_SORT_KEYS[sort]
+
+    where: List[str] = []
+    params: List[Any] = []
+
+    if city:
+        where.append("a_city = ?")
+        params.append(city)
+    if postal_code:
+        where.append("a_postalCode = ?")
+        params.append(postal_code)
+    if department:
+        where.append("a_postalCode >= ? AND a_postalCode < ?")
+        params.extend(_department_bounds(department))
+    if first_seen_after:
+        where.append("a_firstSeenAt >= ?")
+        params.append(first_seen_after)
+
+    ranges = (
+        ("a_price", min_price, max_price),
+        ("a_surfaceArea", min_surface, max_surface),
+        ("c_pricePerSqMeter", min_price_per_sqm, max_price_per_sqm),
+    )
+    for col, low, high in ranges:
+        if low is not None:
+            where.append(f"{col} >= ?")
+            params.append(low)
+        if high is not None:
+            where.append(f"{col} <= ?")
+            params.append(high)
+
+    op = "<" if direction == "DESC" else ">"
+    if sort_col == "a_id":
+        order_by = f"a_id {direction}"
+        if cursor is not None:
+            (last_id,) = _decode_cursor(cursor, 1)
+            where.append(f"a_id {op} ?")
+            params.append(last_id)
+    else:
+        order_by = f"{sort_col} {direction}, a_id {direction}"
+        where.append(f"{sort_col} IS NOT NULL")
+        if cursor is not None:
+            last_value, last_id = _decode_cursor(cursor, 2)
+            where.append(f"({sort_col}, a_id) {op} (?, ?)")
+            params.extend([last_value, last_id])
+
+    if columns:
+        columns = [*columns, sort_col]
+    sql = f"SELECT {_projection(columns)} FROM buildings"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    # Fetch one extra row to know whether there is a next page.
+    sql += f" ORDER BY {order_by} LIMIT ?"
+    params.append(limit + 1)
+
+    with get_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+
+    next_cursor: Optional[str] = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if sort_col == "a_id":
+            next_cursor = _encode_cursor([last["a_id"]])
+        else:
+            next_cursor = _encode_cursor([last[sort_col], last["a_id"]])
+
+    return [_row_to_dict(row) for row in rows], next_cursor
+
+
+@_cached_by_version(*BUILDING_VERSIONS)
+def search_buildings(
+    q: str,
+    *,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Full-text search over a_title, a_description and llm_other.
+
+    Results are ranked by BM25 (best first) and each row gets a `snippet`
+    (matched terms wrapped in <mark>…</mark>) and its `score`.
+
+    Pagination uses the same opaque cursor as get_buildings_page(). Ranked
+    results have no stable keyset, so the cursor carries an offset; the
+    FTS index has to score every match anyway, so deep pages cost little.
+
+    Returns (rows, next_cursor). Raises ValueError on an empty query or a
+    malformed cursor.
+    """
+    offset = 0
+    if cursor is not None:
+        (offset,) = _decode_cursor(cursor, 1)
+        if offset < 0:
+            raise ValueError("Invalid pagination cursor")
+
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    sql = f"""
+        SELECT {_projection(columns, table_alias="b")},
+               snippet(buildings_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet,
+               bm25(buildings_fts, {weights}) AS score
+        FROM buildings_fts
+        JOIN buildings AS b ON b.a_id = buildings_fts.rowid
+        WHERE buildings_fts MATCH ?
+        ORDER BY score ASC
+        LIMIT ? OFFSET ?
+    """
+    with get_connection() as conn:
+        rows = conn.execute(sql, (_fts_query(q), limit + 1, offset)).fetchall()
+
+    next_cursor: Optional[str] = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([offset + limit])
+
+    return [_row_to_dict(row) for row in rows], next_cursor
+
+
 def get_buildings_count() -> int:
     """Return total number of buildings in the database."""
     with get_connection() as conn:
@@ -87,11 +512,34 @@ def get_buildings_count() -> int:
 
 def get_building_by_id(a_id: int) -> Optional[Dict[str, Any]]:
     """Return a single building by its primary key (a_id), or None."""
+    cached = _building_cache.get(a_id)
+    if cached is not MISSING:
+        return dict(cached)
+
     with get_connection() as conn:
         cur = conn.execute("SELECT * FROM buildings WHERE a_id = ?", (a_id,))
         row = cur.fetchone()
 
-    return _row_to_dict(row) if row is not None else None
+    if row is None:
+        return None
+    building = _row_to_dict(row)
+    _building_cache.set(a_id, building)
+    return dict(building)
+
+
+def building_exists(a_id: int) -> bool:
+    """
+    Check if a building with the given a_id exists (no row fetched).
+
+    Always asks the database: the building cache may still hold a building
+    deleted meanwhile, and callers use this before writing rows that
+    reference it.
+    """
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT 1 FROM buildings WHERE a_id = ? LIMIT 1", (a_id,)
+        ).fetchone()
+    return row is not None
 
 
 def building_exists_by_url(a_url: str) -> bool:
@@ -110,40 +558,190 @@ def insert_building(building: Dict[str, Any]) -> int:
     Insert a new building into the database.
 
     `building` should be a dict with keys matching BUILDING_INSERT_COLUMNS.
-    Missing keys will default to None, except `c_treated` which defaults to 0.
+    Missing keys will default to None, except `c_treated` which defaults to
+    0 and the first / last seen timestamps, which default to now.
 
     Returns the new `a_id`.
     """
-    values: List[Any] = []
-    for col in BUILDING_INSERT_COLUMNS:
-        if col == "c_treated":
-            values.append(building.get(col, 0))  # ensure default 0
-        else:
-            values.append(building.get(col))
+    values = _insert_values(building, utc_timestamp())
 
     placeholders = ", ".join("?" for _ in BUILDING_INSERT_COLUMNS)
     columns_sql = ", ".join(BUILDING_INSERT_COLUMNS)
     sql = f"INSERT INTO buildings ({columns_sql}) VALUES ({placeholders})"
 
-    with get_connection() as conn:
-        cur = conn.execute(sql, values)
-        conn.commit()
-        return int(cur.lastrowid)
+    a_id = run_write(lambda conn: int(conn.execute(sql, values).lastrowid))
+
+    _building_cache.invalidate(a_id)
+    return a_id
+
+
+def insert_buildings(
+    buildings: Sequence[Dict[str, Any]],
+    content_hashes: Optional[Sequence[str]] = None,
+) -> List[Optional[int]]:
+    """
+    Insert many buildings in one transaction (same dict format as
+    `insert_building()`).
+
+    Buildings whose a_url is already present are skipped. Returns the new
+    a_id of each building, in order, or None for the skipped ones.
+
+    With `content_hashes` (one per building), the first version of each
+    new building is recorded too (Table 13).
+    """
+    if not buildings:
+        return []
+    placeholders = ", ".join("?" for _ in BUILDING_INSERT_COLUMNS)
+    columns_sql = ", ".join(BUILDING_INSERT_COLUMNS)
+    sql = (
+        f"INSERT INTO buildings ({columns_sql}) VALUES ({placeholders}) "
+        "ON CONFLICT (a_url) DO NOTHING RETURNING a_id"
+    )
+    now = utc_timestamp()
+    rows = [_insert_values(b, now) for b in buildings]
+
+    def op(conn: sqlite3.Connection) -> List[Optional[int]]:
+        ids: List[Optional[int]] = []
+        for values in rows:
+            row = conn.execute(sql, values).fetchone()
+            ids.append(int(row[0]) if row else None)
+        if content_hashes is not None:
+            conn.executemany(
+                "INSERT INTO building_versions (a_id, content_hash, a_price) VALUES (?, ?, ?)",
+                [
+                    (a_id, content_hash, b.get("a_price"))
+                    for a_id, content_hash, b in zip(ids, content_hashes, buildings)
+                    if a_id is not None
+                ],
+            )
+        return ids
+
+    a_ids = run_write(op)
+    for a_id in a_ids:
+        if a_id is not None:
+            _building_cache.invalidate(a_id)
+    return a_ids
 
 
 def get_untreated_buildings() -> List[Dict[str, Any]]:
     """
     Return all buildings where c_treated = 0.
 
-    Useful for post-processing / enrichment.
+    Useful for post-processing / enrichment. This materializes every row;
+    prefer `iter_untreated_buildings()` for large backlogs.
     """
-    with get_connection() as conn:
-        cur = conn.execute(
-            "SELECT * FROM buildings WHERE c_treated = 0 ORDER BY a_id ASC"
-        )
-        rows = cur.fetchall()
+    return [_row_to_dict(row) for row in iter_untreated_buildings()]
 
-    return [_row_to_dict(row) for row in rows]
+
+def iter_untreated_buildings(
+    columns: Optional[Sequence[str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[sqlite3.Row]:
+    """
+    Stream buildings where c_treated = 0, in a_id order, one chunk at a time.
+
+    Pages through the table by keyset (`a_id > last_seen_id`) so each chunk
+    is an index range scan on `idx_buildings_untreated`, whatever the size
+    of the backlog. Only one chunk is held in memory at a time, and no
+    connection is kept open between chunks, so callers may update the rows
+    they receive (e.g. set c_treated = 1) while iterating.
+
+    :param columns: columns to fetch (None = all). Skip `a_description` and
+        `a_images` when they are not needed: they are the largest columns.
+        `a_id` is always included.
+    :param chunk_size: number of rows fetched per query.
+
+    Yields sqlite3.Row objects (mapping-like; use `dict(row)` if needed).
+    """
+    sql = (
+        f"SELECT {_projection(columns)} FROM buildings "
+        "WHERE c_treated = 0 AND a_id > ? "
+        "ORDER BY a_id ASC LIMIT ?"
+    )
+    return _iter_keyset(sql, chunk_size)
+
+
+def iter_buildings_without_llm(
+    columns: Optional[Sequence[str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[sqlite3.Row]:
+    """
+    Stream the buildings that have a description but no llm_* values yet
+    (llm_residential_office IS NULL), whatever their c_treated, in a_id
+    order. Same keyset paging as `iter_untreated_buildings()`, on
+    `idx_buildings_llm_missing`.
+    """
+    sql = (
+        f"SELECT {_projection(columns)} FROM buildings "
+        "WHERE llm_residential_office IS NULL AND a_id > ? "
+        "AND a_description IS NOT NULL "
+        "ORDER BY a_id ASC LIMIT ?"
+    )
+    return _iter_keyset(sql, chunk_size)
+
+
+def iter_buildings(
+    columns: Optional[Sequence[str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[sqlite3.Row]:
+    """
+    Stream every building in a_id order, one chunk at a time.
+
+    Same keyset paging and memory profile as `iter_untreated_buildings()`;
+    meant for exports and other full-table passes.
+    """
+    sql = (
+        f"SELECT {_projection(columns)} FROM buildings "
+        "WHERE a_id > ? ORDER BY a_id ASC LIMIT ?"
+    )
+    return _iter_keyset(sql, chunk_size)
+
+
+def touch_buildings_seen(
+    a_urls: Sequence[str],
+    seen_at: Optional[str] = None,
+    min_interval_sec: float = 3600.0,
+) -> int:
+    """
+    Set a_lastSeenAt (default: now) on the buildings with the given URLs,
+    e.g. the ads still listed by a search. Rows seen less than
+    `min_interval_sec` before are left alone, so frequent crawls do not
+    rewrite the same rows over and over. This is not a change of the
+    buildings: nothing is logged in Table 5, and only the "buildings_seen"
+    version is bumped in Table 6 (see BUILDING_VERSIONS).
+
+    Returns the number of buildings updated.
+    """
+    if not a_urls:
+        return 0
+    seen_at = seen_at or utc_timestamp()
+    stale_before = utc_timestamp(time.time() - min_interval_sec)
+    urls = list(dict.fromkeys(a_urls))
+
+    def op(conn: sqlite3.Connection) -> List[int]:
+        touched: List[int] = []
+        for start in range(0, len(urls), DEFAULT_CHUNK_SIZE):
+            chunk = urls[start:start + DEFAULT_CHUNK_SIZE]
+            rows = conn.execute(
+                f"""
+                UPDATE buildings SET a_lastSeenAt = ?
+                WHERE a_url IN ({', '.join('?' for _ in chunk)})
+                  AND (a_lastSeenAt IS NULL OR a_lastSeenAt < ?)
+                RETURNING a_id
+                """,
+                [seen_at, *chunk, stale_before],
+            ).fetchall()
+            touched.extend(int(row[0]) for row in rows)
+        if touched:
+            conn.execute(
+                "UPDATE data_versions SET version = version + 1 WHERE name = 'buildings_seen'"
+            )
+        return touched
+
+    a_ids = run_write(op)
+    for a_id in a_ids:
+        _building_cache.invalidate(a_id)
+    return len(a_ids)
 
 
 def update_building_fields(a_id: int, updates: Dict[str, Any]) -> None:
@@ -162,22 +760,178 @@ def update_building_fields(a_id: int, updates: Dict[str, Any]) -> None:
     sql = f"UPDATE buildings SET {set_clause} WHERE a_id = ?"
     values.append(a_id)
 
+    run_write(lambda conn: conn.execute(sql, values))
+
+    _building_cache.invalidate(a_id)
+
+
+def update_buildings_bulk(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> int:
+    """
+    Set the same `columns` on many buildings in one transaction.
+
+    Each row holds the values of `columns`, in order, followed by the a_id:
+
+        update_buildings_bulk(["c_INSEE", "c_dept"], [("59350", "59", 12), ...])
+
+    Returns the number of rows updated.
+    """
+    if not rows:
+        return 0
+    unknown = [col for col in columns if col not in BUILDING_COLUMNS or col == "a_id"]
+    if unknown:
+        raise ValueError(f"Unknown building column(s): {', '.join(unknown)}")
+
+    set_clause = ", ".join(f"{col} = ?" for col in columns)
+    sql = f"UPDATE buildings SET {set_clause} WHERE a_id = ?"
+
+    updated = run_write(lambda conn: conn.executemany(sql, rows).rowcount)
+    for row in rows:
+        _building_cache.invalidate(row[-1])
+    return updated
+
+
+# ---------------------------------------------------------------------------
+# Building change log (Table 5)
+# ---------------------------------------------------------------------------
+
+def get_last_change_seq() -> int:
+    """Return the seq of the latest entry in building_changes (0 if empty)."""
+    with get_connection() as conn:
+        row = conn.execute("SELECT MAX(seq) AS seq FROM building_changes").fetchone()
+    return int(row["seq"] or 0)
+
+
+def get_first_change_seq() -> int:
+    """Return the seq of the oldest entry left in building_changes (0 if empty)."""
+    with get_connection() as conn:
+        row = conn.execute("SELECT MIN(seq) AS seq FROM building_changes").fetchone()
+    return int(row["seq"] or 0)
+
+
+def get_changed_building_ids(after_seq: int, up_to_seq: int) -> List[Tuple[int, bool]]:
+    """
+    Return the buildings touched by changes in (after_seq, up_to_seq], as
+    (a_id, deleted) pairs in a_id order. `deleted` is True when the row no
+    longer exists.
+    """
+    sql = """
+        SELECT c.a_id, b.a_id IS NULL AS deleted
+        FROM (
+            SELECT DISTINCT a_id FROM building_changes
+            WHERE seq > ? AND seq <= ?
+        ) AS c
+        LEFT JOIN buildings AS b ON b.a_id = c.a_id
+        ORDER BY c.a_id ASC
+    """
+    with get_connection() as conn:
+        rows = conn.execute(sql, (after_seq, up_to_seq)).fetchall()
+    return [(int(row["a_id"]), bool(row["deleted"])) for row in rows]
+
+
+def prune_building_changes(up_to_seq: int, before: float) -> int:
+    """
+    Delete the change log entries with seq <= up_to_seq recorded before
+    `before` (Unix time), e.g. once exported. The latest entry is always
+    kept, so get_last_change_seq() never goes back.
+
+    Seqs have no gaps otherwise: readers behind the oldest remaining entry
+    see a gap (see get_first_change_seq()) and must start over.
+
+    Returns the number of entries deleted.
+    """
+
+    def op(conn: sqlite3.Connection) -> int:
+        # Same format as the changed_at default (milliseconds).
+        cur = conn.execute(
+            """
+            DELETE FROM building_changes
+            WHERE seq <= ?
+              AND changed_at < strftime('%Y-%m-%dT%H:%M:%fZ', ?, 'unixepoch')
+              AND seq < (SELECT MAX(seq) FROM building_changes)
+            """,
+            (up_to_seq, before),
+        )
+        return cur.rowcount
+
+    return run_write(op)
+
+
+def get_building_ids_seen_since(seen_at: str) -> List[int]:
+    """a_ids of the buildings whose a_lastSeenAt is `seen_at` (ISO 8601 UTC) or later."""
     with get_connection() as conn:
-        conn.execute(sql, values)
-        conn.commit()
+        rows = conn.execute(
+            "SELECT a_id FROM buildings WHERE a_lastSeenAt >= ? ORDER BY a_id ASC", (seen_at,)
+        ).fetchall()
+    return [int(row["a_id"]) for row in rows]
+
+
+def get_building_changes(after_seq: int, limit: int = 500) -> List[Dict[str, Any]]:
+    """
+    Return up to `limit` change log entries with seq > after_seq, oldest
+    first, as {"seq", "a_id", "op", "changed_at"} dicts.
+    """
+    sql = """
+        SELECT seq, a_id, op, changed_at FROM building_changes
+        WHERE seq > ?
+        ORDER BY seq ASC
+        LIMIT ?
+    """
+    with get_connection() as conn:
+        rows = conn.execute(sql, (after_seq, limit)).fetchall()
+    return [_row_to_dict(row) for row in rows]
+
+
+def get_buildings_by_ids(
+    a_ids: Sequence[int],
+    columns: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Return the buildings with the given a_ids (missing ids are skipped)."""
+    if not a_ids:
+        return []
+    placeholders = ", ".join("?" for _ in a_ids)
+    sql = (
+        f"SELECT {_projection(columns)} FROM buildings "
+        f"WHERE a_id IN ({placeholders}) ORDER BY a_id ASC"
+    )
+    with get_connection() as conn:
+        rows = conn.execute(sql, list(a_ids)).fetchall()
+    return [_row_to_dict(row) for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# Data versions (Table 6)
+# ---------------------------------------------------------------------------
+
+def get_data_versions(names: Sequence[str]) -> Dict[str, int]:
+    """
+    Return the change counters of the given tables (e.g. "buildings",
+    "cart"), as maintained by the data_versions triggers. Unknown names
+    map to 0.
+    """
+    placeholders = ", ".join("?" for _ in names)
+    with get_connection() as conn:
+        rows = conn.execute(
+            f"SELECT name, version FROM data_versions WHERE name IN ({placeholders})",
+            list(names),
+        ).fetchall()
+    versions = {row["name"]: int(row["version"]) for row in rows}
+    return {name: versions.get(name, 0) for name in names}
 
 
 # ---------------------------------------------------------------------------
 # Cart (Table 4)
 # ---------------------------------------------------------------------------
 
-def get_cart_buildings() -> List[Dict[str, Any]]:
+@_cached_by_version("cart", *BUILDING_VERSIONS)
+def get_cart_buildings(columns: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
     """
     Return all buildings currently in the cart (TABLE 4),
-    joined with full building information (TABLE 1).
+    joined with building information (TABLE 1).
+
+    :param columns: building columns to fetch (None = full rows).
     """
-    sql = """
-        SELECT b.*
+    sql = f"""
+        SELECT {_projection(columns, table_alias="b")}
         FROM buildings AS b
         JOIN cart AS c ON c.id = b.a_id
         ORDER BY b.a_id DESC
@@ -189,28 +943,43 @@ def get_cart_buildings() -> List[Dict[str, Any]]:
     return [_row_to_dict(row) for row in rows]
 
 
+def iter_cart_buildings(
+    columns: Optional[Sequence[str]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[sqlite3.Row]:
+    """
+    Stream the buildings in the cart in a_id order, one chunk at a time
+    (see `iter_buildings()`).
+    """
+    sql = f"""
+        SELECT {_projection(columns, table_alias="b")}
+        FROM cart AS c
+        JOIN buildings AS b ON b.a_id = c.id
+        WHERE c.id > ?
+        ORDER BY c.id ASC
+        LIMIT ?
+    """
+    return _iter_keyset(sql, chunk_size)
+
+
 def add_to_cart(a_id: int) -> None:
     """Add a building to the cart. If already present, this is a no-op."""
-    with get_connection() as conn:
-        conn.execute(
+    run_write(
+        lambda conn: conn.execute(
             "INSERT OR IGNORE INTO cart (id) VALUES (?)",
             (a_id,),
         )
-        conn.commit()
+    )
 
 
 def remove_from_cart(a_id: int) -> None:
     """Remove a building from the cart (if present)."""
-    with get_connection() as conn:
-        conn.execute("DELETE FROM cart WHERE id = ?", (a_id,))
-        conn.commit()
+    run_write(lambda conn: conn.execute("DELETE FROM cart WHERE id = ?", (a_id,)))
 
 
 def clear_cart() -> None:
     """Remove all buildings from the cart."""
-    with get_connection() as conn:
-        conn.execute("DELETE FROM cart")
-        conn.commit()
+    run_write(lambda conn: conn.execute("DELETE FROM cart"))
 
 
 # ---------------------------------------------------------------------------
@@ -226,13 +995,16 @@ def get_search_links() -> List[Dict[str, Any]]:
         - link
         - source
     """
-    with get_connection() as conn:
-        cur = conn.execute(
-            "SELECT id, link, source FROM search_links ORDER BY id ASC"
-        )
-        rows = cur.fetchall()
 
-    return [_row_to_dict(row) for row in rows]
+    def load() -> List[Dict[str, Any]]:
+        with get_connection() as conn:
+            cur = conn.execute(
+                "SELECT id, link, source FROM search_links ORDER BY id ASC"
+            )
+            rows = cur.fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    return [dict(row) for row in _reference_cache.get_or_load("search_links", load)]
 
 
 def add_search_link(link: str, source: str) -> int:
@@ -241,19 +1013,618 @@ def add_search_link(link: str, source: str) -> int:
 
     Returns the new search_links.id.
     """
-    with get_connection() as conn:
-        cur = conn.execute(
-            "INSERT INTO search_links (link, source) VALUES (?, ?)",
-            (link, source),
+    new_id = run_write(
+        lambda conn: int(
+            conn.execute(
+                "INSERT INTO search_links (link, source) VALUES (?, ?)",
+                (link, source),
+            ).lastrowid
         )
-        conn.commit()
-        return int(cur.lastrowid)
+    )
+
+    _reference_cache.invalidate("search_links")
+    return new_id
 
 
 def get_sources() -> List[str]:
     """Return the list of available sources (e.g. 'Bienici', 'SeLoger')."""
+
+    def load() -> List[str]:
+        with get_connection() as conn:
+            cur = conn.execute("SELECT source FROM sources ORDER BY source ASC")
+            rows = cur.fetchall()
+        return [row["source"] for row in rows]
+
+    return list(_reference_cache.get_or_load("sources", load))
+
+
+# ---------------------------------------------------------------------------
+# Search link schedule (Table 7)
+# ---------------------------------------------------------------------------
+
+# Columns of search_link_schedule that update_search_link_schedule() may set.
+SCHEDULE_COLUMNS = (
+    "crawl_interval_sec",
+    "max_pages",
+    "next_run_at",
+    "last_run_at",
+    "new_ads_per_hour",
+    "last_new_ads",
+    "last_urls_found",
+    "runs",
+)
+
+
+def sync_search_link_schedules() -> None:
+    """Create a default schedule row for every search link without one."""
+    run_write(
+        lambda conn: conn.execute(
+            "INSERT OR IGNORE INTO search_link_schedule (search_link_id) "
+            "SELECT id FROM search_links"
+        )
+    )
+
+
+def get_search_link_schedules() -> List[Dict[str, Any]]:
+    """
+    Return every scheduled search link (id, link, source + the
+    search_link_schedule columns), the next due first (never-run links,
+    with next_run_at NULL, come first).
+    """
+    sql = """
+        SELECT l.id, l.link, l.source, s.*
+        FROM search_link_schedule AS s
+        JOIN search_links AS l ON l.id = s.search_link_id
+        ORDER BY s.next_run_at ASC, l.id ASC
+    """
     with get_connection() as conn:
-        cur = conn.execute("SELECT source FROM sources ORDER BY source ASC")
-        rows = cur.fetchall()
+        rows = conn.execute(sql).fetchall()
+    return [_row_to_dict(row) for row in rows]
+
+
+def update_search_link_schedule(search_link_id: int, updates: Dict[str, Any]) -> None:
+    """Set some columns (see SCHEDULE_COLUMNS) of a search link's schedule."""
+    unknown = [col for col in updates if col not in SCHEDULE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown schedule column(s): {', '.join(unknown)}")
+    if not updates:
+        return
+
+    set_clause = ", ".join(f"{col} = ?" for col in updates)
+    sql = f"UPDATE search_link_schedule SET {set_clause} WHERE search_link_id = ?"
+    values = [*updates.values(), search_link_id]
+
+    run_write(lambda conn: conn.execute(sql, values))
+
+
+# ---------------------------------------------------------------------------
+# Scraping work queue (Table 8) & source politeness (Table 9)
+# ---------------------------------------------------------------------------
+
+def enqueue_work(
+    items: Iterable[Tuple[str, str, str, int]],
+    requeue_finished: bool = False,
+) -> int:
+    """
+    Add (kind, source, url, page) items to the work queue.
+
+    Items already queued are left alone (enqueueing is idempotent), unless
+    `requeue_finished` is set: then finished ones ('done' / 'failed') go
+    back to 'pending' (used to re-crawl listing pages).
+
+    Returns the number of items added or requeued.
+    """
+    sql = """
+        INSERT INTO work_queue (kind, source, url, page, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (kind, url, page) DO NOTHING
+    """
+    if requeue_finished:
+        sql = sql.replace(
+            "DO NOTHING",
+            "DO UPDATE SET status = 'pending', attempts = 0, error = NULL, "
+            "updated_at = excluded.updated_at "
+            "WHERE status IN ('done', 'failed')",
+        )
+    now = time.time()
+    rows = [(kind, source, url, page, now) for kind, source, url, page in items]
+
+    def op(conn: sqlite3.Connection) -> int:
+        before = conn.total_changes
+        conn.executemany(sql, rows)
+        return conn.total_changes - before
+
+    return run_write(op)
+
+
+def claim_work(
+    worker_id: str,
+    limit: int,
+    lease_sec: float,
+    max_attempts: int,
+) -> List[Dict[str, Any]]:
+    """
+    Lease up to `limit` pending items (or items whose lease expired) to
+    `worker_id`, listing pages first. Items whose lease expired after
+    `max_attempts` attempts are marked 'failed' instead.
+    """
+    now = time.time()
+
+    def op(conn: sqlite3.Connection) -> List[sqlite3.Row]:
+        conn.execute(
+            """
+            UPDATE work_queue
+            SET status = 'failed', lease_owner = NULL, updated_at = ?,
+                error = COALESCE(error, 'lease expired')
+            WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= ?
+            """,
+            (now, now, max_attempts),
+        )
+        return conn.execute(
+            """
+            UPDATE work_queue
+            SET status = 'leased', lease_owner = ?, lease_expires_at = ?,
+                attempts = attempts + 1, updated_at = ?
+            WHERE id IN (
+                SELECT id FROM work_queue
+                WHERE status = 'pending'
+                   OR (status = 'leased' AND lease_expires_at < ?)
+                ORDER BY kind = 'listing' DESC, id ASC
+                LIMIT ?
+            )
+            RETURNING id, kind, source, url, page, attempts
+            """,
+            (worker_id, now + lease_sec, now, now, limit),
+        ).fetchall()
+
+    rows = run_write(op)
+    return sorted((_row_to_dict(row) for row in rows), key=lambda r: r["id"])
+
+
+def renew_work_leases(worker_id: str, ids: Sequence[int], lease_sec: float) -> int:
+    """
+    Extend the leases `worker_id` still holds on the given items.
+    Returns how many are still held.
+    """
+    if not ids:
+        return 0
+    placeholders = ", ".join("?" for _ in ids)
+    sql = (
+        "UPDATE work_queue SET lease_expires_at = ? "
+        f"WHERE lease_owner = ? AND status = 'leased' AND id IN ({placeholders})"
+    )
+    values = [time.time() + lease_sec, worker_id, *ids]
+    return run_write(lambda conn: conn.execute(sql, values).rowcount)
+
+
+def complete_work(worker_id: str, item_id: int, result: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Mark a leased item as done. Returns False if `worker_id` no longer holds
+    its lease (another worker took it over; the outcome is still recorded
+    if the item is not finished yet).
+    """
+    sql = """
+        UPDATE work_queue
+        SET status = 'done', result = ?, error = NULL, lease_owner = NULL, updated_at = ?
+        WHERE id = ? AND status IN ('pending', 'leased')
+    """
+
+    def op(conn: sqlite3.Connection) -> bool:
+        owner = conn.execute(
+            "SELECT lease_owner FROM work_queue WHERE id = ?", (item_id,)
+        ).fetchone()
+        conn.execute(sql, (json.dumps(result), time.time(), item_id))
+        return owner is not None and owner["lease_owner"] == worker_id
 
-    return [row["source"] for row in rows]
+    return run_write(op)
+
+
+def fail_work(worker_id: str, item_id: int, error: str, max_attempts: int) -> None:
+    """
+    Record a failed attempt on a leased item: it goes back to 'pending',
+    or to 'failed' once it has used `max_attempts` attempts.
+    """
+    sql = """
+        UPDATE work_queue
+        SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+            error = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ?
+        WHERE id = ? AND lease_owner = ? AND status = 'leased'
+    """
+    run_write(
+        lambda conn: conn.execute(
+            sql, (max_attempts, error, time.time(), item_id, worker_id)
+        )
+    )
+
+
+def release_work(worker_id: str, ids: Sequence[int]) -> None:
+    """Give leased items back to the queue without counting an attempt."""
+    if not ids:
+        return
+    placeholders = ", ".join("?" for _ in ids)
+    sql = (
+        "UPDATE work_queue SET status = 'pending', attempts = MAX(attempts - 1, 0), "
+        "lease_owner = NULL, lease_expires_at = NULL "
+        f"WHERE lease_owner = ? AND status = 'leased' AND id IN ({placeholders})"
+    )
+    run_write(lambda conn: conn.execute(sql, [worker_id, *ids]))
+
+
+def get_work_queue_stats() -> Dict[str, Dict[str, int]]:
+    """Return item counts per kind and status, e.g. {"ad": {"done": 12}}."""
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT kind, status, COUNT(*) AS n FROM work_queue GROUP BY kind, status"
+        ).fetchall()
+    stats: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        stats.setdefault(row["kind"], {})[row["status"]] = int(row["n"])
+    return stats
+
+
+def reserve_source_slot(
+    source: str, min_interval_sec: float, hold_sec: float
+) -> Tuple[bool, float]:
+    """
+    Try to take the request slot of `source`. Only one request per source
+    is in flight at a time: the slot is held until `release_source_slot()`
+    (or for `hold_sec`, should the holder die), and the next one opens
+    `min_interval_sec` after the release, so consecutive requests never
+    reach the website closer than that.
+
+    `min_interval_sec` only applies the first time a source is seen;
+    afterwards the stored value is used.
+
+    Returns (True, hold token) if the slot was taken, else (False, Unix
+    time at which to try again).
+    """
+
+    def op(conn: sqlite3.Connection) -> Tuple[bool, float]:
+        conn.execute(
+            "INSERT OR IGNORE INTO source_politeness (source, min_interval_sec) VALUES (?, ?)",
+            (source, min_interval_sec),
+        )
+        # Read the clock in the writer: claims are serialized, so is time.
+        now = time.time()
+        row = conn.execute(
+            """
+            UPDATE source_politeness
+            SET next_allowed_at = ?
+            WHERE source = ? AND next_allowed_at <= ?
+            RETURNING next_allowed_at
+            """,
+            (now + hold_sec, source, now),
+        ).fetchone()
+        if row is not None:
+            return True, float(row["next_allowed_at"])
+        row = conn.execute(
+            "SELECT next_allowed_at FROM source_politeness WHERE source = ?", (source,)
+        ).fetchone()
+        return False, float(row["next_allowed_at"])
+
+    return run_write(op)
+
+
+def release_source_slot(source: str, token: float) -> None:
+    """
+    Release a slot taken with `reserve_source_slot()` once its request is
+    done: the next request may start `min_interval_sec` from now. Does
+    nothing if the hold expired and another request took the slot.
+    """
+
+    def op(conn: sqlite3.Connection) -> None:
+        conn.execute(
+            """
+            UPDATE source_politeness SET next_allowed_at = ? + min_interval_sec
+            WHERE source = ? AND next_allowed_at = ?
+            """,
+            (time.time(), source, token),
+        )
+
+    run_write(op)
+
+
+# ---------------------------------------------------------------------------
+# LLM response cache (Table 10)
+# ---------------------------------------------------------------------------
+
+def get_llm_cache_entries(keys: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+    """Return the cached responses (decoded JSON) of the given keys that exist."""
+    entries: Dict[str, Dict[str, Any]] = {}
+    keys = list(keys)
+    with get_connection() as conn:
+        # Stay well under SQLite's bound-parameter limit.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"SELECT key, response FROM llm_cache WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            for row in rows:
+                entries[row["key"]] = json.loads(row["response"])
+    return entries
+
+
+def put_llm_cache_entries(entries: Iterable[Tuple[str, str, Dict[str, Any], int, int]]) -> int:
+    """
+    Store (key, model, response, prompt_tokens, completion_tokens) entries;
+    existing keys are replaced. Returns the number of entries written.
+    """
+    sql = """
+        INSERT OR REPLACE INTO llm_cache (key, model, response, prompt_tokens, completion_tokens)
+        VALUES (?, ?, ?, ?, ?)
+    """
+    rows = [
+        (key, model, json.dumps(response, ensure_ascii=False), prompt_tokens, completion_tokens)
+        for key, model, response, prompt_tokens, completion_tokens in entries
+    ]
+    if not rows:
+        return 0
+    return run_write(lambda conn: conn.executemany(sql, rows).rowcount)
+
+
+def get_llm_cache_stats() -> Dict[str, int]:
+    """Number of cached responses and the tokens spent producing them."""
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) AS entries, COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens, "
+            "COALESCE(SUM(completion_tokens), 0) AS completion_tokens FROM llm_cache"
+        ).fetchone()
+    return {key: int(row[key]) for key in row.keys()}
+
+
+# ---------------------------------------------------------------------------
+# Duplicate detection: LSH index (Table 11) & clusters (Table 12)
+# ---------------------------------------------------------------------------
+
+def get_lsh_candidates(
+    blocks: Sequence[str],
+    buckets: Sequence[int],
+    exclude_a_id: Optional[int] = None,
+) -> List[int]:
+    """a_ids filed in any of the `blocks` under any of the LSH `buckets`."""
+    if not blocks or not buckets:
+        return []
+    sql = (
+        "SELECT DISTINCT a_id FROM lsh_buckets "
+        f"WHERE block IN ({', '.join('?' for _ in blocks)}) "
+        f"AND bucket IN ({', '.join('?' for _ in buckets)})"
+    )
+    with get_connection() as conn:
+        rows = conn.execute(sql, [*blocks, *buckets]).fetchall()
+    return [int(row["a_id"]) for row in rows if row["a_id"] != exclude_a_id]
+
+
+def get_minhash_signatures(a_ids: Sequence[int]) -> Dict[int, bytes]:
+    """Stored MinHash signatures (raw bytes) of the given buildings."""
+    if not a_ids:
+        return {}
+    placeholders = ", ".join("?" for _ in a_ids)
+    with get_connection() as conn:
+        rows = conn.execute(
+            f"SELECT a_id, signature FROM building_signatures WHERE a_id IN ({placeholders})",
+            list(a_ids),
+        ).fetchall()
+    return {int(row["a_id"]): bytes(row["signature"]) for row in rows}
+
+
+def clear_duplicate_index() -> None:
+    """Empty the LSH index and the duplicate clusters (Tables 11 and 12), before a rebuild."""
+
+    def op(conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM building_clusters")
+        conn.execute("DELETE FROM lsh_buckets")
+        conn.execute("DELETE FROM building_signatures")
+
+    run_write(op)
+
+
+def get_unindexed_building_ids(after_a_id: int = 0, limit: int = 1000) -> List[int]:
+    """Buildings after `after_a_id` with a description but no MinHash signature yet."""
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT b.a_id FROM buildings b
+            LEFT JOIN building_signatures s ON s.a_id = b.a_id
+            WHERE b.a_id > ? AND s.a_id IS NULL AND b.a_description IS NOT NULL
+            ORDER BY b.a_id ASC
+            LIMIT ?
+            """,
+            (after_a_id, limit),
+        ).fetchall()
+    return [int(row["a_id"]) for row in rows]
+
+
+def save_building_signatures(
+    entries: Sequence[Tuple[int, str, bytes, Sequence[int], Sequence[Tuple[int, float]]]],
+) -> None:
+    """
+    File buildings in the LSH index, in one transaction. Each entry is
+    (a_id, block, signature, buckets, duplicates), `duplicates` being the
+    (a_id, similarity) pairs found for it: the building is linked to them,
+    merging the clusters they were in.
+    """
+
+    def op(conn: sqlite3.Connection) -> None:
+        for a_id, block, signature, buckets, duplicates in entries:
+            conn.execute(
+                "INSERT OR REPLACE INTO building_signatures (a_id, block, signature) "
+                "VALUES (?, ?, ?)",
+                (a_id, block, signature),
+            )
+            conn.execute("DELETE FROM lsh_buckets WHERE a_id = ?", (a_id,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO lsh_buckets (block, bucket, a_id) VALUES (?, ?, ?)",
+                [(block, bucket, a_id) for bucket in buckets],
+            )
+            if duplicates:
+                _link_duplicates(conn, a_id, duplicates)
+
+    if entries:
+        run_write(op)
+
+
+def _link_duplicates(
+    conn: sqlite3.Connection, a_id: int, duplicates: Sequence[Tuple[int, float]]
+) -> None:
+    members = [a_id] + [other for other, _ in duplicates]
+    placeholders = ", ".join("?" for _ in members)
+    old_clusters = [
+        int(row["cluster_id"])
+        for row in conn.execute(
+            f"SELECT DISTINCT cluster_id FROM building_clusters WHERE a_id IN ({placeholders})",
+            members,
+        )
+    ]
+    cluster_id = min(members + old_clusters)
+    if old_clusters:
+        conn.execute(
+            "UPDATE building_clusters SET cluster_id = ? WHERE cluster_id IN "
+            f"({', '.join('?' for _ in old_clusters)})",
+            [cluster_id, *old_clusters],
+        )
+    best = max(similarity for _, similarity in duplicates)
+    conn.executemany(
+        """
+        INSERT INTO building_clusters (a_id, cluster_id, similarity) VALUES (?, ?, ?)
+        ON CONFLICT (a_id) DO UPDATE SET
+            cluster_id = excluded.cluster_id, similarity = excluded.similarity
+        """,
+        [(a_id, cluster_id, best)]
+        + [(other, cluster_id, similarity) for other, similarity in duplicates],
+    )
+
+
+def get_building_duplicates(a_id: int) -> List[Dict[str, Any]]:
+    """Other members of the building's duplicate cluster (a_id, a_url, similarity)."""
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT c.a_id, b.a_url, c.similarity
+            FROM building_clusters c
+            JOIN buildings b ON b.a_id = c.a_id
+            WHERE c.cluster_id = (SELECT cluster_id FROM building_clusters WHERE a_id = ?)
+              AND c.a_id != ?
+            ORDER BY c.a_id ASC
+            """,
+            (a_id, a_id),
+        ).fetchall()
+    return [_row_to_dict(row) for row in rows]
+
+
+# ---------------------------------------------------------------------------
+# Building versions: content changes & price history (Table 13)
+# ---------------------------------------------------------------------------
+
+def get_content_hashes(a_urls: Sequence[str]) -> Dict[str, Tuple[int, Optional[str]]]:
+    """
+    Map the given URLs that are already in Table 1 to (a_id, hash of the
+    latest recorded version); the hash is None when no version was
+    recorded yet (buildings inserted before versions were tracked).
+    """
+    found: Dict[str, Tuple[int, Optional[str]]] = {}
+    urls = list(dict.fromkeys(a_urls))
+    with get_connection() as conn:
+        for start in range(0, len(urls), DEFAULT_CHUNK_SIZE):
+            chunk = urls[start:start + DEFAULT_CHUNK_SIZE]
+            rows = conn.execute(
+                f"""
+                SELECT b.a_url, b.a_id, (
+                    SELECT v.content_hash FROM building_versions v
+                    WHERE v.a_id = b.a_id ORDER BY v.id DESC LIMIT 1
+                ) AS content_hash
+                FROM buildings b
+                WHERE b.a_url IN ({', '.join('?' for _ in chunk)})
+                """,
+                chunk,
+            ).fetchall()
+            for row in rows:
+                found[row["a_url"]] = (int(row["a_id"]), row["content_hash"])
+    return found
+
+
+def save_building_versions(
+    entries: Sequence[Tuple[int, Dict[str, Any], str, Optional[Dict[str, Any]]]],
+) -> int:
+    """
+    Record new versions of buildings, in one transaction. Each entry is
+    (a_id, updates, content_hash, changes): `updates` are the columns to
+    set on the building (may be empty), `changes` the {column: [old, new]}
+    of its content (None for a baseline version, e.g. the first one
+    recorded for an old building). Returns the number of versions saved.
+    """
+    for _, updates, _, _ in entries:
+        unknown = [col for col in updates if col not in BUILDING_COLUMNS or col == "a_id"]
+        if unknown:
+            raise ValueError(f"Unknown building column(s): {', '.join(unknown)}")
+
+    def op(conn: sqlite3.Connection) -> None:
+        for a_id, updates, content_hash, changes in entries:
+            if updates:
+                set_clause = ", ".join(f"{col} = ?" for col in updates)
+                conn.execute(
+                    f"UPDATE buildings SET {set_clause} WHERE a_id = ?",
+                    [*updates.values(), a_id],
+                )
+            conn.execute(
+                """
+                INSERT INTO building_versions (a_id, content_hash, a_price, changes)
+                VALUES (?, ?, (SELECT a_price FROM buildings WHERE a_id = ?), ?)
+                """,
+                (
+                    a_id,
+                    content_hash,
+                    a_id,
+                    json.dumps(changes, ensure_ascii=False) if changes else None,
+                ),
+            )
+
+    if entries:
+        run_write(op)
+        for a_id, updates, _, _ in entries:
+            if updates:
+                _building_cache.invalidate(a_id)
+    return len(entries)
+
+
+def get_price_history(a_id: int) -> List[Dict[str, Any]]:
+    """Prices of a building over time, oldest first, as {"a_price", "changed_at"}."""
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT a_price, changed_at FROM building_versions
+            WHERE a_id = ?
+            ORDER BY id ASC
+            """,
+            (a_id,),
+        ).fetchall()
+    history: List[Dict[str, Any]] = []
+    for row in rows:
+        if not history or history[-1]["a_price"] != row["a_price"]:
+            history.append(_row_to_dict(row))
+    return history
+
+
+def get_recent_changes(since: str, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Content changes recorded at or after `since` (ISO 8601 UTC, e.g.
+    "2024-05-01T00:00:00Z"), newest first, as {"a_id", "a_title", "a_price",
+    "changes", "changed_at"} dicts (`changes` decoded). A range scan on the
+    partial index of Table 13.
+    """
+    with get_connection() as conn:
+        rows = conn.execute(
+            """
+            SELECT v.a_id, b.a_title, v.a_price, v.changes, v.changed_at
+            FROM building_versions v
+            JOIN buildings b ON b.a_id = v.a_id
+            WHERE v.changes IS NOT NULL AND v.changed_at >= ?
+            ORDER BY v.changed_at DESC, v.id DESC
+            LIMIT ?
+            """,
+            (since, limit),
+        ).fetchall()
+    changes = [_row_to_dict(row) for row in rows]
+    for change in changes:
+        change["changes"] = json.loads(change["changes"])
+    return changes
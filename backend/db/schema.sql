@@ -18,7 +18,7 @@ CREATE TABLE IF NOT EXISTS buildings (
   a_surfaceArea REAL,
   a_description TEXT,
   a_images TEXT,               -- JSON or comma-separated URLs
-  a_publicationDate TEXT,      -- MM-DD-YYYY stored as text
+  a_publicationDate TEXT,      -- MM-DD-YYYY stored as text (legacy; see a_*At)
   a_dpe TEXT,
   a_ges TEXT,
 
@@ -37,7 +37,13 @@ CREATE TABLE IF NOT EXISTS buildings (
   c_revenue REAL,
   c_revenueCat INTEGER,        -- 1–10, 10 = highest revenue
   c_dept TEXT,
-  c_region TEXT
+  c_region TEXT,
+
+  -- ISO 8601 UTC ("2024-05-01T08:30:00Z"): sortable and range-scannable.
+  -- Added by a migration (init_db.py), which also creates their indexes.
+  a_publishedAt TEXT,          -- the listing's own date, if the page has one
+  a_firstSeenAt TEXT,          -- first scraped
+  a_lastSeenAt TEXT            -- last found in a search / scraped
 );
 
 -- Table 3: Sources (master list of source websites)
@@ -80,3 +86,302 @@ CREATE TABLE IF NOT EXISTS cart (
 CREATE INDEX IF NOT EXISTS idx_buildings_url ON buildings(a_url);
 CREATE INDEX IF NOT EXISTS idx_buildings_city ON buildings(a_city);
 CREATE INDEX IF NOT EXISTS idx_cart_id ON cart(id);
+
+-- Indexes backing the filters / sort keys of GET /api/buildings.
+-- SQLite appends the rowid (a_id) to every index, so an index on (col)
+-- already orders by (col, a_id) and serves keyset pagination on that sort.
+CREATE INDEX IF NOT EXISTS idx_buildings_price ON buildings(a_price);
+CREATE INDEX IF NOT EXISTS idx_buildings_surface ON buildings(a_surfaceArea);
+CREATE INDEX IF NOT EXISTS idx_buildings_price_sqm ON buildings(c_pricePerSqMeter);
+CREATE INDEX IF NOT EXISTS idx_buildings_city_price ON buildings(a_city, a_price);
+CREATE INDEX IF NOT EXISTS idx_buildings_postal_price ON buildings(a_postalCode, a_price);
+
+-- Partial index covering only the enrichment backlog (c_treated = 0), so
+-- chunked keyset scans over untreated rows never touch treated ones.
+CREATE INDEX IF NOT EXISTS idx_buildings_untreated
+  ON buildings(a_id) WHERE c_treated = 0;
+
+-- Same for the LLM backlog: buildings without llm_* values yet, treated
+-- or not (see backend/scraping/enrichment/llm_enrichment.py).
+CREATE INDEX IF NOT EXISTS idx_buildings_llm_missing
+  ON buildings(a_id) WHERE llm_residential_office IS NULL;
+
+-- Full-text search
+-- ----------------
+-- FTS5 index over the searchable text of `buildings`. External-content
+-- table: the text lives only in `buildings`; the index is kept in sync by
+-- the triggers below. `remove_diacritics 2` makes "etage" match "étage".
+-- (init_db.py rebuilds the index when it is created on a populated DB.)
+
+CREATE VIRTUAL TABLE IF NOT EXISTS buildings_fts USING fts5(
+  a_title,
+  a_description,
+  llm_other,
+  content='buildings',
+  content_rowid='a_id',
+  tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS buildings_fts_ai AFTER INSERT ON buildings BEGIN
+  INSERT INTO buildings_fts (rowid, a_title, a_description, llm_other)
+  VALUES (new.a_id, new.a_title, new.a_description, new.llm_other);
+END;
+
+CREATE TRIGGER IF NOT EXISTS buildings_fts_ad AFTER DELETE ON buildings BEGIN
+  INSERT INTO buildings_fts (buildings_fts, rowid, a_title, a_description, llm_other)
+  VALUES ('delete', old.a_id, old.a_title, old.a_description, old.llm_other);
+END;
+
+-- Only re-index when an indexed column changes (not on c_* / llm_* updates).
+CREATE TRIGGER IF NOT EXISTS buildings_fts_au
+AFTER UPDATE OF a_title, a_description, llm_other ON buildings BEGIN
+  INSERT INTO buildings_fts (buildings_fts, rowid, a_title, a_description, llm_other)
+  VALUES ('delete', old.a_id, old.a_title, old.a_description, old.llm_other);
+  INSERT INTO buildings_fts (rowid, a_title, a_description, llm_other)
+  VALUES (new.a_id, new.a_title, new.a_description, new.llm_other);
+END;
+
+-- Table 5: Building change log
+-- ----------------------------
+-- One row per insert / update / delete on `buildings`, written by triggers.
+-- `seq` is a monotonically increasing cursor: consumers (Parquet export,
+-- the API's change stream, ...) remember the last seq they processed and
+-- only read newer entries.
+
+CREATE TABLE IF NOT EXISTS building_changes (
+  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+  a_id INTEGER NOT NULL,
+  op TEXT NOT NULL,            -- "insert", "update" or "delete"
+  changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_building_changes_a_id ON building_changes(a_id);
+
+CREATE TRIGGER IF NOT EXISTS building_changes_ai AFTER INSERT ON buildings BEGIN
+  INSERT INTO building_changes (a_id, op) VALUES (new.a_id, 'insert');
+END;
+
+-- Not on updates of a_firstSeenAt / a_lastSeenAt alone: seeing an ad again
+-- is not a change of the building (same for Table 6). Keep the column list
+-- in sync with init_db.py (_BUILDING_UPDATE_TRIGGERS).
+CREATE TRIGGER IF NOT EXISTS building_changes_au
+AFTER UPDATE OF
+  a_url, a_title, a_city, a_postalCode, a_price, a_surfaceArea, a_description, a_images,
+  a_publicationDate, a_dpe, a_ges, a_publishedAt, llm_residential_office, llm_nbFlats,
+  llm_flatSizes, llm_other, c_treated, c_INSEE, c_pricePerSqMeter, c_taxHab, c_taxFonc,
+  c_vacancy, c_vacancyCat, c_revenue, c_revenueCat, c_dept, c_region
+ON buildings BEGIN
+  INSERT INTO building_changes (a_id, op) VALUES (new.a_id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS building_changes_ad AFTER DELETE ON buildings BEGIN
+  INSERT INTO building_changes (a_id, op) VALUES (old.a_id, 'delete');
+END;
+
+-- Table 6: Data versions
+-- ----------------------
+-- One change counter per table, bumped by triggers on every write. The API
+-- turns these into ETags: if the versions of the tables a response reads
+-- are unchanged, the client's cached copy is still valid.
+
+CREATE TABLE IF NOT EXISTS data_versions (
+  name TEXT PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0
+);
+
+-- 'buildings_seen' is bumped by the code that updates a_lastSeenAt alone
+-- (repositories.touch_buildings_seen), which the triggers leave out.
+INSERT OR IGNORE INTO data_versions (name) VALUES
+  ('buildings'),
+  ('buildings_seen'),
+  ('cart'),
+  ('search_links'),
+  ('sources');
+
+CREATE TRIGGER IF NOT EXISTS data_versions_buildings_ai AFTER INSERT ON buildings BEGIN
+  UPDATE data_versions SET version = version + 1 WHERE name = 'buildings';
+END;
+CREATE TRIGGER IF NOT EXISTS data_versions_buildings_au
+AFTER UPDATE OF
+  a_url, a_title, a_city, a_postalCode, a_price, a_surfaceArea, a_description, a_images,
+  a_publicationDate, a_dpe, a_ges, a_publishedAt, llm_residential_office, llm_nbFlats,
+  llm_flatSizes, llm_other, c_treated, c_INSEE, c_pricePerSqMeter, c_taxHab, c_taxFonc,
+  c_vacancy, c_vacancyCat, c_revenue, c_revenueCat, c_dept, c_region
+ON buildings BEGIN
+  UPDATE data_versions SET version = version + 1 WHERE name = 'buildings';
+END;
+CREATE TRIGGER IF NOT EXISTS data_versions_buildings_ad AFTER DELETE ON buildings BEGIN
+  UPDATE data_versions SET version = version + 1 WHERE name = 'buildings';
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_cart_ai AFTER INSERT ON cart BEGIN
+  UPDATE data_versions SET version = version + 1 WHERE name = 'cart';
+END;
+CREATE TRIGGER IF NOT EXISTS data_versions_cart_ad AFTER DELETE ON cart BEGIN
+  UPDATE data_versions SET version = version + 1 WHERE name = 'cart';
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_search_links_ai AFTER INSERT ON search_links BEGIN
+  UPDATE data_versions SET version = version + 1 WHERE name = 'search_links';
+END;
+CREATE TRIGGER IF NOT EXISTS data_versions_search_links_au AFTER UPDATE ON search_links BEGIN
+  UPDATE data_versions SET version = version + 1 WHERE name = 'search_links';
+END;
+CREATE TRIGGER IF NOT EXISTS data_versions_search_links_ad AFTER DELETE ON search_links BEGIN
+  UPDATE data_versions SET version = version + 1 WHERE name = 'search_links';
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_sources_ai AFTER INSERT ON sources BEGIN
+  UPDATE data_versions SET version = version + 1 WHERE name = 'sources';
+END;
+CREATE TRIGGER IF NOT EXISTS data_versions_sources_ad AFTER DELETE ON sources BEGIN
+  UPDATE data_versions SET version = version + 1 WHERE name = 'sources';
+END;
+
+-- Table 7: Search link schedule
+-- -----------------------------
+-- Crawl plan of each search link, maintained by the scraping scheduler
+-- (backend/scraping/scheduler.py). `new_ads_per_hour` is a moving average
+-- of the yield of past crawls; the interval and page depth follow from it.
+-- Times are UTC ISO-8601 strings; next_run_at NULL = due now.
+
+CREATE TABLE IF NOT EXISTS search_link_schedule (
+  search_link_id INTEGER PRIMARY KEY,
+  crawl_interval_sec INTEGER NOT NULL DEFAULT 3600,
+  max_pages INTEGER NOT NULL DEFAULT 3,
+  next_run_at TEXT,
+  last_run_at TEXT,
+  new_ads_per_hour REAL,
+  last_new_ads INTEGER,
+  last_urls_found INTEGER,
+  runs INTEGER NOT NULL DEFAULT 0,
+  FOREIGN KEY (search_link_id) REFERENCES search_links(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_search_link_schedule_next_run
+  ON search_link_schedule(next_run_at);
+
+-- Table 8: Scraping work queue
+-- ----------------------------
+-- Listing pages and ad URLs to fetch, shared by any number of scraping
+-- workers (backend/scraping/queue_worker.py). A worker leases a batch of
+-- items (status 'leased' until lease_expires_at), keeps the lease alive
+-- while working, then marks each item 'done' or returns it to 'pending'
+-- ('failed' after too many attempts). Expired leases are claimable again,
+-- so items of a crashed worker are picked up by the others.
+-- Times are Unix timestamps (seconds).
+
+CREATE TABLE IF NOT EXISTS work_queue (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  kind TEXT NOT NULL,          -- "listing" (search result page) or "ad"
+  source TEXT NOT NULL,
+  url TEXT NOT NULL,
+  page INTEGER NOT NULL DEFAULT 0,  -- listing page number (0 for ads)
+  status TEXT NOT NULL DEFAULT 'pending',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  lease_owner TEXT,
+  lease_expires_at REAL,
+  result TEXT,                 -- JSON summary of the outcome
+  error TEXT,
+  updated_at REAL,
+  UNIQUE (kind, url, page)
+);
+
+CREATE INDEX IF NOT EXISTS idx_work_queue_status ON work_queue(status, lease_expires_at);
+
+-- Table 9: Source politeness
+-- --------------------------
+-- Global request pacing per source website, shared by all workers: one
+-- request per source is in flight at a time, whichever worker or host
+-- makes it. While a request holds the slot, next_allowed_at is the end of
+-- its hold; once done, the next request may start min_interval_sec later.
+
+CREATE TABLE IF NOT EXISTS source_politeness (
+  source TEXT PRIMARY KEY,
+  min_interval_sec REAL NOT NULL,
+  next_allowed_at REAL NOT NULL DEFAULT 0
+);
+
+-- Table 10: LLM response cache
+-- ----------------------------
+-- Fields extracted by the LLM enrichment (backend/scraping/enrichment/
+-- llm_enrichment.py), keyed by a hash of the normalized description, the
+-- model and the prompt version: a reposted ad is never sent twice.
+-- `response` is the JSON object of llm_* values; token counts are those
+-- of the call that produced it (a share of it for batched prompts).
+
+CREATE TABLE IF NOT EXISTS llm_cache (
+  key TEXT PRIMARY KEY,
+  model TEXT NOT NULL,
+  response TEXT NOT NULL,
+  prompt_tokens INTEGER NOT NULL DEFAULT 0,
+  completion_tokens INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now'))
+);
+
+-- Table 11: MinHash signatures / LSH index (duplicate detection)
+-- -------------------------------------------------------------
+-- Maintained by backend/scraping/dedup.py. `signature` holds the MinHash
+-- of the normalized description (uint32 values, raw bytes); `block` is the
+-- postal code / price band / surface band the building was filed under.
+-- `lsh_buckets` files each building under one LSH bucket (band hash) per
+-- signature band, within its block: a new ad only meets the buildings of
+-- nearby blocks that share a bucket with it.
+
+CREATE TABLE IF NOT EXISTS building_signatures (
+  a_id INTEGER PRIMARY KEY,
+  block TEXT NOT NULL,
+  signature BLOB NOT NULL,
+  FOREIGN KEY (a_id) REFERENCES buildings(a_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+  block TEXT NOT NULL,
+  bucket INTEGER NOT NULL,
+  a_id INTEGER NOT NULL,
+  PRIMARY KEY (block, bucket, a_id),
+  FOREIGN KEY (a_id) REFERENCES buildings(a_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_lsh_buckets_a_id ON lsh_buckets(a_id);
+
+-- Table 12: Duplicate clusters
+-- ----------------------------
+-- Buildings found to be the same property listed several times (other
+-- source, reposted ad). All members of a cluster share `cluster_id`, the
+-- smallest a_id among them; `similarity` is the estimated Jaccard
+-- similarity with the member it was matched against.
+
+CREATE TABLE IF NOT EXISTS building_clusters (
+  a_id INTEGER PRIMARY KEY,
+  cluster_id INTEGER NOT NULL,
+  similarity REAL,
+  linked_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now')),
+  FOREIGN KEY (a_id) REFERENCES buildings(a_id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_building_clusters_cluster ON building_clusters(cluster_id);
+
+-- Table 13: Building versions (content changes / price history)
+-- ------------------------------------------------------------
+-- One row per known state of an ad's content (backend/scraping/changes.py):
+-- `content_hash` is the hash of its parsed fields; a revisit whose hash
+-- matches the latest one writes nothing. `changes` maps each field that
+-- changed to its [old, new] values (JSON), NULL for the first state
+-- recorded; `a_price` is the price from then on, so the rows of an ad are
+-- its price history. The partial index serves "recently changed" queries
+-- without touching the baseline rows.
+
+CREATE TABLE IF NOT EXISTS building_versions (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  a_id INTEGER NOT NULL,
+  content_hash TEXT NOT NULL,
+  a_price REAL,
+  changes TEXT,
+  changed_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%SZ', 'now')),
+  FOREIGN KEY (a_id) REFERENCES buildings(a_id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_building_versions_a_id ON building_versions(a_id, id);
+CREATE INDEX IF NOT EXISTS idx_building_versions_changed
+  ON building_versions(changed_at) WHERE changes IS NOT NULL;
@@ -0,0 +1,196 @@
+"""
+Single-writer actor for the SQLite database.
+
+SQLite allows one writer at a time. When the API, the scraper and the
+enrichment each open a connection and commit on their own, they queue up on
+the write lock and stall (SQLITE_BUSY). `DBWriter` instead owns the only
+write connection of the process:
+
+- callers submit write operations (`fn(conn) -> result`) to a queue and get
+  a `concurrent.futures.Future` back
+- one thread drains the queue and applies everything waiting in a single
+  transaction (group commit): one fsync for many small writes
+- each operation runs inside its own SAVEPOINT, so a failing one is rolled
+  back and reported on its future without affecting the rest of the batch
+- futures are resolved only after the commit, so a result means "durable"
+
+Readers are unaffected: in WAL mode they keep reading their own snapshot
+while the writer commits.
+
+Operations run on the writer thread with the writer's connection: they must
+not commit, and must not call repository write functions themselves.
+
+Repository write functions go through `run_write()`, which uses the running
+writer when there is one (see `start_writer()`), and otherwise writes
+directly on a fresh connection, as before.
+"""
+
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, TypeVar
+
+from .connection import get_connection, open_connection
+
+T = TypeVar("T")
+
+WriteOp = Callable[[sqlite3.Connection], Any]
+
+
+@dataclass
+class _PendingWrite:
+    op: WriteOp
+    future: Future = field(default_factory=Future)
+
+
+class DBWriter:
+    """
+    Thread owning the process's write connection.
+
+    :param max_batch: maximum number of operations per transaction
+    :param linger_sec: how long to wait for more operations once one has
+        arrived (0 = commit whatever is queued right away)
+    """
+
+    def __init__(self, max_batch: int = 500, linger_sec: float = 0.0) -> None:
+        self.max_batch = max_batch
+        self.linger_sec = linger_sec
+        self._queue: "queue.Queue[Optional[_PendingWrite]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.transactions = 0
+        self.operations = 0
+
+    # -------------------- public API --------------------
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Apply every operation already queued, then stop the thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def submit(self, op: WriteOp) -> Future:
+        """Queue a write operation; its result is delivered on the future."""
+        pending = _PendingWrite(op)
+        self._queue.put(pending)
+        return pending.future
+
+    def is_writer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def stats(self) -> dict:
+        return {
+            "transactions": self.transactions,
+            "operations": self.operations,
+            "queued": self._queue.qsize(),
+        }
+
+    # -------------------- writer thread --------------------
+
+    def _next_batch(self) -> List[Optional[_PendingWrite]]:
+        batch: List[Optional[_PendingWrite]] = [self._queue.get()]
+        while len(batch) < self.max_batch and batch[-1] is not None:
+            try:
+                if self.linger_sec:
+                    batch.append(self._queue.get(timeout=self.linger_sec))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _apply(self, conn: sqlite3.Connection, batch: List[_PendingWrite]) -> None:
+        results: List[Any] = []
+        errors: List[Optional[BaseException]] = []
+
+        try:
+            # IMMEDIATE takes the write lock up front instead of failing on
+            # a read-to-write upgrade later in the transaction.
+            conn.execute("BEGIN IMMEDIATE")
+            for pending in batch:
+                conn.execute("SAVEPOINT op")
+                try:
+                    results.append(pending.op(conn))
+                    errors.append(None)
+                except BaseException as exc:  # reported on the op's future
+                    conn.execute("ROLLBACK TO op")
+                    results.append(None)
+                    errors.append(exc)
+                conn.execute("RELEASE op")
+            conn.execute("COMMIT")
+        except BaseException as exc:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for pending in batch:
+                pending.future.set_exception(exc)
+            return
+
+        self.transactions += 1
+        self.operations += len(batch)
+        for pending, result, error in zip(batch, results, errors):
+            if error is None:
+                pending.future.set_result(result)
+            else:
+                pending.future.set_exception(error)
+
+    def _run(self) -> None:
+        conn = open_connection()
+        conn.isolation_level = None  # transactions are managed explicitly
+        try:
+            while True:
+                batch = self._next_batch()
+                stopping = batch[-1] is None
+                ops = [p for p in batch if p is not None]
+                if ops:
+                    self._apply(conn, ops)
+                if stopping:
+                    return
+        finally:
+            conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Process-wide writer
+# ---------------------------------------------------------------------------
+
+_writer: Optional[DBWriter] = None
+
+
+def start_writer(max_batch: int = 500, linger_sec: float = 0.0) -> DBWriter:
+    """Start the process-wide writer (idempotent) and return it."""
+    global _writer
+    if _writer is None:
+        _writer = DBWriter(max_batch=max_batch, linger_sec=linger_sec)
+        _writer.start()
+    return _writer
+
+
+def stop_writer() -> None:
+    """Flush and stop the process-wide writer, if running."""
+    global _writer
+    if _writer is not None:
+        writer, _writer = _writer, None
+        writer.stop()
+
+
+def get_writer() -> Optional[DBWriter]:
+    """Return the running process-wide writer, or None."""
+    return _writer
+
+
+def run_write(op: Callable[[sqlite3.Connection], T]) -> T:
+    """
+    Execute a write operation and return its result.
+
+    Goes through the process-wide writer when it is running; otherwise (CLI
+    scripts, tests) runs `op` on a fresh connection and commits.
+    """
+    writer = _writer
+    if writer is not None and not writer.is_writer_thread():
+        return writer.submit(op).result()
+
+    with get_connection() as conn:  # commits on success, rolls back on error
+        return op(conn)
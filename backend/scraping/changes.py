@@ -0,0 +1,126 @@
+"""
+Change detection for ads that are already stored.
+
+By default the engine skips every URL already in Table 1, so price drops
+and edited descriptions are never seen. With `revisit`, known ads are
+re-fetched and re-parsed instead, and compared by content hash:
+
+- the hash covers the parsed fields of the ad (CONTENT_COLUMNS), not the
+  scrape date nor the enrichment columns, so an identical page hashes the
+  same on every visit
+- a revisit whose hash matches the latest version writes nothing
+- otherwise the changed fields are written to the building, and a new
+  version (hash, price, {field: [old, new]}) is recorded in Table 13, the
+  building's price history
+
+Buildings inserted before versions were tracked have no hash yet: their
+stored row is compared on their first revisit, and a baseline version is
+recorded if nothing changed.
+"""
+
+import hashlib
+import json
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from ..db import repositories as db_repo
+
+if TYPE_CHECKING:
+    from .enrichment.pipeline import EnrichmentPipeline
+
+# Parsed ad fields covered by the content hash.
+CONTENT_COLUMNS: Tuple[str, ...] = (
+    "a_title",
+    "a_city",
+    "a_postalCode",
+    "a_price",
+    "a_surfaceArea",
+    "a_description",
+    "a_images",
+    "a_dpe",
+    "a_ges",
+)
+
+
+def _normalize(value: Any) -> Any:
+    # 250000 and 250000.0, or "Lille" and "Lille ", are the same content.
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return value.strip() or None
+    return value
+
+
+def content_hash(building: Dict[str, Any]) -> str:
+    """SHA-256 of the normalized content fields of a building dict."""
+    payload = json.dumps(
+        [_normalize(building.get(col)) for col in CONTENT_COLUMNS],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def diff_content(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """{column: [old, new]} for each content field that differs."""
+    return {
+        col: [old.get(col), new.get(col)]
+        for col in CONTENT_COLUMNS
+        if _normalize(old.get(col)) != _normalize(new.get(col))
+    }
+
+
+def save_revisits(
+    revisits: Sequence[Tuple[int, Optional[str], Dict[str, Any]]],
+    pipeline: Optional["EnrichmentPipeline"] = None,
+) -> List[str]:
+    """
+    Compare re-parsed ads with what is stored and record the changes, in
+    one write. Each revisit is (a_id, stored hash or None, parsed building
+    dict). Changed buildings go through the enrichment `pipeline` first,
+    if one is given.
+
+    Returns the status of each revisit, in order: "updated" or "unchanged".
+    """
+    hashes = [content_hash(building) for _, _, building in revisits]
+    # Only the ads whose hash differs need their stored row.
+    to_compare = [
+        a_id for (a_id, stored, _), new in zip(revisits, hashes) if stored != new
+    ]
+    stored_rows = {
+        row["a_id"]: row
+        for row in db_repo.get_buildings_by_ids(to_compare, columns=CONTENT_COLUMNS)
+    }
+
+    statuses: List[str] = []
+    changed: List[Tuple[int, Dict[str, Any], str, Dict[str, List[Any]]]] = []
+    baselines = []
+    for (a_id, stored, building), new in zip(revisits, hashes):
+        row = stored_rows.get(a_id)
+        changes = diff_content(row, building) if row is not None else {}
+        if changes:
+            changed.append((a_id, building, new, changes))
+            statuses.append("updated")
+        else:
+            if row is not None:
+                # Same content under a new hash (e.g. first revisit since
+                # versions are tracked): record it, so next time is a match.
+                baselines.append((a_id, {}, new, None))
+            statuses.append("unchanged")
+
+    if pipeline is not None and changed:
+        pipeline.process([building for _, building, _, _ in changed])
+    enriched = pipeline.columns + ("c_treated",) if pipeline is not None else ()
+    entries = baselines + [
+        (
+            a_id,
+            {
+                **{col: building.get(col) for col in changes},
+                **{col: building[col] for col in enriched if col in building},
+            },
+            new,
+            changes,
+        )
+        for a_id, building, new, changes in changed
+    ]
+    db_repo.save_building_versions(entries)
+    return statuses
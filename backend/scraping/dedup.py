@@ -0,0 +1,246 @@
+"""
+Cross-source duplicate detection (MinHash + LSH).
+
+The same building shows up under several URLs (other sources, reposted
+ads) with slightly different descriptions. Comparing each new ad with
+every stored one would be O(n²); instead:
+
+- each description is normalized and cut into word 3-gram shingles, and
+  summarized by a MinHash signature (NUM_PERM values): the share of equal
+  values between two signatures estimates the Jaccard similarity of their
+  shingle sets
+- the signature is cut into BANDS bands of ROWS values; the hash of each
+  band is an LSH bucket, filed under the building's block (postal code,
+  price band, surface band). Two buildings of the same block with
+  similarity s share at least one bucket with probability
+  1 - (1 - s^ROWS)^BANDS (about 0.87 at s = 0.5, over 0.999 at s = 0.7)
+- a new ad is looked up in its buckets and those of the neighbouring
+  blocks (adjacent price / surface bands), so only a handful of
+  candidates are compared, and those above SIMILARITY_THRESHOLD are linked
+  into a cluster (Table 12)
+
+The index (Table 11) lives in the database, so it persists between runs
+and is shared by every process. The engine files each building as it is
+inserted; existing buildings are indexed with:
+
+    python -m backend.scraping.dedup [--rebuild]
+"""
+
+import argparse
+import hashlib
+import math
+import re
+import unicodedata
+from itertools import product
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..db import repositories as db_repo
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+SIMILARITY_THRESHOLD = 0.7
+
+# Blocking: prices in bands of ~15%, surfaces in bands of ~20% (log scale).
+PRICE_BAND_RATIO = 1.15
+SURFACE_BAND_RATIO = 1.2
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures must stay comparable across runs and processes.
+_rng = np.random.RandomState(20240501)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+# One salt per band, so equal values in different bands hash apart.
+_BAND_SALTS = [band.to_bytes(2, "little") for band in range(BANDS)]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+# -------------------- signatures --------------------
+
+
+def shingles(text: Optional[str]) -> List[str]:
+    """Word 3-grams of the normalized text (accents, case and punctuation dropped)."""
+    if not text:
+        return []
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    words = _WORD_RE.findall(ascii_text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+
+
+def minhash_signature(text: Optional[str]) -> Optional[np.ndarray]:
+    """MinHash signature (NUM_PERM uint32 values) of a description, None if empty."""
+    items = set(shingles(text))
+    if not items:
+        return None
+    hashes = np.array(
+        [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+            for s in items
+        ],
+        dtype=np.uint64,
+    )
+    # (a * h + b) mod p for every permutation x shingle; a < 2^31 and
+    # b, h < 2^32, so nothing overflows 64 bits before the modulo.
+    permuted = (np.outer(_PERM_A, hashes) + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return (permuted & _MAX_HASH).min(axis=1).astype(np.uint32)
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+# -------------------- blocking / buckets --------------------
+
+
+def _band(value: Any, ratio: float) -> Optional[int]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(math.floor(math.log(value) / math.log(ratio))) if value > 0 else None
+
+
+def _block(postal: str, price_band: Optional[int], surface_band: Optional[int]) -> str:
+    bands = ("" if band is None else str(band) for band in (price_band, surface_band))
+    return "|".join((postal, *bands))
+
+
+def blocking_keys(building: Dict[str, Any]) -> Tuple[str, List[str]]:
+    """
+    The building's own block, and the blocks to search: its own and the
+    ones of the adjacent price / surface bands (values near a band edge).
+    """
+    postal = str(building.get("a_postalCode") or "").strip()
+    price = _band(building.get("a_price"), PRICE_BAND_RATIO)
+    surface = _band(building.get("a_surfaceArea"), SURFACE_BAND_RATIO)
+    prices = [None] if price is None else [price - 1, price, price + 1]
+    surfaces = [None] if surface is None else [surface - 1, surface, surface + 1]
+    neighbours = [_block(postal, p, s) for p, s in product(prices, surfaces)]
+    return _block(postal, price, surface), neighbours
+
+
+def lsh_buckets(signature: np.ndarray) -> List[int]:
+    """One bucket id (signed 64-bit, for SQLite) per band of the signature."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(band.tobytes(), digest_size=8, salt=_BAND_SALTS[i]).digest(),
+            "little",
+            signed=True,
+        )
+        for i, band in enumerate(signature.reshape(BANDS, ROWS))
+    ]
+
+
+# -------------------- index --------------------
+
+
+def index_buildings(
+    buildings: Sequence[Dict[str, Any]],
+    a_ids: Sequence[Optional[int]],
+) -> List[List[Tuple[int, float]]]:
+    """
+    Look up the duplicates of freshly stored buildings (a_id None = not
+    inserted, skipped), among the indexed ones and each other, then file
+    them all in the index and link them, in one write. Returns the
+    duplicates found for each building, as (a_id, similarity) pairs.
+    """
+    found: List[List[Tuple[int, float]]] = []
+    entries = []
+    # Earlier buildings of this batch, not in the database yet.
+    batch_buckets: Dict[Tuple[str, int], List[int]] = {}
+    batch_signatures: Dict[int, np.ndarray] = {}
+
+    for building, a_id in zip(buildings, a_ids):
+        signature = minhash_signature(building.get("a_description")) if a_id else None
+        if signature is None:
+            found.append([])
+            continue
+        block, search_blocks = blocking_keys(building)
+        buckets = lsh_buckets(signature)
+
+        candidates = db_repo.get_lsh_candidates(search_blocks, buckets, exclude_a_id=a_id)
+        signatures = {
+            other: np.frombuffer(raw, dtype=np.uint32)
+            for other, raw in db_repo.get_minhash_signatures(candidates).items()
+        }
+        for key in product(search_blocks, buckets):
+            for other in batch_buckets.get(key, ()):
+                signatures[other] = batch_signatures[other]
+
+        scores = ((other, similarity(signature, sig)) for other, sig in signatures.items())
+        duplicates = sorted(
+            (match for match in scores if match[1] >= SIMILARITY_THRESHOLD),
+            key=lambda match: -match[1],
+        )
+        found.append(duplicates)
+        entries.append((a_id, block, signature.tobytes(), buckets, duplicates))
+        batch_signatures[a_id] = signature
+        for bucket in buckets:
+            batch_buckets.setdefault((block, bucket), []).append(a_id)
+
+    db_repo.save_building_signatures(entries)
+    return found
+
+
+def index_building(a_id: int, building: Dict[str, Any]) -> List[Tuple[int, float]]:
+    """`index_buildings()` for a single building; returns its duplicates."""
+    return index_buildings([building], [a_id])[0]
+
+
+def run_indexing(rebuild: bool = False, chunk_size: int = 1000) -> int:
+    """
+    File the stored buildings that are not indexed yet (all of them with
+    `rebuild`, after emptying the index and the clusters), oldest first.
+    Returns how many were linked to a duplicate.
+    """
+    columns = ["a_postalCode", "a_price", "a_surfaceArea", "a_description"]
+    linked = 0
+    indexed = 0
+
+    def index(chunk: List[Dict[str, Any]]) -> None:
+        nonlocal linked, indexed
+        duplicates = index_buildings(chunk, [b["a_id"] for b in chunk])
+        linked += sum(1 for d in duplicates if d)
+        indexed += len(chunk)
+
+    if rebuild:
+        db_repo.clear_duplicate_index()
+        chunk: List[Dict[str, Any]] = []
+        for row in db_repo.iter_buildings(columns=columns, chunk_size=chunk_size):
+            chunk.append(dict(row))
+            if len(chunk) >= chunk_size:
+                index(chunk)
+                chunk = []
+        if chunk:
+            index(chunk)
+    else:
+        last_id = 0
+        while True:
+            a_ids = db_repo.get_unindexed_building_ids(last_id, chunk_size)
+            if not a_ids:
+                break
+            last_id = a_ids[-1]
+            index(db_repo.get_buildings_by_ids(a_ids, columns=columns))
+    print(f"[INFO] Dedup: {indexed} buildings indexed, {linked} linked to a duplicate.")
+    return linked
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Index buildings for duplicate detection.")
+    parser.add_argument("--rebuild", action="store_true", help="re-index every building")
+    args = parser.parse_args()
+    run_indexing(rebuild=args.rebuild)
+
+
+if __name__ == "__main__":
+    main()
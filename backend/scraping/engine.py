@@ -8,39 +8,77 @@ Pipeline:
 1. Read search links from DB (Table 2: search_links).
 2. For each search link, use the appropriate source scraper to collect ad URLs.
 3. Save an aggregated CSV of all ad URLs (url + source).
-4. For each URL, if not already in Table 1 (buildings), fetch ad data and insert.
-
-Enrichment steps (CSV-based + LLM) will run AFTER this pipeline; see TODOs.
+4. For each URL, if not already in Table 1 (buildings), fetch ad data,
+   enrich it (CSV lookups, price per m², optionally LLM; see
+   `enrichment/pipeline.py`) and insert it, in batches, fully treated;
+   each new building is linked to its likely duplicates (see `dedup.py`).
+   With `revisit`, known URLs are fetched again too, and only the ads
+   whose content changed are written (see `changes.py`).
+5. Recompute the dataset-wide metrics (decile categories).
+
+Callers that want live progress (e.g. the API's background jobs, see
+`jobs.py`) pass a `progress(event, data)` callback; events are:
+
+- "phase":       {"phase": "collect" | "scrape", "total": int}
+- "search_link": {"urls": int}             one search link processed
+- "ad":          {"status": "inserted" | "updated" | "unchanged" | "skipped"
+                             | "failed"}
+- "error":       {"message": str}
 """
 
 import csv
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from ..db import repositories as db_repo      # ✅ go up to backend, then into db
+from .changes import content_hash, save_revisits
 from .sources import get_source_by_name       # ✅ same package (scraping)
 
+if TYPE_CHECKING:
+    from .enrichment.pipeline import EnrichmentPipeline
+
 
-# Directory and file for aggregated URLs CSV
+# Directory and file for aggregated URLs CSV (created when first written)
 OUTPUT_DIR = Path(__file__).resolve().parent / "data" / "output"
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 AGGREGATED_URLS_CSV = OUTPUT_DIR / "urls_aggregated.csv"
 
+# Parsed ads inserted per transaction.
+INSERT_BATCH_SIZE = 25
+
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
 
-def collect_ad_urls(max_pages_per_search: int = 3) -> List[Dict[str, str]]:
+def _emit(progress: Optional[ProgressCallback], event: str, **data: Any) -> None:
+    if progress is not None:
+        progress(event, data)
+
+
+def collect_ad_urls(
+    max_pages_per_search: int = 3,
+    search_link_ids: Optional[Sequence[int]] = None,
+    csv_path: Path = AGGREGATED_URLS_CSV,
+    progress: Optional[ProgressCallback] = None,
+) -> List[Dict[str, str]]:
     """
     Phase 1: read search links from DB, collect ad URLs per source, and
     write them into a single aggregated CSV.
 
+    Only the search links in `search_link_ids` are used, if given.
+
     Returns:
         List of dicts with keys:
             - "url"
             - "source"
     """
     search_links = db_repo.get_search_links()
+    if search_link_ids is not None:
+        wanted = set(search_link_ids)
+        search_links = [row for row in search_links if row["id"] in wanted]
     all_rows: List[Dict[str, str]] = []
     seen = set()  # (url, source) pairs
 
+    _emit(progress, "phase", phase="collect", total=len(search_links))
+
     for row in search_links:
         search_url = row["link"]
         source_name = row["source"]
@@ -51,6 +89,8 @@ def collect_ad_urls(max_pages_per_search: int = 3) -> List[Dict[str, str]]:
                 f"[WARN] No scraper implemented for source '{source_name}'. "
                 f"Skipping search URL: {search_url}"
             )
+            _emit(progress, "error", message=f"No scraper for source '{source_name}'")
+            _emit(progress, "search_link", urls=0)
             continue
 
         print(f"[INFO] Collecting ad URLs from {source_name} search: {search_url}")
@@ -61,8 +101,11 @@ def collect_ad_urls(max_pages_per_search: int = 3) -> List[Dict[str, str]]:
                 f"[ERROR] Failed to collect URLs for source '{source_name}' "
                 f"search '{search_url}': {exc}"
             )
+            _emit(progress, "error", message=f"{search_url}: {exc}")
+            _emit(progress, "search_link", urls=0)
             continue
 
+        _emit(progress, "search_link", urls=len(urls))
         for url in urls:
             key = (url, source_name)
             if key not in seen:
@@ -70,7 +113,8 @@ def collect_ad_urls(max_pages_per_search: int = 3) -> List[Dict[str, str]]:
                 all_rows.append({"url": url, "source": source_name})
 
     # Write aggregated CSV
-    with AGGREGATED_URLS_CSV.open("w", newline="", encoding="utf-8") as f:
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    with csv_path.open("w", newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=["url", "source"])
         writer.writeheader()
         writer.writerows(all_rows)
@@ -79,26 +123,26 @@ def collect_ad_urls(max_pages_per_search: int = 3) -> List[Dict[str, str]]:
         f"[INFO] Collected {len(all_rows)} unique ad URLs from "
         f"{len(search_links)} search links."
     )
-    print(f"[INFO] Aggregated URLs written to: {AGGREGATED_URLS_CSV}")
+    print(f"[INFO] Aggregated URLs written to: {csv_path}")
     return all_rows
 
 
-def load_urls_from_csv() -> List[Dict[str, str]]:
+def load_urls_from_csv(csv_path: Path = AGGREGATED_URLS_CSV) -> List[Dict[str, str]]:
     """
     Utility to re-load URLs from the aggregated CSV.
 
     (Not strictly necessary, but mirrors the spec: "It creates an aggregated CSV
     file with all the URLs, THEN component (2) is used to extract the ad data.")
     """
-    if not AGGREGATED_URLS_CSV.exists():
+    if not csv_path.exists():
         print(
-            f"[WARN] Aggregated CSV {AGGREGATED_URLS_CSV} does not exist. "
+            f"[WARN] Aggregated CSV {csv_path} does not exist. "
             "Run collect_ad_urls() first."
         )
         return []
 
     rows: List[Dict[str, str]] = []
-    with AGGREGATED_URLS_CSV.open("r", newline="", encoding="utf-8") as f:
+    with csv_path.open("r", newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
             if "url" in row and "source" in row:
@@ -106,17 +150,119 @@ def load_urls_from_csv() -> List[Dict[str, str]]:
     return rows
 
 
-def scrape_ads_from_urls(rows: List[Dict[str, str]]) -> None:
+def _insert_batch(
+    batch: List[Dict[str, Any]],
+    pipeline: Optional[EnrichmentPipeline],
+    progress: Optional[ProgressCallback],
+) -> int:
+    """
+    Enrich a batch of parsed ads (if a pipeline is given), insert it in one
+    write, and file the new buildings in the duplicate index (`dedup.py`).
+    """
+    if pipeline is not None:
+        pipeline.process(batch)
+    try:
+        a_ids = db_repo.insert_buildings(batch, [content_hash(b) for b in batch])
+    except Exception as exc:
+        print(f"[ERROR] Failed to insert {len(batch)} buildings: {exc}")
+        _emit(progress, "error", message=f"insert: {exc}")
+        for _ in batch:
+            _emit(progress, "ad", status="failed")
+        return 0
+
+    try:
+        from .dedup import index_buildings
+
+        index_buildings(batch, a_ids)
+    except Exception as exc:
+        print(f"[WARN] Duplicate detection failed: {exc}")
+
+    for building, a_id in zip(batch, a_ids):
+        if a_id is None:
+            print(f"[SKIP] Already in DB: {building.get('a_url')}")
+            _emit(progress, "ad", status="skipped")
+        else:
+            print(f"[OK] Inserted building a_id={a_id} from {building.get('a_url')}")
+            _emit(progress, "ad", status="inserted")
+    return sum(1 for a_id in a_ids if a_id is not None)
+
+
+def _update_batch(
+    revisits: List[Tuple[int, Optional[str], Dict[str, Any]]],
+    pipeline: Optional[EnrichmentPipeline],
+    progress: Optional[ProgressCallback],
+) -> int:
+    """
+    Compare a batch of re-fetched known ads with what is stored, write the
+    changed ones in one write (`changes.py`) and re-file those whose
+    description changed in the duplicate index.
+    """
+    try:
+        statuses = save_revisits(revisits, pipeline)
+    except Exception as exc:
+        print(f"[ERROR] Failed to update {len(revisits)} buildings: {exc}")
+        _emit(progress, "error", message=f"update: {exc}")
+        for _ in revisits:
+            _emit(progress, "ad", status="failed")
+        return 0
+
+    updated = [
+        (a_id, building)
+        for (a_id, _, building), status in zip(revisits, statuses)
+        if status == "updated"
+    ]
+    if updated:
+        try:
+            from .dedup import index_buildings
+
+            index_buildings([b for _, b in updated], [a_id for a_id, _ in updated])
+        except Exception as exc:
+            print(f"[WARN] Duplicate detection failed: {exc}")
+
+    for (a_id, _, building), status in zip(revisits, statuses):
+        if status == "updated":
+            print(f"[OK] Updated building a_id={a_id} from {building.get('a_url')}")
+        _emit(progress, "ad", status=status)
+    return len(updated)
+
+
+def scrape_ads_from_urls(
+    rows: List[Dict[str, str]],
+    progress: Optional[ProgressCallback] = None,
+    pipeline: Optional[EnrichmentPipeline] = None,
+    batch_size: int = INSERT_BATCH_SIZE,
+    revisit: bool = False,
+) -> int:
     """
     Phase 2: given a list of {url, source} dicts, fetch ad data and insert
     into Table 1 (buildings) if not already present.
+
+    Parsed ads are inserted `batch_size` at a time, in one transaction per
+    batch, after going through the enrichment `pipeline` if one is given
+    (they then land with c_treated = 1).
+
+    URLs already in Table 1 are skipped, unless `revisit` is set: they are
+    then fetched again, and written only if their content changed (see
+    `changes.py`). Returns the number of buildings inserted or updated.
     """
+    _emit(progress, "phase", phase="scrape", total=len(rows))
+    # One lookup for the whole run instead of one query per URL.
+    known = db_repo.get_content_hashes([row["url"] for row in rows])
+    # Ads still listed by a search are still on the market.
+    try:
+        db_repo.touch_buildings_seen(list(known))
+    except Exception as exc:
+        print(f"[WARN] Failed to update last-seen timestamps: {exc}")
+    batch: List[Dict[str, Any]] = []
+    revisits: List[Tuple[int, Optional[str], Dict[str, Any]]] = []
+    written = 0
     for row in rows:
         url = row["url"]
         source_name = row["source"]
 
-        if db_repo.building_exists_by_url(url):
+        if url in known and not revisit:
             print(f"[SKIP] Already in DB: {url}")
+            _emit(progress, "ad", status="skipped")
             continue
 
         source = get_source_by_name(source_name)
@@ -125,6 +271,7 @@ def scrape_ads_from_urls(rows: List[Dict[str, str]]) -> None:
                 f"[WARN] No scraper implemented for source '{source_name}'. "
                 f"Skipping ad URL: {url}"
             )
+            _emit(progress, "ad", status="skipped")
             continue
 
         print(f"[INFO] Scraping {source_name} ad: {url}")
@@ -132,51 +279,77 @@ def scrape_ads_from_urls(rows: List[Dict[str, str]]) -> None:
             building_data = source.fetch_ad_data(url)
         except Exception as exc:
             print(f"[ERROR] Failed to fetch ad data for {url}: {exc}")
+            _emit(progress, "error", message=f"{url}: {exc}")
+            _emit(progress, "ad", status="failed")
             continue
 
-        try:
-            inserted_id = db_repo.insert_building(building_data)
-            print(f"[OK] Inserted building a_id={inserted_id} from {url}")
-        except Exception as exc:
-            print(f"[ERROR] Failed to insert building for {url}: {exc}")
-
+        if url in known:
+            a_id, stored_hash = known[url]
+            revisits.append((a_id, stored_hash, building_data))
+            if len(revisits) >= batch_size:
+                written += _update_batch(revisits, pipeline, progress)
+                revisits = []
+            continue
 
-def run_full_scraping(max_pages_per_search: int = 3) -> None:
+        batch.append(building_data)
+        if len(batch) >= batch_size:
+            written += _insert_batch(batch, pipeline, progress)
+            batch = []
+
+    if batch:
+        written += _insert_batch(batch, pipeline, progress)
+    if revisits:
+        written += _update_batch(revisits, pipeline, progress)
+    return written
+
+
+def run_full_scraping(
+    max_pages_per_search: int = 3,
+    search_link_ids: Optional[Sequence[int]] = None,
+    csv_path: Path = AGGREGATED_URLS_CSV,
+    progress: Optional[ProgressCallback] = None,
+    enrich: bool = True,
+    revisit: bool = False,
+) -> None:
     """
-    Run the full scraping pipeline (without enrichment):
+    Run the full scraping pipeline:
 
-    1. Collect URLs and write them to urls_aggregated.csv
+    1. Collect URLs and write them to urls_aggregated.csv (or `csv_path`)
     2. Reload URLs from that CSV
-    3. Scrape each ad and insert new buildings into Table 1
+    3. Scrape each ad, enrich it inline (unless `enrich` is False) and
+       insert new buildings into Table 1; with `revisit`, known ads are
+       scraped again and updated if they changed
+    4. Recompute the dataset-wide metrics (decile categories)
 
-    Enrichment (CSV-based + LLM) will be called after this in a later step.
+    `search_link_ids` restricts the run to some search links; `progress`
+    receives live progress events (see module docstring).
     """
+    pipeline = None
+    if enrich:
+        from .enrichment.pipeline import build_pipeline
+
+        pipeline = build_pipeline()
+
     print("[STEP 1] Collecting ad URLs from search links...")
-    collect_ad_urls(max_pages_per_search=max_pages_per_search)
+    collect_ad_urls(
+        max_pages_per_search=max_pages_per_search,
+        search_link_ids=search_link_ids,
+        csv_path=csv_path,
+        progress=progress,
+    )
 
     print("[STEP 2] Loading URLs from aggregated CSV...")
-    rows = load_urls_from_csv()
-
-    print("[STEP 3] Scraping ad pages and inserting into DB...")
-    scrape_ads_from_urls(rows)
-
-    # ------------------------------------------------------------------
-    # TODO (Enrichment Phase)
-    #
-    # After scraping, we will run:
-    #
-    #   - CSV-based enrichment (Table 1 c_XXX fields)
-    #   - LLM-based enrichment (Table 1 llm_XXX fields)
-    #
-    # For example (to be implemented later):
-    #
-    #   from scraping.enrichment.csv_enrichment import run_csv_enrichment
-    #   from scraping.enrichment.llm_enrichment import run_llm_enrichment
-    #
-    #   print("[STEP 4] Running CSV-based enrichment...")
-    #   run_csv_enrichment()
-    #
-    #   print("[STEP 5] Running LLM-based enrichment...")
-    #   run_llm_enrichment()
-    # ------------------------------------------------------------------
-    print("[DONE] Scraping pipeline completed (without enrichment).")
+    rows = load_urls_from_csv(csv_path)
+
+    print("[STEP 3] Scraping ad pages, enriching and inserting into DB...")
+    written = scrape_ads_from_urls(rows, progress=progress, pipeline=pipeline, revisit=revisit)
+
+    if pipeline is not None and written:
+        from .enrichment.metrics import run_metrics_enrichment
+
+        print("[STEP 4] Updating dataset-wide metrics...")
+        run_metrics_enrichment()
+        timings = ", ".join(f"{name} {sec:.2f}s" for name, sec in pipeline.seconds.items())
+        print(f"[INFO] Enrichment time: {timings}")
+
+    print("[DONE] Scraping pipeline completed.")
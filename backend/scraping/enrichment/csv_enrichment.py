@@ -1,4 +1,179 @@
-# Logic to enrich building rows using external CSV datasets.
-#
-# This file is currently a placeholder. Implement the actual logic here.
+"""
+CSV-based enrichment of building rows (Table 1 c_* columns).
 
+The external datasets in `data/external/` are keyed by INSEE commune code:
+
+- insee_lookup.csv: postal_code;insee;city;dept;region
+- taxes.csv:        insee;tax_hab;tax_fonc
+- vacancy.csv:      insee;vacancy
+- revenue.csv:      insee;revenue
+
+(`#` lines are comments; `;` or `,` separated; decimal commas accepted.)
+
+They are loaded once as sorted NumPy arrays (compiled and cached on disk,
+see `reference_cache.py`). Untreated buildings are then read in large
+keyset chunks, their postal codes resolved for the whole chunk with a
+binary search (`np.searchsorted`), and the results written back with one
+bulk UPDATE transaction per chunk. No file is read per building.
+
+A postal code can cover several communes: the building's city name picks
+the right one, otherwise the first commune listed for the code is used.
+
+Usage:
+
+    from backend.scraping.enrichment.csv_enrichment import run_csv_enrichment
+    run_csv_enrichment()
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ...db import repositories as db_repo
+from .reference_cache import ReferenceData, load_reference_data, normalize_city, normalize_code
+
+# Columns written by this enrichment, in the order of enrich_rows() tuples.
+ENRICHED_COLUMNS = (
+    "c_INSEE",
+    "c_taxHab",
+    "c_taxFonc",
+    "c_vacancy",
+    "c_revenue",
+    "c_dept",
+    "c_region",
+)
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def _floats(values: np.ndarray) -> List[Optional[float]]:
+    """Array -> list, NaN -> None."""
+    return [None if v != v else v for v in values.tolist()]
+
+
+def _strings(values: np.ndarray) -> List[Optional[str]]:
+    """Array -> list, "" -> None."""
+    return [v or None for v in values.tolist()]
+
+
+class EnrichmentIndex:
+    """Vectorized postal code -> commune lookups over the reference arrays."""
+
+    def __init__(self, data: ReferenceData) -> None:
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def resolve(
+        self,
+        postal_codes: Sequence[Optional[str]],
+        cities: Sequence[Optional[str]],
+    ) -> np.ndarray:
+        """Commune index for each (postal code, city), -1 when unknown."""
+        data = self.data
+        if not len(postal_codes):
+            return np.empty(0, dtype=np.int64)
+        keys = np.array([normalize_code(p) for p in postal_codes])
+        left = np.searchsorted(data.postal_code, keys, side="left")
+        right = np.searchsorted(data.postal_code, keys, side="right")
+
+        communes = np.full(len(keys), -1, dtype=np.int64)
+        found = right > left
+        communes[found] = data.postal_commune[left[found]]
+
+        # Codes shared by several communes: match the city name.
+        for i in np.nonzero(right - left > 1)[0]:
+            city = normalize_city(cities[i])
+            if city:
+                matches = np.nonzero(data.postal_city[left[i]:right[i]] == city)[0]
+                if matches.size:
+                    communes[i] = data.postal_commune[left[i] + matches[0]]
+        return communes
+
+
+def load_enrichment_index() -> EnrichmentIndex:
+    """Load the reference datasets (from the compiled cache when current)."""
+    return EnrichmentIndex(load_reference_data())
+
+
+def _lookup(rows: Sequence[Any], index: EnrichmentIndex) -> Tuple[List[int], List[Tuple[Any, ...]]]:
+    """Positions of the rows whose postal code resolved, and their ENRICHED_COLUMNS values."""
+    communes = index.resolve(
+        [row["a_postalCode"] for row in rows], [row["a_city"] for row in rows]
+    )
+    hits = np.nonzero(communes >= 0)[0]
+    c = communes[hits]
+    data = index.data
+    columns = (
+        data.insee[c].tolist(),
+        _floats(data.tax_hab[c]),
+        _floats(data.tax_fonc[c]),
+        _floats(data.vacancy[c]),
+        _floats(data.revenue[c]),
+        _strings(data.dept[c]),
+        _strings(data.regions[data.region_idx[c]]),
+    )
+    return hits.tolist(), list(zip(*columns))
+
+
+def enrich_rows(rows: Sequence[Any], index: EnrichmentIndex) -> List[Tuple[Any, ...]]:
+    """
+    Resolve buildings (mappings with a_id, a_postalCode, a_city) into
+    update rows: ENRICHED_COLUMNS values followed by the a_id. Buildings
+    whose postal code is unknown are left out.
+    """
+    hits, values = _lookup(rows, index)
+    return [v + (rows[i]["a_id"],) for i, v in zip(hits, values)]
+
+
+def enrich_buildings(buildings: Sequence[Dict[str, Any]], index: EnrichmentIndex) -> int:
+    """
+    Set the ENRICHED_COLUMNS keys of building dicts not inserted yet
+    (e.g. from a source's fetch_ad_data()). Returns how many were resolved.
+    """
+    keys = [{"a_postalCode": b.get("a_postalCode"), "a_city": b.get("a_city")} for b in buildings]
+    hits, values = _lookup(keys, index)
+    for i, v in zip(hits, values):
+        buildings[i].update(zip(ENRICHED_COLUMNS, v))
+    return len(hits)
+
+
+def _chunks(rows: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk: List[Any] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_csv_enrichment(
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    index: Optional[EnrichmentIndex] = None,
+) -> int:
+    """
+    Fill the c_* columns of every untreated building (c_treated = 0) from
+    the external datasets. Returns the number of buildings enriched.
+
+    Does not set c_treated (see pipeline.py, which runs every stage).
+    """
+    if index is None:
+        index = load_enrichment_index()
+    if not len(index):
+        print("[WARN] Enrichment datasets are empty; nothing to enrich.")
+        return 0
+
+    enriched = 0
+    seen = 0
+    rows = db_repo.iter_untreated_buildings(
+        columns=["a_postalCode", "a_city"], chunk_size=batch_size
+    )
+    for chunk in _chunks(rows, batch_size):
+        seen += len(chunk)
+        enriched += db_repo.update_buildings_bulk(ENRICHED_COLUMNS, enrich_rows(chunk, index))
+
+    print(f"[INFO] CSV enrichment: {enriched} of {seen} untreated buildings enriched.")
+    return enriched
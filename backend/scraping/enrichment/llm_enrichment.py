@@ -1,4 +1,402 @@
-# Logic to enrich building rows using an LLM on descriptions.
-#
-# This file is currently a placeholder. Implement the actual logic here.
+"""
+LLM-based enrichment of building rows (Table 1 llm_* columns):
 
+- llm_residential_office: "residential" or "office"
+- llm_nbFlats:            number of flats (0 if not residential)
+- llm_flatSizes:          flat surfaces, e.g. "80,120,90" ("0" if none)
+- llm_other:              perks / amenities, free text
+
+Descriptions that state the facts outright are handled by deterministic
+rules first (`rules.py`); the rest are sent to an OpenAI-compatible chat
+completions API (`LLM_API_BASE`, see backend/config.py):
+
+- several descriptions per prompt (`LLM_BATCH_SIZE`); descriptions a
+  batched answer leaves out are retried one per prompt
+- `LLM_MAX_IN_FLIGHT` prompts in flight at once, from a thread pool
+- every answer is stored in the `llm_cache` table (Table 10) under a hash
+  of the normalized description, model and prompt version, so a reposted
+  ad, or the same description seen twice in a run, costs nothing
+- token usage and cost are accounted per run (`LLMUsage`)
+
+`mock_llm.py` provides a local stand-in server to run all of this without
+an API key.
+
+Usage:
+
+    from backend.scraping.enrichment.llm_enrichment import run_llm_enrichment
+    run_llm_enrichment()
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from ... import config
+from ...db import repositories as db_repo
+from .rules import extract_rules
+
+# Columns written by this enrichment, in the order of the update tuples.
+LLM_COLUMNS = ("llm_residential_office", "llm_nbFlats", "llm_flatSizes", "llm_other")
+
+# Bump when the prompt or the parsing changes, so cached answers are redone.
+PROMPT_VERSION = 1
+
+SYSTEM_PROMPT = """\
+You extract facts from French real-estate ads for whole buildings.
+The user sends JSON {"ads": [{"id": <int>, "description": <text>}, ...]}.
+Answer with JSON only: {"results": [{"id": <int>, "residential_office":
+"residential" or "office", "nb_flats": <int, 0 if not residential>,
+"flat_sizes": <comma-separated surfaces in m2, e.g. "80,120", or "0">,
+"other": <perks and amenities, short French text, "" if none>}, ...]},
+one result per ad, same ids."""
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+# -------------------- cache keys --------------------
+
+
+def normalize_description(text: Optional[str]) -> str:
+    """Case- and whitespace-insensitive form of a description (NFKC-normalized)."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def cache_key(description: str, model: str) -> str:
+    normalized = normalize_description(description)
+    return hashlib.sha256(f"v{PROMPT_VERSION}|{model}|{normalized}".encode("utf-8")).hexdigest()
+
+
+# -------------------- prompt / answer --------------------
+
+
+def build_messages(descriptions: Sequence[str]) -> List[Dict[str, str]]:
+    ads = [{"id": i, "description": d} for i, d in enumerate(descriptions)]
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps({"ads": ads}, ensure_ascii=False)},
+    ]
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _result_to_columns(result: Dict[str, Any]) -> Dict[str, Any]:
+    kind = str(result.get("residential_office") or "").strip().lower()
+    sizes = result.get("flat_sizes")
+    if isinstance(sizes, list):
+        sizes = ",".join(str(s) for s in sizes)
+    return {
+        "llm_residential_office": kind if kind in ("residential", "office") else None,
+        "llm_nbFlats": _to_int(result.get("nb_flats")),
+        "llm_flatSizes": str(sizes).replace(" ", "") if sizes not in (None, "") else None,
+        "llm_other": str(result.get("other") or "") or None,
+    }
+
+
+def parse_results(content: str, count: int) -> Dict[int, Dict[str, Any]]:
+    """Map prompt ids (0..count-1) to llm_* values; malformed entries are dropped."""
+    content = re.sub(r"^```(?:json)?\s*|\s*```$", "", content.strip())
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        return {}
+    results = payload.get("results") if isinstance(payload, dict) else payload
+    parsed: Dict[int, Dict[str, Any]] = {}
+    for result in results if isinstance(results, list) else []:
+        if not isinstance(result, dict):
+            continue
+        i = _to_int(result.get("id"))
+        if i is not None and 0 <= i < count:
+            parsed[i] = _result_to_columns(result)
+    return parsed
+
+
+# -------------------- client --------------------
+
+
+@dataclass
+class LLMUsage:
+    """Counters of an enrichment run (thread-safe updates via add())."""
+
+    descriptions: int = 0
+    rule_hits: int = 0
+    cache_hits: int = 0
+    requests: int = 0
+    failed_requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    @property
+    def rule_hit_rate(self) -> float:
+        """Share of the descriptions settled by the rules, without the LLM."""
+        return self.rule_hits / self.descriptions if self.descriptions else 0.0
+
+    @property
+    def cost_usd(self) -> float:
+        return (
+            self.prompt_tokens * config.LLM_PRICE_PROMPT_PER_1M
+            + self.completion_tokens * config.LLM_PRICE_COMPLETION_PER_1M
+        ) / 1_000_000
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {f.name: getattr(self, f.name) for f in fields(self) if f.init}
+        data["rule_hit_rate"] = round(self.rule_hit_rate, 4)
+        data["cost_usd"] = round(self.cost_usd, 6)
+        return data
+
+
+class LLMClient:
+    """Minimal chat completions client; one HTTP session per thread."""
+
+    def __init__(
+        self,
+        api_base: Optional[str] = None,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        timeout_sec: Optional[float] = None,
+        max_retries: int = 3,
+    ) -> None:
+        self.url = (api_base or config.LLM_API_BASE).rstrip("/") + "/chat/completions"
+        self.api_key = config.LLM_API_KEY if api_key is None else api_key
+        self.model = model or config.LLM_MODEL
+        self.timeout_sec = timeout_sec or config.LLM_TIMEOUT_SEC
+        self.max_retries = max_retries
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            if self.api_key:
+                session.headers["Authorization"] = f"Bearer {self.api_key}"
+        return session
+
+    def complete(self, messages: List[Dict[str, str]]) -> Tuple[str, int, int]:
+        """
+        Send one prompt; returns (content, prompt_tokens, completion_tokens).
+        Rate limits, server errors, connection errors and timeouts are
+        retried with exponential backoff (Retry-After honoured).
+
+        Raises requests.RequestException once out of retries, and
+        ValueError if the response is not a completion with text content.
+        """
+        body = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+        }
+        attempt = 0
+        while True:
+            retry = attempt < self.max_retries
+            try:
+                resp = self._session().post(self.url, json=body, timeout=self.timeout_sec)
+            except (requests.ConnectionError, requests.Timeout):
+                if not retry:
+                    raise
+                time.sleep(2 ** attempt)
+                attempt += 1
+                continue
+            if resp.status_code in _RETRY_STATUSES and retry:
+                retry_after = resp.headers.get("Retry-After", "")
+                time.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+                attempt += 1
+                continue
+            resp.raise_for_status()
+            payload = resp.json()
+            try:
+                content = payload["choices"][0]["message"]["content"]
+                usage = payload.get("usage") or {}
+                prompt_tokens = int(usage.get("prompt_tokens") or 0)
+                completion_tokens = int(usage.get("completion_tokens") or 0)
+            except (KeyError, IndexError, TypeError, AttributeError) as e:
+                raise ValueError(f"Malformed completion: {e!r}") from e
+            if not isinstance(content, str):
+                raise ValueError("Malformed completion: no text content")
+            return content, prompt_tokens, completion_tokens
+
+
+# -------------------- enricher --------------------
+
+
+class LLMEnricher:
+    """Cached, batched and concurrent extraction of llm_* values from descriptions."""
+
+    def __init__(
+        self,
+        client: Optional[LLMClient] = None,
+        batch_size: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        use_rules: bool = True,
+    ) -> None:
+        self.client = client or LLMClient()
+        self.use_rules = use_rules
+        self.batch_size = max(1, batch_size or config.LLM_BATCH_SIZE)
+        self.max_in_flight = max(1, max_in_flight or config.LLM_MAX_IN_FLIGHT)
+        self.usage = LLMUsage()
+
+    def _call(self, items: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """One prompt for (key, description) items; returns and caches what it got."""
+        try:
+            content, prompt_tokens, completion_tokens = self.client.complete(
+                build_messages([d for _, d in items])
+            )
+        except (requests.RequestException, ValueError) as e:
+            print(f"[WARN] LLM request failed ({len(items)} descriptions): {e}")
+            self.usage.add(requests=1, failed_requests=1)
+            return {}
+        self.usage.add(
+            requests=1, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+
+        parsed = parse_results(content, len(items))
+        results = {items[i][0]: values for i, values in parsed.items()}
+        if results:
+            share = len(results)
+            db_repo.put_llm_cache_entries(
+                (key, self.client.model, values, prompt_tokens // share, completion_tokens // share)
+                for key, values in results.items()
+            )
+        return results
+
+    def _run_batch(self, items: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        results = self._call(items)
+        if len(items) > 1:
+            # Retry the descriptions the batched answer left out on their own.
+            for item in items:
+                if item[0] not in results:
+                    results.update(self._call([item]))
+        return results
+
+    def extract(self, descriptions: Sequence[Optional[str]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        llm_* values for each description (None if empty or if the model
+        gave no usable answer), aligned with the input. Descriptions the
+        rules handle with confidence never reach the cache or the model.
+        """
+        extracted: List[Optional[Dict[str, Any]]] = [None] * len(descriptions)
+        keys: List[Optional[str]] = [None] * len(descriptions)
+        rule_hits = 0
+        for i, description in enumerate(descriptions):
+            if not normalize_description(description):
+                continue
+            if self.use_rules:
+                rule = extract_rules(description)
+                if rule.confident:
+                    extracted[i] = rule.values
+                    rule_hits += 1
+                    continue
+            keys[i] = cache_key(description, self.client.model)
+
+        unique = {k: d for k, d in zip(keys, descriptions) if k}
+        results = db_repo.get_llm_cache_entries(list(unique))
+        pending = [(k, d) for k, d in unique.items() if k not in results]
+
+        # Cache hits: cached, or repeated within this call (only sent once).
+        for_llm = sum(1 for k in keys if k)
+        self.usage.add(
+            descriptions=for_llm + rule_hits,
+            rule_hits=rule_hits,
+            cache_hits=for_llm - len(pending),
+        )
+        batches = [
+            pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)
+        ]
+        if batches:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_in_flight, len(batches)), thread_name_prefix="llm"
+            ) as pool:
+                for batch_results in pool.map(self._run_batch, batches):
+                    results.update(batch_results)
+
+        return [results.get(k) if k else values for k, values in zip(keys, extracted)]
+
+
+def run_llm_enrichment(
+    enricher: Optional[LLMEnricher] = None,
+    chunk_size: int = 1000,
+) -> LLMUsage:
+    """
+    Fill the llm_* columns of the buildings that do not have them yet,
+    whatever their c_treated (rows inserted without the LLM stage may be
+    marked treated by older code). Returns the usage of the run.
+
+    Does not set c_treated (see pipeline.py, which runs every stage).
+    """
+    if enricher is None:
+        enricher = LLMEnricher()
+
+    enriched = 0
+    rows = db_repo.iter_buildings_without_llm(
+        columns=["a_description", "llm_residential_office"], chunk_size=chunk_size
+    )
+    chunk: List[Any] = []
+
+    def flush() -> int:
+        values = enricher.extract([row["a_description"] for row in chunk])
+        updates = [
+            tuple(v[col] for col in LLM_COLUMNS) + (row["a_id"],)
+            for row, v in zip(chunk, values)
+            if v is not None
+        ]
+        chunk.clear()
+        return db_repo.update_buildings_bulk(LLM_COLUMNS, updates)
+
+    for row in rows:
+        if row["llm_residential_office"] is None:
+            chunk.append(row)
+        if len(chunk) >= chunk_size:
+            enriched += flush()
+    if chunk:
+        enriched += flush()
+
+    usage = enricher.usage
+    print(
+        f"[INFO] LLM enrichment: {enriched} buildings enriched, "
+        f"{usage.rule_hits}/{usage.descriptions} by rules ({usage.rule_hit_rate:.0%}), "
+        f"{usage.cache_hits} from cache, {usage.requests} requests "
+        f"({usage.failed_requests} failed), {usage.prompt_tokens}+{usage.completion_tokens} "
+        f"tokens, ${usage.cost_usd:.4f}."
+    )
+    return usage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill the llm_* columns of buildings lacking them.")
+    parser.add_argument("--batch", type=int, default=None, help="descriptions per prompt")
+    parser.add_argument("--in-flight", type=int, default=None, help="concurrent requests")
+    parser.add_argument("--no-rules", action="store_true", help="send every description to the LLM")
+    args = parser.parse_args()
+    run_llm_enrichment(
+        LLMEnricher(
+            batch_size=args.batch, max_in_flight=args.in_flight, use_rules=not args.no_rules
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
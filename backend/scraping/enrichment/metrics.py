@@ -0,0 +1,123 @@
+"""
+Dataset-wide derived metrics (Table 1 c_* columns):
+
+- c_pricePerSqMeter: a_price / a_surfaceArea
+- c_vacancyCat, c_revenueCat: decile (1-10, 10 = highest) of c_vacancy /
+  c_revenue among all buildings that have a value
+
+Deciles depend on the whole population, so every run reads and recomputes
+every building: a few numeric columns, streamed chunk by chunk into NumPy
+arrays (8 bytes per value), then one vectorized pass. Only the writes are
+diffed: the result is compared with what is stored and only the rows
+whose values changed are written, in a single bulk transaction. When new
+buildings leave the decile edges where they were, only those new rows
+are written; when they move an edge, exactly the buildings that change
+bucket are rewritten too.
+
+Usage:
+
+    from backend.scraping.enrichment.metrics import run_metrics_enrichment
+    run_metrics_enrichment()
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ...db import repositories as db_repo
+
+METRIC_COLUMNS = ("c_pricePerSqMeter", "c_vacancyCat", "c_revenueCat")
+
+_SOURCE_COLUMNS = ("a_price", "a_surfaceArea", "c_vacancy", "c_revenue") + METRIC_COLUMNS
+
+DECILES = np.linspace(0.1, 0.9, 9)
+
+
+def _load_columns(chunk_size: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    a_ids and the float64 arrays of _SOURCE_COLUMNS (NULL -> NaN), built
+    one chunk of rows at a time so the rows themselves are never all held.
+    """
+    id_chunks: List[np.ndarray] = []
+    value_chunks: Dict[str, List[np.ndarray]] = {col: [] for col in _SOURCE_COLUMNS}
+
+    def flush(rows: List[Any]) -> None:
+        id_chunks.append(np.array([row["a_id"] for row in rows], dtype=np.int64))
+        for col in _SOURCE_COLUMNS:
+            value_chunks[col].append(np.array([row[col] for row in rows], dtype=np.float64))
+
+    rows: List[Any] = []
+    for row in db_repo.iter_buildings(columns=_SOURCE_COLUMNS, chunk_size=chunk_size):
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            flush(rows)
+            rows = []
+    if rows or not id_chunks:
+        flush(rows)
+
+    a_ids = np.concatenate(id_chunks)
+    columns = {col: np.concatenate(chunks) for col, chunks in value_chunks.items()}
+    return a_ids, columns
+
+
+def price_per_sqm(price: np.ndarray, surface: np.ndarray) -> np.ndarray:
+    """Price per m² rounded to the euro cent; NaN without a positive price and surface."""
+    valid = (price > 0) & (surface > 0)
+    result = np.full(price.shape, np.nan)
+    result[valid] = np.round(price[valid] / surface[valid], 2)
+    return result
+
+
+def decile_categories(values: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Decile of each value (1-10, 10 = highest; NaN stays NaN) and the nine
+    edges used. Values equal to an edge go to the upper bucket.
+    """
+    known = ~np.isnan(values)
+    categories = np.full(values.shape, np.nan)
+    if not known.any():
+        return categories, None
+    edges = np.quantile(values[known], DECILES)
+    categories[known] = np.searchsorted(edges, values[known], side="right") + 1
+    return categories, edges
+
+
+def _differs(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    return ~((old == new) | (np.isnan(old) & np.isnan(new)))
+
+
+def _to_db(values: np.ndarray, as_int: bool) -> List[Optional[float]]:
+    if as_int:
+        return [None if v != v else int(v) for v in values.tolist()]
+    return [None if v != v else v for v in values.tolist()]
+
+
+def run_metrics_enrichment(chunk_size: int = 10_000) -> Dict[str, int]:
+    """
+    Recompute price per m² and the vacancy / revenue deciles of every
+    building and store the ones that changed. Returns counters.
+    """
+    a_ids, cols = _load_columns(chunk_size)
+
+    ppsqm = price_per_sqm(cols["a_price"], cols["a_surfaceArea"])
+    vacancy_cat, _ = decile_categories(cols["c_vacancy"])
+    revenue_cat, _ = decile_categories(cols["c_revenue"])
+
+    changed = (
+        _differs(cols["c_pricePerSqMeter"], ppsqm)
+        | _differs(cols["c_vacancyCat"], vacancy_cat)
+        | _differs(cols["c_revenueCat"], revenue_cat)
+    )
+    idx = np.nonzero(changed)[0]
+    updates = list(
+        zip(
+            _to_db(ppsqm[idx], as_int=False),
+            _to_db(vacancy_cat[idx], as_int=True),
+            _to_db(revenue_cat[idx], as_int=True),
+            a_ids[idx].tolist(),
+        )
+    )
+    written = db_repo.update_buildings_bulk(METRIC_COLUMNS, updates)
+
+    print(f"[INFO] Metrics: {written} of {len(a_ids)} buildings updated.")
+    return {"buildings": len(a_ids), "updated": written}
@@ -0,0 +1,256 @@
+"""
+Local stand-in for the LLM API, to run the LLM enrichment without an API
+key or network access.
+
+Serves an OpenAI-compatible `POST /v1/chat/completions` that answers the
+prompts of `llm_enrichment.py` with simple regex heuristics (deterministic,
+so runs can be compared), reports token usage (about 4 characters per
+token), and keeps stats (`GET /_stats`): requests, descriptions, and the
+highest number of requests in flight at once. It can also delay its
+answers, rate-limit some requests (429), and cap how many descriptions it
+answers per prompt, to exercise the batching fallback.
+
+Usage (from project root):
+
+    python -m backend.scraping.enrichment.mock_llm --port 8089
+    LLM_API_BASE=http://127.0.0.1:8089/v1 python -m backend.scraping.enrichment.llm_enrichment
+
+or, to enrich random descriptions against it in a throw-away database:
+
+    python -m backend.scraping.enrichment.mock_llm --demo 500
+"""
+
+import argparse
+import json
+import random
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+_FLATS_RE = re.compile(r"(\d+)\s+(?:appartements|logements|lots)")
+_SIZE_RE = re.compile(r"(\d+)\s*m(?:²|2)")
+_PERKS = ("cave", "parking", "jardin", "terrasse", "ascenseur", "balcon", "garage")
+
+
+def answer_ad(ad: Dict[str, Any]) -> Dict[str, Any]:
+    """Heuristic extraction standing in for the model."""
+    text = str(ad.get("description") or "").lower()
+    office = "bureau" in text and "appartement" not in text
+    flats = _FLATS_RE.search(text)
+    nb_flats = 0 if office else int(flats.group(1)) if flats else 1
+    sizes = _SIZE_RE.findall(text)[1:] if nb_flats > 1 else _SIZE_RE.findall(text)[:1]
+    return {
+        "id": ad.get("id"),
+        "residential_office": "office" if office else "residential",
+        "nb_flats": nb_flats,
+        "flat_sizes": ",".join(sizes) if sizes and not office else "0",
+        "other": ", ".join(p for p in _PERKS if p in text),
+    }
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _MockLLMHandler(BaseHTTPRequestHandler):
+    server: "MockLLMServer"
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path == "/_stats":
+            self._send(200, self.server.stats())
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": "not found"})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+        with self.server.track_request() as rate_limited:
+            if rate_limited:
+                self._send(429, {"error": "rate limited"}, {"Retry-After": "0"})
+                return
+            if self.server.latency_sec:
+                time.sleep(self.server.latency_sec)
+            messages = body.get("messages") or []
+            ads: List[Dict[str, Any]] = json.loads(messages[-1]["content"]).get("ads", [])
+            if self.server.max_batch:
+                ads = ads[: self.server.max_batch]
+            self.server.count_descriptions(len(ads))
+
+            content = json.dumps({"results": [answer_ad(ad) for ad in ads]}, ensure_ascii=False)
+            prompt = "".join(str(m.get("content", "")) for m in messages)
+            self._send(
+                200,
+                {
+                    "object": "chat.completion",
+                    "model": body.get("model"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": _tokens(prompt),
+                        "completion_tokens": _tokens(content),
+                        "total_tokens": _tokens(prompt) + _tokens(content),
+                    },
+                },
+            )
+
+    def _send(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """
+    Stand-in LLM API.
+
+    :param latency_sec: delay before each answer
+    :param rate_limit_every: answer 429 to every n-th request (0 = never)
+    :param max_batch: answer at most this many descriptions per prompt (0 = all)
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency_sec: float = 0.0,
+        rate_limit_every: int = 0,
+        max_batch: int = 0,
+    ) -> None:
+        super().__init__(("127.0.0.1", port), _MockLLMHandler)
+        self.latency_sec = latency_sec
+        self.rate_limit_every = rate_limit_every
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._descriptions = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    @contextmanager
+    def track_request(self) -> Iterator[bool]:
+        """Count a request while it is handled; yields whether to rate-limit it."""
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            every = self.rate_limit_every
+            rate_limited = bool(every) and self._requests % every == 0
+        try:
+            yield rate_limited
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def count_descriptions(self, n: int) -> None:
+        with self._lock:
+            self._descriptions += n
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "descriptions": self._descriptions,
+                "max_in_flight": self._max_in_flight,
+            }
+
+
+# -------------------- demo --------------------
+
+
+def _random_description(rng: random.Random) -> str:
+    flats = rng.randint(2, 8)
+    perks = ", ".join(rng.sample(("cave", "parking", "jardin", "terrasse", "ascenseur"), 2))
+    if rng.random() < 0.5:
+        # Vague enough that the rules leave it to the LLM.
+        return f"Immeuble de rapport de {flats} lots, bien placé, à rénover. Avec {perks}."
+    sizes = " ".join(f"un T{rng.randint(1, 4)} de {rng.randint(20, 90)} m²" for _ in range(flats))
+    return (
+        f"Immeuble de {rng.randint(150, 600)} m² comprenant {flats} appartements : "
+        f"{sizes}. Avec {perks}."
+    )
+
+
+def run_demo(
+    descriptions: int = 500, distinct: int = 300, batch_size: int = 10, in_flight: int = 4
+) -> None:
+    """
+    Enrich `descriptions` new buildings drawn from `distinct` texts, twice:
+    the second run should be (almost) entirely served from the cache.
+    """
+    from ...db import connection, init_db
+    from ...db import repositories as db_repo
+    from .llm_enrichment import LLMClient, LLMEnricher, run_llm_enrichment
+
+    db_path = Path(tempfile.mkdtemp(prefix="mock-llm-")) / "mock_llm.db"
+    connection.DB_PATH = db_path
+    init_db.DB_PATH = db_path
+    init_db.init_db()
+
+    rng = random.Random(0)
+    texts = [_random_description(rng) for _ in range(distinct)]
+
+    server = MockLLMServer(latency_sec=0.05)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = LLMClient(api_base=server.api_base, api_key="mock", model="mock")
+
+    # Second run: the same descriptions reposted as new ads, answered from the cache.
+    for run in (1, 2):
+        for i in range(descriptions):
+            db_repo.insert_building(
+                {"a_url": f"mock://ad/{run}/{i}", "a_description": rng.choice(texts)}
+            )
+        started = time.monotonic()
+        run_llm_enrichment(LLMEnricher(client, batch_size=batch_size, max_in_flight=in_flight))
+        print(f"Run {run}: {time.monotonic() - started:.2f}s, server {server.stats()}")
+    server.shutdown()
+    print(f"Database: {db_path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a stand-in LLM API.")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per answer")
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--max-batch", type=int, default=0)
+    parser.add_argument("--demo", type=int, metavar="N", help="enrich N random buildings and exit")
+    args = parser.parse_args()
+
+    if args.demo:
+        run_demo(args.demo)
+        return
+    server = MockLLMServer(args.port, args.latency, args.rate_limit_every, args.max_batch)
+    print(f"Mock LLM API on {server.api_base} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
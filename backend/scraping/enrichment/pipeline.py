@@ -0,0 +1,232 @@
+"""
+Inline enrichment of scraped ads, before they are inserted.
+
+The scraping engine (and the queue workers) pass each batch of parsed ads
+through an `EnrichmentPipeline`: a list of stages that fill the c_* /
+llm_* keys of the building dicts in place. Buildings then land in Table 1
+fully treated (c_treated = 1) in a single write, and no second pass over
+the table is needed.
+
+Stages:
+
+- CsvLookupStage:        c_INSEE, taxes, vacancy, revenue, dept, region
+                         (csv_enrichment.py)
+- PricePerSqMeterStage:  c_pricePerSqMeter
+- LLMStage (optional):   llm_* columns (rules, then cached LLM calls;
+                         llm_enrichment.py)
+
+A building is only marked treated (c_treated = 1) when every stage of
+the pipeline ran and filled its columns for it. Otherwise (postal code
+not found, empty reference datasets, no answer from the LLM, stage
+failure) it is still inserted, untreated (c_treated = 0), and picked up
+by the catch-up pass below.
+
+The LLM stage only counts when it is enabled (ENRICHMENT_LLM): without
+it, buildings land treated with empty llm_* columns, which the LLM pass
+(llm_enrichment.py) fills later, as it selects the buildings without
+llm_* values whatever c_treated is.
+
+Decile categories depend on the whole dataset: `run_metrics_enrichment()`
+recomputes them after a run.
+
+Buildings inserted untreated (by older code, or after a stage failure)
+are caught up with:
+
+    python -m backend.scraping.enrichment.pipeline [--llm] [--all]
+
+(`--all` re-enriches every building, e.g. after the rules or the
+reference datasets changed.)
+"""
+
+import argparse
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ... import config
+from ...db import repositories as db_repo
+from .csv_enrichment import (
+    ENRICHED_COLUMNS,
+    EnrichmentIndex,
+    enrich_buildings,
+    load_enrichment_index,
+)
+from .llm_enrichment import LLM_COLUMNS, LLMEnricher
+from .metrics import price_per_sqm, run_metrics_enrichment
+
+# Ad fields the stages read.
+INPUT_COLUMNS = ("a_postalCode", "a_city", "a_price", "a_surfaceArea", "a_description")
+
+def has_llm_values(building: Dict[str, Any]) -> bool:
+    """Whether the llm_* columns are set (or there is no description to read)."""
+    return building.get("llm_residential_office") is not None or not (
+        building.get("a_description") or ""
+    ).strip()
+
+
+class EnrichmentStage(ABC):
+    """One enrichment step over a batch of building dicts."""
+
+    name: str = "base"
+    # Columns the stage sets (written back by the catch-up pass).
+    columns: Tuple[str, ...] = ()
+
+    @property
+    def available(self) -> bool:
+        """False when the stage cannot do anything (e.g. no reference data)."""
+        return True
+
+    def filled(self, building: Dict[str, Any]) -> bool:
+        """Whether the stage did its job for this building."""
+        return True
+
+    @abstractmethod
+    def process(self, buildings: List[Dict[str, Any]]) -> None:
+        """Set this stage's columns on the buildings, in place."""
+        raise NotImplementedError
+
+
+class CsvLookupStage(EnrichmentStage):
+    name = "csv"
+    columns = ENRICHED_COLUMNS
+
+    def __init__(self, index: Optional[EnrichmentIndex] = None) -> None:
+        self.index = index if index is not None else load_enrichment_index()
+
+    @property
+    def available(self) -> bool:
+        return len(self.index) > 0
+
+    def filled(self, building: Dict[str, Any]) -> bool:
+        # Resolved commune: the lookup sets every column from it.
+        return building.get("c_INSEE") is not None
+
+    def process(self, buildings: List[Dict[str, Any]]) -> None:
+        if self.available:
+            enrich_buildings(buildings, self.index)
+
+
+class PricePerSqMeterStage(EnrichmentStage):
+    name = "price_per_sqm"
+    columns = ("c_pricePerSqMeter",)
+
+    def process(self, buildings: List[Dict[str, Any]]) -> None:
+        price = np.array([b.get("a_price") for b in buildings], dtype=np.float64)
+        surface = np.array([b.get("a_surfaceArea") for b in buildings], dtype=np.float64)
+        for building, value in zip(buildings, price_per_sqm(price, surface).tolist()):
+            building["c_pricePerSqMeter"] = None if value != value else value
+
+
+class LLMStage(EnrichmentStage):
+    name = "llm"
+    columns = LLM_COLUMNS
+
+    def __init__(self, enricher: Optional[LLMEnricher] = None) -> None:
+        self.enricher = enricher or LLMEnricher()
+
+    def filled(self, building: Dict[str, Any]) -> bool:
+        return has_llm_values(building)
+
+    def process(self, buildings: List[Dict[str, Any]]) -> None:
+        extracted = self.enricher.extract([b.get("a_description") for b in buildings])
+        for building, values in zip(buildings, extracted):
+            if values is not None:
+                building.update(values)
+
+
+class EnrichmentPipeline:
+    """Runs its stages in order over batches of building dicts."""
+
+    def __init__(self, stages: Sequence[EnrichmentStage]) -> None:
+        self.stages = list(stages)
+        self.seconds: Dict[str, float] = {stage.name: 0.0 for stage in self.stages}
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return tuple(col for stage in self.stages for col in stage.columns)
+
+    def treated(self, building: Dict[str, Any]) -> bool:
+        """Whether every stage of the pipeline has filled the building's columns."""
+        return all(stage.available and stage.filled(building) for stage in self.stages)
+
+    def process(self, buildings: List[Dict[str, Any]]) -> bool:
+        """
+        Enrich the buildings in place; c_treated is set to 1 on those that
+        every stage filled (see `treated()`), if no stage failed, else 0.
+        Returns whether every stage succeeded.
+        """
+        succeeded = True
+        for stage in self.stages:
+            started = time.perf_counter()
+            try:
+                stage.process(buildings)
+            except Exception as exc:
+                print(f"[ERROR] Enrichment stage '{stage.name}' failed: {exc}")
+                succeeded = False
+            self.seconds[stage.name] += time.perf_counter() - started
+        for building in buildings:
+            building["c_treated"] = 1 if succeeded and self.treated(building) else 0
+        return succeeded
+
+
+def build_pipeline(llm: Optional[bool] = None) -> EnrichmentPipeline:
+    """Default stages; the LLM stage is included if `llm` (default: ENRICHMENT_LLM)."""
+    stages: List[EnrichmentStage] = [CsvLookupStage(), PricePerSqMeterStage()]
+    if config.ENRICHMENT_LLM if llm is None else llm:
+        stages.append(LLMStage())
+    return EnrichmentPipeline(stages)
+
+
+def run_catch_up(
+    pipeline: Optional[EnrichmentPipeline] = None,
+    everything: bool = False,
+    chunk_size: int = 1000,
+) -> int:
+    """
+    Enrich buildings already in the table: untreated ones (c_treated = 0),
+    or all of them with `everything`. Returns the number treated.
+    """
+    if pipeline is None:
+        pipeline = build_pipeline()
+    columns = pipeline.columns + ("c_treated",)
+
+    iterate = db_repo.iter_buildings if everything else db_repo.iter_untreated_buildings
+    # Current values too, so what a stage cannot resolve is left as it was
+    # (and the llm_* values of an earlier LLM pass count as done).
+    current = tuple(dict.fromkeys(pipeline.columns + LLM_COLUMNS))
+    rows = iterate(columns=INPUT_COLUMNS + current, chunk_size=chunk_size)
+    treated = 0
+    chunk: List[Dict[str, Any]] = []
+
+    def flush() -> int:
+        pipeline.process(chunk)
+        updates = [tuple(b.get(col) for col in columns) + (b["a_id"],) for b in chunk]
+        done = sum(1 for b in chunk if b["c_treated"])
+        db_repo.update_buildings_bulk(columns, updates)
+        chunk.clear()
+        return done
+
+    for row in rows:
+        chunk.append(dict(row))
+        if len(chunk) >= chunk_size:
+            treated += flush()
+    if chunk:
+        treated += flush()
+
+    print(f"[INFO] Enrichment catch-up: {treated} buildings treated.")
+    run_metrics_enrichment()
+    return treated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Enrich buildings already in the database.")
+    parser.add_argument("--llm", action="store_true", help="include the LLM stage")
+    parser.add_argument("--all", action="store_true", help="re-enrich every building")
+    args = parser.parse_args()
+    run_catch_up(build_pipeline(llm=args.llm or None), everything=args.all)
+
+
+if __name__ == "__main__":
+    main()
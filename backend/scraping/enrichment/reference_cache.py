@@ -0,0 +1,251 @@
+"""
+Compiled cache of the external reference datasets (INSEE lookup, taxes,
+vacancy, revenue).
+
+Parsing the national-scale CSVs takes about a second; a short enrichment
+run should not pay that every time. The first load compiles them into
+NumPy arrays, one `.npy` file each (an `.npz` archive cannot be
+memory-mapped), under `data/cache/reference/<key>/`:
+
+- communes, sorted by INSEE code: `insee`, `tax_hab`, `tax_fonc`,
+  `vacancy`, `revenue` (NaN = unknown), `dept`, `region_idx` -> `regions`
+- postal codes, sorted (one entry per commune a code covers):
+  `postal_code`, `postal_commune` (index into the communes),
+  `postal_city` (normalized city name, to pick among communes)
+
+`<key>` is derived from the SHA-256 of the four CSV files, so editing any
+of them triggers a rebuild on the next load. Later loads memory-map the
+arrays read-only: they take milliseconds and processes share the pages.
+
+Build explicitly (e.g. after updating the CSVs) with:
+
+    python -m backend.scraping.enrichment.reference_cache
+"""
+
+import csv
+import hashlib
+import json
+import re
+import shutil
+import tempfile
+import unicodedata
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+EXTERNAL_DIR = Path(__file__).resolve().parent.parent / "data" / "external"
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "reference"
+
+DATASET_FILES = ("insee_lookup.csv", "taxes.csv", "vacancy.csv", "revenue.csv")
+
+MANIFEST_FILENAME = "manifest.json"
+
+# Bump when the compiled layout changes, to invalidate existing caches.
+CACHE_FORMAT_VERSION = 1
+
+
+# -------------------- CSV parsing --------------------
+
+
+def _read_rows(path: Path) -> Iterator[Dict[str, str]]:
+    """Yield the rows of a dataset CSV as dicts (comment lines skipped)."""
+    if not path.exists():
+        print(f"[WARN] Enrichment dataset not found: {path}")
+        return
+    with path.open("r", newline="", encoding="utf-8-sig") as f:
+        lines = [line for line in f if line.strip() and not line.lstrip().startswith("#")]
+    if not lines:
+        return
+    delimiter = ";" if lines[0].count(";") >= lines[0].count(",") else ","
+    for row in csv.DictReader(lines, delimiter=delimiter):
+        yield {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+
+
+def _to_float(value: Optional[str]) -> float:
+    if not value:
+        return np.nan
+    try:
+        return float(value.replace("\u00a0", "").replace(" ", "").replace(",", "."))
+    except ValueError:
+        return np.nan
+
+
+def normalize_code(value: Optional[str]) -> str:
+    """Zero-pad postal / INSEE codes that lost their leading zero ("1000")."""
+    if not value:
+        return ""
+    value = value.strip().upper()
+    return value.zfill(5) if value.isdigit() else value
+
+
+def normalize_city(value: Optional[str]) -> str:
+    """Uppercase ASCII letters/digits only, SAINT -> ST ("Saint-Étienne" -> "STETIENNE")."""
+    if not value:
+        return ""
+    ascii_value = unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode()
+    words = re.findall(r"[A-Z0-9]+", ascii_value.upper())
+    return "".join("ST" if w == "SAINT" else "STE" if w == "SAINTE" else w for w in words)
+
+
+def _dept_from_insee(insee: str) -> str:
+    # Overseas departments use three digits (971..976).
+    return insee[:3] if insee.startswith("97") else insee[:2]
+
+
+# -------------------- compiled arrays --------------------
+
+
+@dataclass
+class ReferenceData:
+    """Reference datasets as aligned NumPy arrays (see module docstring)."""
+
+    insee: np.ndarray
+    tax_hab: np.ndarray
+    tax_fonc: np.ndarray
+    vacancy: np.ndarray
+    revenue: np.ndarray
+    dept: np.ndarray
+    region_idx: np.ndarray
+    regions: np.ndarray
+    postal_code: np.ndarray
+    postal_commune: np.ndarray
+    postal_city: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.insee)
+
+
+def _str_array(values: List[str]) -> np.ndarray:
+    width = max((len(v) for v in values), default=1) or 1
+    return np.array(values, dtype=f"<U{width}")
+
+
+def parse_reference_data(data_dir: Path = EXTERNAL_DIR) -> ReferenceData:
+    """Parse the four CSVs into ReferenceData (slow path; see load_reference_data)."""
+    taxes = {
+        normalize_code(r.get("insee")): (_to_float(r.get("tax_hab")), _to_float(r.get("tax_fonc")))
+        for r in _read_rows(data_dir / "taxes.csv")
+    }
+    vacancy = {
+        normalize_code(r.get("insee")): _to_float(r.get("vacancy"))
+        for r in _read_rows(data_dir / "vacancy.csv")
+    }
+    revenue = {
+        normalize_code(r.get("insee")): _to_float(r.get("revenue"))
+        for r in _read_rows(data_dir / "revenue.csv")
+    }
+
+    communes: Dict[str, Tuple[str, str]] = {}  # insee -> (dept, region)
+    postal_rows: List[Tuple[str, int, str, str]] = []  # (postal, order, insee, city)
+    for order, r in enumerate(_read_rows(data_dir / "insee_lookup.csv")):
+        insee = normalize_code(r.get("insee"))
+        postal = normalize_code(r.get("postal_code"))
+        if not insee or not postal:
+            continue
+        postal_rows.append((postal, order, insee, normalize_city(r.get("city"))))
+        if insee not in communes:
+            communes[insee] = (r.get("dept") or _dept_from_insee(insee), r.get("region") or "")
+
+    insee_codes = sorted(communes)
+    position = {code: i for i, code in enumerate(insee_codes)}
+    regions = sorted({region for _, region in communes.values()})
+    region_position = {region: i for i, region in enumerate(regions)}
+    # Stable on file order, so the first commune listed for a code comes first.
+    postal_rows.sort()
+
+    return ReferenceData(
+        insee=_str_array(insee_codes),
+        tax_hab=np.array([taxes.get(c, (np.nan, np.nan))[0] for c in insee_codes], dtype=np.float64),
+        tax_fonc=np.array([taxes.get(c, (np.nan, np.nan))[1] for c in insee_codes], dtype=np.float64),
+        vacancy=np.array([vacancy.get(c, np.nan) for c in insee_codes], dtype=np.float64),
+        revenue=np.array([revenue.get(c, np.nan) for c in insee_codes], dtype=np.float64),
+        dept=_str_array([communes[c][0] for c in insee_codes]),
+        region_idx=np.array([region_position[communes[c][1]] for c in insee_codes], dtype=np.int32),
+        regions=_str_array(regions),
+        postal_code=_str_array([p for p, _, _, _ in postal_rows]),
+        postal_commune=np.array([position[i] for _, _, i, _ in postal_rows], dtype=np.int32),
+        postal_city=_str_array([c for _, _, _, c in postal_rows]),
+    )
+
+
+# -------------------- cache --------------------
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    if path.exists():
+        with path.open("rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def source_hashes(data_dir: Path = EXTERNAL_DIR) -> Dict[str, str]:
+    """SHA-256 of each dataset file (of empty content if missing)."""
+    return {name: _file_sha256(data_dir / name) for name in DATASET_FILES}
+
+
+def _cache_key(hashes: Dict[str, str]) -> str:
+    joined = f"v{CACHE_FORMAT_VERSION}|" + "|".join(f"{n}:{hashes[n]}" for n in DATASET_FILES)
+    return hashlib.sha256(joined.encode("utf-8")).hexdigest()[:16]
+
+
+def compile_reference_data(
+    data_dir: Path = EXTERNAL_DIR,
+    cache_dir: Path = CACHE_DIR,
+) -> Path:
+    """
+    Parse the CSVs and write the compiled arrays; returns the cache folder.
+    Caches of older versions of the CSVs are removed.
+    """
+    hashes = source_hashes(data_dir)
+    target = cache_dir / _cache_key(hashes)
+    data = parse_reference_data(data_dir)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Write into a temporary folder and rename it, so concurrent loaders
+    # never see a half-written cache.
+    tmp = Path(tempfile.mkdtemp(prefix=".build-", dir=cache_dir))
+    try:
+        for f in fields(ReferenceData):
+            np.save(tmp / f"{f.name}.npy", getattr(data, f.name), allow_pickle=False)
+        manifest = {"format": CACHE_FORMAT_VERSION, "sources": hashes, "communes": len(data)}
+        (tmp / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        if target.exists():
+            shutil.rmtree(target)
+        tmp.rename(target)
+    finally:
+        if tmp.exists():
+            shutil.rmtree(tmp)
+
+    for stale in cache_dir.iterdir():
+        if stale.is_dir() and stale != target and not stale.name.startswith("."):
+            shutil.rmtree(stale, ignore_errors=True)
+    return target
+
+
+def load_reference_data(
+    data_dir: Path = EXTERNAL_DIR,
+    cache_dir: Path = CACHE_DIR,
+) -> ReferenceData:
+    """
+    Return the reference arrays, memory-mapped from the compiled cache,
+    compiling it first if missing or out of date.
+    """
+    target = cache_dir / _cache_key(source_hashes(data_dir))
+    if not (target / MANIFEST_FILENAME).exists():
+        print("[INFO] Compiling reference datasets...")
+        target = compile_reference_data(data_dir, cache_dir)
+
+    arrays: Dict[str, Any] = {
+        f.name: np.load(target / f"{f.name}.npy", mmap_mode="r", allow_pickle=False)
+        for f in fields(ReferenceData)
+    }
+    return ReferenceData(**arrays)
+
+
+if __name__ == "__main__":
+    path = compile_reference_data()
+    print(f"Reference datasets compiled to: {path}")
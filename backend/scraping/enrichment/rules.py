@@ -0,0 +1,157 @@
+"""
+Rule-based pre-extraction of the llm_* columns, run before the LLM.
+
+Many building ads state the facts outright ("immeuble de 6 appartements",
+"T2 de 45 m², T3 de 68 m²", "plateau de bureaux"). Precompiled French
+regular expressions pick those up in microseconds; each extraction gets a
+confidence score, and only descriptions below `MIN_CONFIDENCE` are sent to
+the LLM (see `LLMEnricher` in llm_enrichment.py).
+
+Confidence, roughly:
+
+- 0.95: flat count stated and matching the listed flat sizes
+- 0.9:  offices / commercial premises only, no dwelling mentioned
+- 0.85: flat sizes listed for every flat, no count stated; or flat count
+        stated without any size (llm_flatSizes left NULL)
+- 0.6:  sizes for only some of the flats, a single size without a count,
+        or offices mentioned next to dwellings (mixed-use: left to the LLM)
+- 0.0:  nothing found, or counts that contradict each other
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+MIN_CONFIDENCE = 0.8
+
+_NUMBER_WORDS = {
+    "un": 1, "une": 1, "deux": 2, "trois": 3, "quatre": 4, "cinq": 5, "six": 6,
+    "sept": 7, "huit": 8, "neuf": 9, "dix": 10, "onze": 11, "douze": 12,
+    "treize": 13, "quatorze": 14, "quinze": 15, "seize": 16, "vingt": 20,
+}
+_TENS = {"vingt": 20, "trente": 30, "quarante": 40, "cinquante": 50, "soixante": 60}
+_UNITS = {
+    "un": 1, "une": 1, "deux": 2, "trois": 3, "quatre": 4, "cinq": 5, "six": 6,
+    "sept": 7, "huit": 8, "neuf": 9,
+}
+# Compound numbers ("vingt-deux", "trente et un") first, then single words.
+_NUMBER_WORD = (
+    "(?:" + "|".join(_TENS) + r")(?:-|\s+et\s+)(?:" + "|".join(_UNITS) + ")"
+    "|" + "|".join(sorted({*_NUMBER_WORDS, *_TENS}, key=len, reverse=True))
+)
+# Not preceded by a letter, digit or hyphen: "vingt-deux" is not "deux".
+_NUMBER = r"(?<![\w-])(\d{1,3}|" + _NUMBER_WORD + r")(?![\w-])"
+
+# "6 appartements", "six logements", "vingt-deux lots d'habitation"
+_FLAT_COUNT_RE = re.compile(
+    _NUMBER + r"\s+(?:appartements|logements|lots\s+d'habitation|lots)\b"
+)
+# "T2 de 45 m²", "F3 (68m2)", "studio d'environ 22,5 m²", "T1 bis : 30 m²"
+_FLAT_SIZE_RE = re.compile(
+    r"\b(?:[tf]\s?[1-7](?:\s*bis)?|studios?)\s*"
+    r"(?:de|d'environ|d'une surface de|d'env\.?|:|\(|,)?\s*(?:environ\s*)?"
+    r"(\d{1,3}(?:[.,]\d{1,2})?)\s*m(?:²|2|\b)"
+)
+_OFFICE_RE = re.compile(
+    r"\b(?:bureaux|plateaux?\s+de\s+bureaux|local\s+commercial|locaux\s+commerciaux|"
+    r"locaux\s+professionnels|local\s+professionnel|entrep[ôo]ts?|immeuble\s+de\s+bureaux)\b"
+)
+_DWELLING_RE = re.compile(
+    r"\b(?:appartements?|logements?|studios?|maisons?|[tf]\s?[1-7]|duplex|habitation)\b"
+)
+_PERKS = {
+    "cave": re.compile(r"\bcaves?\b"),
+    "parking": re.compile(r"\b(?:parkings?|stationnements?)\b"),
+    "garage": re.compile(r"\bgarages?\b"),
+    "jardin": re.compile(r"\bjardins?\b"),
+    "cour": re.compile(r"\bcour\b"),
+    "terrasse": re.compile(r"\bterrasses?\b"),
+    "balcon": re.compile(r"\bbalcons?\b"),
+    "ascenseur": re.compile(r"\bascenseur\b"),
+    "grenier": re.compile(r"\b(?:grenier|combles)\b"),
+}
+
+
+@dataclass
+class RuleExtraction:
+    """llm_* values found by the rules, and how much to trust them."""
+
+    values: Dict[str, Any] = field(default_factory=dict)
+    confidence: float = 0.0
+
+    @property
+    def confident(self) -> bool:
+        return self.confidence >= MIN_CONFIDENCE
+
+
+def _number(token: str) -> Optional[int]:
+    """Value of a count ("12", "six", "vingt-deux"), None if not a number."""
+    if token.isdigit():
+        return int(token)
+    if token in _NUMBER_WORDS or token in _TENS:
+        return _NUMBER_WORDS.get(token) or _TENS[token]
+    tens, _, unit = re.sub(r"\s+et\s+", "-", token).partition("-")
+    if tens in _TENS and unit in _UNITS:
+        return _TENS[tens] + _UNITS[unit]
+    return None
+
+
+def _size(token: str) -> str:
+    value = float(token.replace(",", "."))
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def _perks(text: str) -> Optional[str]:
+    found = [name for name, pattern in _PERKS.items() if pattern.search(text)]
+    return ", ".join(found) or None
+
+
+def extract_rules(description: Optional[str]) -> RuleExtraction:
+    """Apply the rules to one description (see module docstring)."""
+    if not description:
+        return RuleExtraction()
+    text = description.lower().replace("\u00a0", " ").replace("\u2019", "'")
+
+    counts = {_number(m.group(1)) for m in _FLAT_COUNT_RE.finditer(text)}
+    counts.discard(None)
+    counts.discard(0)
+    sizes: List[str] = [_size(m.group(1)) for m in _FLAT_SIZE_RE.finditer(text)]
+    other = _perks(text)
+
+    if not counts and not sizes:
+        if _OFFICE_RE.search(text) and not _DWELLING_RE.search(text):
+            values = {
+                "llm_residential_office": "office",
+                "llm_nbFlats": 0,
+                "llm_flatSizes": "0",
+                "llm_other": other,
+            }
+            return RuleExtraction(values, 0.9)
+        return RuleExtraction()
+    if len(counts) > 1:
+        return RuleExtraction()
+    # Offices next to dwellings: mixed use, the split is for the LLM to read.
+    mixed = bool(_OFFICE_RE.search(text))
+
+    count = next(iter(counts)) if counts else None
+    values = {
+        "llm_residential_office": "residential",
+        "llm_nbFlats": None,
+        "llm_flatSizes": None,
+        "llm_other": other,
+    }
+    if count is not None and len(sizes) == count:
+        confidence = 0.95
+    elif count is None and len(sizes) >= 2:
+        count, confidence = len(sizes), 0.85
+    elif count is not None and not sizes:
+        confidence = 0.85
+    else:
+        confidence = 0.6
+    if mixed:
+        confidence = min(confidence, 0.6)
+    if count is not None:
+        values["llm_nbFlats"] = count
+    if sizes and len(sizes) == count:
+        values["llm_flatSizes"] = ",".join(sizes)
+    return RuleExtraction(values, confidence)
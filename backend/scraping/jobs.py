@@ -0,0 +1,305 @@
+"""
+Background scraping jobs, started from the API.
+
+Each job runs `run_full_scraping()` in its own worker process, so a crawl
+never holds the API process's GIL or event loop. The worker reports
+progress events (see `engine.py`) on a multiprocessing queue; a monitor
+thread in the API process folds them into the job's counters, which
+`ScrapeJob.to_dict()` turns into a progress report (rate, ETA, errors).
+
+- jobs are cancelled by terminating their process (buildings are
+  inserted in small batches, one transaction each, so nothing is left
+  half-written)
+- a job claims its search links: starting a job on a link that a running
+  job already covers raises `JobConflictError`
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from ..db import connection
+from .engine import OUTPUT_DIR
+
+# Spawn (not fork): the API process runs threads (DB executor, writer).
+_mp = multiprocessing.get_context("spawn")
+
+# Error messages kept per job (oldest dropped first).
+MAX_JOB_ERRORS = 20
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobConflictError(Exception):
+    """Raised when a job would scrape a search link already being scraped."""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _worker_main(
+    events: "multiprocessing.Queue",
+    db_path: str,
+    search_link_ids: List[int],
+    max_pages_per_search: int,
+    csv_name: str,
+    revisit: bool = False,
+) -> None:
+    """Entry point of a job's worker process."""
+    from .engine import run_full_scraping
+
+    # Use the same database as the API process that started the job.
+    connection.DB_PATH = Path(db_path)
+
+    def progress(event: str, data: Dict[str, Any]) -> None:
+        events.put((event, data))
+
+    csv_path = OUTPUT_DIR / csv_name
+    try:
+        run_full_scraping(
+            max_pages_per_search=max_pages_per_search,
+            search_link_ids=search_link_ids,
+            csv_path=csv_path,
+            progress=progress,
+            revisit=revisit,
+        )
+    except BaseException:
+        events.put(("crashed", {"message": traceback.format_exc()}))
+        raise
+    finally:
+        csv_path.unlink(missing_ok=True)
+
+
+@dataclass
+class ScrapeJob:
+    """State and progress counters of one scraping job."""
+
+    id: str
+    search_link_ids: List[int]
+    max_pages_per_search: int
+    revisit: bool = False
+    status: str = "queued"
+    created_at: str = field(default_factory=_now)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    phase: Optional[str] = None
+    search_links_total: int = 0
+    search_links_done: int = 0
+    ad_urls_found: int = 0
+    ads_total: int = 0
+    ads_done: int = 0
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    failed: int = 0
+    error_count: int = 0
+    errors: Deque[str] = field(default_factory=lambda: deque(maxlen=MAX_JOB_ERRORS))
+    _scrape_started: Optional[float] = None
+    _process: Any = None
+
+    def apply(self, event: str, data: Dict[str, Any]) -> None:
+        """Fold one progress event from the worker into the counters."""
+        if event == "phase":
+            self.phase = data["phase"]
+            if self.phase == "collect":
+                self.search_links_total = data["total"]
+            else:
+                self.ads_total = data["total"]
+                self._scrape_started = time.monotonic()
+        elif event == "search_link":
+            self.search_links_done += 1
+            self.ad_urls_found += data["urls"]
+        elif event == "ad":
+            self.ads_done += 1
+            if data["status"] == "inserted":
+                self.inserted += 1
+            elif data["status"] == "updated":
+                self.updated += 1
+            elif data["status"] in ("skipped", "unchanged"):
+                self.skipped += 1
+            else:
+                self.failed += 1
+        elif event in ("error", "crashed"):
+            self.error_count += 1
+            self.errors.append(data["message"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Progress report, as returned by the API."""
+        rate: Optional[float] = None
+        eta_sec: Optional[float] = None
+        if self._scrape_started is not None and self.status == "running":
+            elapsed = time.monotonic() - self._scrape_started
+            if self.ads_done and elapsed > 0:
+                rate = self.ads_done / elapsed
+                eta_sec = (self.ads_total - self.ads_done) / rate
+        return {
+            "id": self.id,
+            "status": self.status,
+            "search_link_ids": self.search_link_ids,
+            "max_pages_per_search": self.max_pages_per_search,
+            "revisit": self.revisit,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "phase": self.phase,
+            "search_links": {"done": self.search_links_done, "total": self.search_links_total},
+            "ad_urls_found": self.ad_urls_found,
+            "ads": {
+                "done": self.ads_done,
+                "total": self.ads_total,
+                "inserted": self.inserted,
+                "updated": self.updated,
+                "skipped": self.skipped,
+                "failed": self.failed,
+            },
+            "rate_ads_per_sec": round(rate, 3) if rate is not None else None,
+            "eta_sec": round(eta_sec) if eta_sec is not None else None,
+            "error_count": self.error_count,
+            "errors": list(self.errors),
+        }
+
+
+class ScrapeJobManager:
+    """
+    Start, track and cancel scraping jobs.
+
+    :param max_finished: finished jobs kept for inspection (oldest dropped)
+    """
+
+    def __init__(self, max_finished: int = 50) -> None:
+        self.max_finished = max_finished
+        self._jobs: Dict[str, ScrapeJob] = {}
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        search_link_ids: Sequence[int],
+        max_pages_per_search: int = 3,
+        db_path: Optional[str] = None,
+        revisit: bool = False,
+    ) -> ScrapeJob:
+        """
+        Start a job scraping the given search links (and re-checking the
+        ads already stored, with `revisit`).
+
+        Raises JobConflictError if a running job already covers one of them.
+        """
+        if db_path is None:
+            db_path = str(connection.DB_PATH)
+
+        with self._lock:
+            busy = {
+                link_id
+                for job in self._jobs.values()
+                if job.status in ACTIVE_STATUSES
+                for link_id in job.search_link_ids
+            }
+            conflicts = sorted(busy.intersection(search_link_ids))
+            if conflicts:
+                raise JobConflictError(
+                    f"Search link(s) already being scraped: {', '.join(map(str, conflicts))}"
+                )
+
+            job = ScrapeJob(
+                id=uuid.uuid4().hex,
+                search_link_ids=list(search_link_ids),
+                max_pages_per_search=max_pages_per_search,
+                revisit=revisit,
+            )
+            events = _mp.Queue()
+            job._process = _mp.Process(
+                target=_worker_main,
+                args=(
+                    events,
+                    db_path,
+                    job.search_link_ids,
+                    max_pages_per_search,
+                    f"urls_job_{job.id}.csv",
+                    revisit,
+                ),
+                name=f"scrape-job-{job.id[:8]}",
+                daemon=True,
+            )
+            job._process.start()
+            job.status = "running"
+            job.started_at = _now()
+            self._jobs[job.id] = job
+            self._prune()
+
+        threading.Thread(
+            target=self._monitor,
+            args=(job, events),
+            name=f"scrape-job-monitor-{job.id[:8]}",
+            daemon=True,
+        ).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[ScrapeJob]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[ScrapeJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> Optional[ScrapeJob]:
+        """Cancel a running job (no-op if it already finished)."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            if job.status not in ACTIVE_STATUSES:
+                return job
+            job.status = "cancelled"
+        job._process.terminate()
+        return job
+
+    def shutdown(self) -> None:
+        """Cancel every running job and wait for the workers to exit."""
+        for job in list(self._jobs.values()):
+            self.cancel(job.id)
+        for job in list(self._jobs.values()):
+            if job._process is not None:
+                job._process.join(timeout=5)
+
+    # -------------------- internals --------------------
+
+    def _monitor(self, job: ScrapeJob, events: "multiprocessing.Queue") -> None:
+        process = job._process
+        while True:
+            try:
+                event, data = events.get(timeout=0.5)
+            except queue.Empty:
+                if not process.is_alive():
+                    break
+                continue
+            job.apply(event, data)
+
+        # Drain events sent just before the process exited.
+        try:
+            while True:
+                job.apply(*events.get_nowait())
+        except (queue.Empty, EOFError, OSError):
+            pass
+
+        process.join()
+        with self._lock:
+            if job.status == "running":
+                job.status = "succeeded" if process.exitcode == 0 else "failed"
+            job.finished_at = _now()
+            job.phase = None
+
+    def _prune(self) -> None:
+        # Caller holds self._lock.
+        finished = [job for job in self._jobs.values() if job.status not in ACTIVE_STATUSES]
+        finished.sort(key=lambda job: job.created_at)
+        for job in finished[: max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+"""
+Distributed scraping workers over the SQLite work queue.
+
+`run_full_scraping()` crawls everything from one process. For more
+throughput, the work is split into queue items (Table 8: work_queue):
+
+- "listing": one result page of a search link -> enqueues its ad URLs
+- "ad": one ad page -> fetched, parsed, enriched (see
+  `enrichment/pipeline.py`) and inserted into Table 1
+
+Any number of workers, on this machine or on others sharing the database
+file, claim batches of items under a lease, keep the lease alive with a
+heartbeat while working, and mark each item done or failed. Items of a
+worker that dies are claimed again once its lease expires. Processing is
+idempotent: ad URLs are unique in the queue and in `buildings`, so an item
+processed twice inserts nothing the second time.
+
+Decile categories depend on the whole dataset: a worker that inserted ads
+with enrichment on recomputes them (`run_metrics_enrichment()`) when it
+stops, e.g. once the queue is drained with `--exit-when-idle`.
+
+Requests to a source website are paced globally, across all workers,
+through Table 9 (source_politeness): one request at a time per source, and
+at least its minimum interval between the end of one and the next.
+
+Usage (from project root):
+
+    python -m backend.scraping.queue_worker seed [--max-pages 3]
+    python -m backend.scraping.queue_worker work [--batch 5] [--exit-when-idle]
+    python -m backend.scraping.queue_worker stats
+
+Run `work` in as many terminals / hosts as wanted. To try it locally
+against a stand-in website, see `standin.py`.
+"""
+
+import argparse
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set
+
+from ..db import repositories as db_repo
+from .changes import content_hash
+from .sources import get_source_by_name
+
+if TYPE_CHECKING:
+    from .enrichment.pipeline import EnrichmentPipeline
+
+DEFAULT_BATCH_SIZE = 5
+DEFAULT_LEASE_SEC = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+# How long a source's request slot stays held if its worker dies mid-request.
+SLOT_HOLD_SEC = 60.0
+
+
+def seed_listing_pages(max_pages: int = 3) -> int:
+    """
+    Queue the first `max_pages` result pages of every search link (pages
+    already crawled are queued again). Returns the number of items queued.
+    """
+    items = [
+        ("listing", row["source"], row["link"], page)
+        for row in db_repo.get_search_links()
+        for page in range(1, max_pages + 1)
+    ]
+    return db_repo.enqueue_work(items, requeue_finished=True)
+
+
+class QueueWorker:
+    """
+    Claim and process work queue items until stopped.
+
+    :param worker_id: unique name of this worker (default: host-pid-random)
+    :param batch_size: items claimed per round-trip
+    :param lease_sec: lease duration; renewed every third of it
+    :param max_attempts: attempts before an item is marked 'failed'
+    :param idle_sleep_sec: wait between claims when the queue is empty
+    :param exit_when_idle: return once the queue has nothing to claim
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        lease_sec: float = DEFAULT_LEASE_SEC,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        idle_sleep_sec: float = 2.0,
+        exit_when_idle: bool = False,
+        enrich: bool = True,
+    ) -> None:
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.batch_size = batch_size
+        self.lease_sec = lease_sec
+        self.max_attempts = max_attempts
+        self.idle_sleep_sec = idle_sleep_sec
+        self.exit_when_idle = exit_when_idle
+        self.enrich = enrich
+        self.pipeline: Optional[EnrichmentPipeline] = None
+        self.processed = 0
+        self.inserted = 0
+        self._held: Set[int] = set()
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # -------------------- main loop --------------------
+
+    def run(self) -> None:
+        if self.enrich:
+            from .enrichment.pipeline import build_pipeline
+
+            self.pipeline = build_pipeline()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, name=f"heartbeat-{self.worker_id}", daemon=True
+        )
+        heartbeat.start()
+        print(f"[WORKER {self.worker_id}] started")
+        try:
+            while not self._stop.is_set():
+                items = db_repo.claim_work(
+                    self.worker_id, self.batch_size, self.lease_sec, self.max_attempts
+                )
+                if not items:
+                    if self.exit_when_idle and not self._others_busy():
+                        break
+                    self._stop.wait(self.idle_sleep_sec)
+                    continue
+
+                with self._held_lock:
+                    self._held.update(item["id"] for item in items)
+                for item in items:
+                    if self._stop.is_set():
+                        break
+                    self._process(item)
+                    with self._held_lock:
+                        self._held.discard(item["id"])
+        finally:
+            self._stop.set()
+            with self._held_lock:
+                unfinished = list(self._held)
+                self._held.clear()
+            db_repo.release_work(self.worker_id, unfinished)
+            print(f"[WORKER {self.worker_id}] stopped after {self.processed} items")
+
+        if self.pipeline is not None and self.inserted:
+            from .enrichment.metrics import run_metrics_enrichment
+
+            print(f"[WORKER {self.worker_id}] Updating dataset-wide metrics...")
+            run_metrics_enrichment()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _others_busy(self) -> bool:
+        # Leased items may still enqueue ads (listing pages) or come back
+        # (failed attempts): only exit once nothing is leased either.
+        stats = db_repo.get_work_queue_stats()
+        return any(counts.get("leased") for counts in stats.values())
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.lease_sec / 3):
+            with self._held_lock:
+                held = list(self._held)
+            if held:
+                db_repo.renew_work_leases(self.worker_id, held, self.lease_sec)
+
+    # -------------------- items --------------------
+
+    @contextmanager
+    def _source_slot(self, source: Any) -> Iterator[None]:
+        """Wait for the request slot of `source`, and hold it while in the block."""
+        while True:
+            taken, value = db_repo.reserve_source_slot(
+                source.name, source.min_request_interval_sec, SLOT_HOLD_SEC
+            )
+            if taken:
+                break
+            # A held slot is usually released well before its hold ends.
+            delay = min(value - time.time(), source.min_request_interval_sec)
+            time.sleep(max(delay, 0.001))
+        try:
+            yield
+        finally:
+            db_repo.release_source_slot(source.name, value)
+
+    def _process(self, item: Dict[str, Any]) -> None:
+        source = get_source_by_name(item["source"])
+        if source is None:
+            db_repo.fail_work(
+                self.worker_id, item["id"], f"No scraper for source '{item['source']}'", 0
+            )
+            return
+
+        try:
+            if item["kind"] == "listing":
+                result = self._process_listing(source, item)
+            else:
+                result = self._process_ad(source, item)
+        except Exception as exc:
+            print(f"[ERROR] {item['kind']} {item['url']} (attempt {item['attempts']}): {exc}")
+            db_repo.fail_work(self.worker_id, item["id"], str(exc), self.max_attempts)
+            return
+
+        db_repo.complete_work(self.worker_id, item["id"], result)
+        self.processed += 1
+
+    def _process_listing(self, source: Any, item: Dict[str, Any]) -> Dict[str, Any]:
+        with self._source_slot(source):
+            urls: List[str] = source.list_ad_urls_page(item["url"], item["page"])
+        queued = db_repo.enqueue_work(("ad", item["source"], url, 0) for url in urls)
+        print(f"[OK] {item['url']} page {item['page']}: {len(urls)} ads ({queued} new)")
+        return {"urls": len(urls), "queued": queued}
+
+    def _process_ad(self, source: Any, item: Dict[str, Any]) -> Dict[str, Any]:
+        url = item["url"]
+        if db_repo.building_exists_by_url(url):
+            db_repo.touch_buildings_seen([url])
+            return {"skipped": True}
+
+        with self._source_slot(source):
+            building = source.fetch_ad_data(url)
+        if self.pipeline is not None:
+            self.pipeline.process([building])
+        a_id = db_repo.insert_buildings([building], [content_hash(building)])[0]
+        if a_id is None:
+            # Inserted meanwhile (by a worker whose lease had expired, or
+            # under its canonical URL): nothing left to do.
+            return {"skipped": True}
+        self.inserted += 1
+        print(f"[OK] Inserted building a_id={a_id} from {url}")
+        try:
+            from .dedup import index_building
+
+            duplicates = index_building(a_id, building)
+        except Exception as exc:
+            print(f"[WARN] Duplicate detection failed for a_id={a_id}: {exc}")
+            duplicates = []
+        return {"a_id": a_id, "duplicates": [other for other, _ in duplicates]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Distributed scraping over the work queue.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    seed = sub.add_parser("seed", help="queue the result pages of every search link")
+    seed.add_argument("--max-pages", type=int, default=3)
+
+    work = sub.add_parser("work", help="claim and process queue items")
+    work.add_argument("--batch", type=int, default=DEFAULT_BATCH_SIZE)
+    work.add_argument("--lease", type=float, default=DEFAULT_LEASE_SEC)
+    work.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    work.add_argument("--exit-when-idle", action="store_true")
+    work.add_argument("--no-enrich", action="store_true", help="insert ads untreated")
+
+    sub.add_parser("stats", help="print item counts per kind and status")
+
+    args = parser.parse_args()
+    if args.command == "seed":
+        print(f"Queued {seed_listing_pages(args.max_pages)} listing pages.")
+    elif args.command == "work":
+        worker = QueueWorker(
+            batch_size=args.batch,
+            lease_sec=args.lease,
+            max_attempts=args.max_attempts,
+            exit_when_idle=args.exit_when_idle,
+            enrich=not args.no_enrich,
+        )
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            pass
+    else:
+        for kind, counts in sorted(db_repo.get_work_queue_stats().items()):
+            print(f"{kind}: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,37 +5,86 @@ Manual entrypoint for the scraping pipeline.
 
 Recommended usage (from project root):
 
-    python -m backend.scraping.run_scraping
+    python -m backend.scraping.run_scraping [--max-pages 3]
 
 This will:
 
 1. Read search links from Table 2 (search_links).
 2. Use the SeLoger scraper (and other sources when added) to collect ad URLs.
 3. Write `backend/scraping/data/output/urls_aggregated.csv`.
-4. Scrape each ad URL not already in Table 1 (buildings) and insert them.
+4. Scrape each ad URL not already in Table 1 (buildings), enrich it inline
+   (CSV lookups, price per m², and the LLM stage if ENRICHMENT_LLM is set)
+   and insert them fully treated.
 
-Enrichment (CSV-based + LLM) will be plugged in AFTER the scraping pipeline.
+`--no-enrich` inserts the ads untreated; `--catch-up` only enriches the
+buildings already in the table that are not treated yet (see
+`enrichment/pipeline.py`). `--revisit` also scrapes the ads already in
+Table 1 again, and records those whose content (e.g. price) changed (see
+`changes.py`).
+
+To crawl each search link on its own adaptive schedule instead (see
+`scheduler.py`), run the scheduler daemon:
+
+    python -m backend.scraping.run_scraping --schedule [--once]
 """
 
+import argparse
+
 from .engine import run_full_scraping
 
 
 def main() -> None:
-  # Adjust max_pages_per_search as you wish
-  run_full_scraping(max_pages_per_search=3)
-
-  # ------------------------------------------------------------------
-  # Enrichment hooks (to be implemented later)
-  #
-  #   from .enrichment.csv_enrichment import run_csv_enrichment
-  #   from .enrichment.llm_enrichment import run_llm_enrichment
-  #
-  #   print("[STEP 4] Running CSV-based enrichment...")
-  #   run_csv_enrichment()
-  #
-  #   print("[STEP 5] Running LLM-based enrichment...")
-  #   run_llm_enrichment()
-  # ------------------------------------------------------------------
+  parser = argparse.ArgumentParser(description="Run the scraping pipeline.")
+  parser.add_argument(
+    "--max-pages",
+    type=int,
+    default=3,
+    help="search result pages per search link (default: 3)",
+  )
+  parser.add_argument(
+    "--no-enrich",
+    action="store_true",
+    help="insert ads without enriching them (c_treated = 0)",
+  )
+  parser.add_argument(
+    "--revisit",
+    action="store_true",
+    help="re-scrape ads already in the database and record their changes",
+  )
+  parser.add_argument(
+    "--catch-up",
+    action="store_true",
+    help="enrich the untreated buildings already in the database, then exit",
+  )
+  parser.add_argument(
+    "--schedule",
+    action="store_true",
+    help="run the per-search-link scheduler daemon instead of a single pass",
+  )
+  parser.add_argument(
+    "--once",
+    action="store_true",
+    help="with --schedule: crawl the links that are due, then exit",
+  )
+  args = parser.parse_args()
+
+  if args.schedule:
+    from .scheduler import run_scheduler
+
+    run_scheduler(once=args.once)
+    return
+
+  if args.catch_up:
+    from .enrichment.pipeline import run_catch_up
+
+    run_catch_up()
+    return
+
+  run_full_scraping(
+    max_pages_per_search=args.max_pages,
+    enrich=not args.no_enrich,
+    revisit=args.revisit,
+  )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,183 @@
+"""
+Per-search-link crawl scheduler.
+
+Instead of crawling every search link with the same depth on every run,
+the scheduler keeps a crawl plan per link (Table 7: search_link_schedule)
+and adapts it to how many new ads each link yields:
+
+- after each crawl, the link's new-ads-per-hour rate is updated (moving
+  average of the observed rate since the previous crawl)
+- the crawl interval is chosen so that a crawl finds about
+  TARGET_NEW_ADS_PER_CRAWL new ads: busy searches are crawled often, quiet
+  ones rarely (a crawl that finds nothing doubles the interval)
+- the page depth covers the new ads expected over that interval, plus one
+  page of already-known ads; if every listed ad was new, the crawl did not
+  reach known ads and the next one goes one page deeper
+
+This keeps request spend (search pages fetched) proportional to the new
+ads actually found. The plan is stored in the database, so the scheduler
+picks up where it left off after a restart.
+
+Run it as a daemon with:
+
+    python -m backend.scraping.run_scraping --schedule
+"""
+
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from ..db import repositories as db_repo
+from .engine import OUTPUT_DIR, run_full_scraping
+
+TARGET_NEW_ADS_PER_CRAWL = 10
+MIN_INTERVAL_SEC = 15 * 60
+MAX_INTERVAL_SEC = 24 * 3600
+MAX_PAGES = 10
+
+# Weight of the latest observation in the new-ads-per-hour average.
+RATE_SMOOTHING = 0.3
+
+# Ads per search result page, until a crawl has measured it.
+DEFAULT_ADS_PER_PAGE = 25
+
+_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _format_time(value: datetime) -> str:
+    return value.strftime(_TIME_FORMAT)
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.strptime(value, _TIME_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def plan_next_crawl(
+    schedule: Dict[str, Any],
+    new_ads: int,
+    urls_found: int,
+    now: datetime,
+) -> Dict[str, Any]:
+    """
+    Compute the schedule updates after a crawl of one search link.
+
+    `schedule` is the link's current row (see
+    `db_repo.get_search_link_schedules()`); `new_ads` / `urls_found` are the
+    crawl's results.
+    """
+    rate = schedule["new_ads_per_hour"]
+    last_run = _parse_time(schedule["last_run_at"])
+    if last_run is not None:
+        # The first crawl only measures the backlog, not a rate.
+        hours = max((now - last_run).total_seconds() / 3600, 1 / 60)
+        observed = new_ads / hours
+        rate = observed if rate is None else RATE_SMOOTHING * observed + (1 - RATE_SMOOTHING) * rate
+
+    interval = schedule["crawl_interval_sec"]
+    if rate:
+        interval = TARGET_NEW_ADS_PER_CRAWL / rate * 3600
+    elif last_run is not None:
+        interval *= 2
+    interval = int(min(max(interval, MIN_INTERVAL_SEC), MAX_INTERVAL_SEC))
+
+    pages = schedule["max_pages"]
+    ads_per_page = urls_found / pages if urls_found else DEFAULT_ADS_PER_PAGE
+    if urls_found and new_ads >= urls_found:
+        # Every listed ad was new: some were probably beyond the last page.
+        pages += 1
+    elif rate is not None:
+        expected = rate * interval / 3600
+        pages = math.ceil(expected / ads_per_page) + 1
+    pages = min(max(pages, 1), MAX_PAGES)
+
+    return {
+        "crawl_interval_sec": interval,
+        "max_pages": pages,
+        "next_run_at": _format_time(now + timedelta(seconds=interval)),
+        "last_run_at": _format_time(now),
+        "new_ads_per_hour": rate,
+        "last_new_ads": new_ads,
+        "last_urls_found": urls_found,
+        "runs": schedule["runs"] + 1,
+    }
+
+
+def crawl_search_link(schedule: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Crawl one search link with its scheduled depth, then store its next
+    plan. Returns the schedule updates.
+    """
+    counts = {"new_ads": 0, "urls_found": 0}
+
+    def progress(event: str, data: Dict[str, Any]) -> None:
+        if event == "search_link":
+            counts["urls_found"] += data["urls"]
+        elif event == "ad" and data["status"] == "inserted":
+            counts["new_ads"] += 1
+
+    csv_path = OUTPUT_DIR / f"urls_schedule_{schedule['id']}.csv"
+    try:
+        run_full_scraping(
+            max_pages_per_search=schedule["max_pages"],
+            search_link_ids=[schedule["id"]],
+            csv_path=csv_path,
+            progress=progress,
+        )
+    finally:
+        csv_path.unlink(missing_ok=True)
+
+    updates = plan_next_crawl(
+        schedule, counts["new_ads"], counts["urls_found"], datetime.now(timezone.utc)
+    )
+    db_repo.update_search_link_schedule(schedule["id"], updates)
+    return updates
+
+
+def run_scheduler(poll_sec: float = 60.0, once: bool = False) -> None:
+    """
+    Crawl search links as they come due, forever (or one pass if `once`).
+
+    New search links are picked up on every pass and crawled right away.
+    """
+    while True:
+        db_repo.sync_search_link_schedules()
+        now = datetime.now(timezone.utc)
+        for schedule in db_repo.get_search_link_schedules():
+            next_run = _parse_time(schedule["next_run_at"])
+            if next_run is not None and next_run > now:
+                break  # sorted by next_run_at: nothing else is due
+
+            print(
+                f"[SCHEDULE] Crawling search link {schedule['id']} "
+                f"({schedule['max_pages']} pages): {schedule['link']}"
+            )
+            try:
+                updates = crawl_search_link(schedule)
+            except Exception as exc:
+                print(f"[ERROR] Scheduled crawl of search link {schedule['id']} failed: {exc}")
+                retry_at = datetime.now(timezone.utc) + timedelta(seconds=MIN_INTERVAL_SEC)
+                db_repo.update_search_link_schedule(
+                    schedule["id"], {"next_run_at": _format_time(retry_at)}
+                )
+                continue
+            print(
+                f"[SCHEDULE] Search link {schedule['id']}: {updates['last_new_ads']} new ads; "
+                f"next crawl at {updates['next_run_at']} ({updates['max_pages']} pages)"
+            )
+
+        if once:
+            return
+
+        # Sleep until the next link is due (re-checking at least every poll_sec).
+        upcoming = [
+            _parse_time(s["next_run_at"])
+            for s in db_repo.get_search_link_schedules()
+            if s["next_run_at"]
+        ]
+        delay = poll_sec
+        if upcoming:
+            delay = (min(upcoming) - datetime.now(timezone.utc)).total_seconds()
+        time.sleep(min(max(delay, 1.0), poll_sec))
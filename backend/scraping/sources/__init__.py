@@ -4,27 +4,88 @@ from __future__ import annotations
 Source registry.
 
 Provides a helper to get a scraper instance by source name (e.g. "SeLoger").
+
+Sources are plugins loaded lazily: the registry maps each name to a
+"module:Class" string, and a source's module (with its HTTP / HTML parsing
+dependencies) is only imported the first time that source is requested.
+Importing this package costs nothing beyond the package itself.
+
+Sources come from:
+
+- SOURCE_REGISTRY below (built-in sources), or `register_source()` at run
+  time (e.g. the stand-in site, see `standin.py`)
+- installed distributions declaring an entry point in the
+  ENTRY_POINT_GROUP group, e.g. in their pyproject.toml:
+
+      [project.entry-points."realestate.sources"]
+      Bienici = "my_package.bienici:BieniciSource"
 """
 
-from typing import Optional, Type
+import importlib
+from typing import TYPE_CHECKING, Dict, List, Optional, Type, Union
+
+if TYPE_CHECKING:
+    from .base_source import BaseSource
 
-from .base_source import BaseSource
-from .seloger_source import SeLogerSource
+ENTRY_POINT_GROUP = "realestate.sources"
 
-# Registry of available sources.
-# Add more sources (e.g., BieniciSource) to this dict later.
-SOURCE_REGISTRY: dict[str, Type[BaseSource]] = {
-    "SeLoger": SeLogerSource,
-    # "Bienici": BieniciSource,  # to be added when implemented
+# Registry of available sources: name -> "module:Class" (relative to this
+# package if the module starts with a dot), or the class itself once loaded.
+SOURCE_REGISTRY: Dict[str, Union[str, Type[BaseSource]]] = {
+    "SeLoger": ".seloger_source:SeLogerSource",
+    # "Bienici": ".bienici_source:BieniciSource",  # to be added when implemented
 }
 
 
+def register_source(name: str, target: Union[str, Type[BaseSource]]) -> None:
+    """Make a source available under `name` (a class, or a "module:Class" string)."""
+    SOURCE_REGISTRY[name] = target
+
+
+def _entry_point_target(name: str) -> Optional[str]:
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name == name:
+            return entry_point.value
+    return None
+
+
+def available_sources() -> List[str]:
+    """Names of the registered and installed sources (nothing is imported)."""
+    from importlib.metadata import entry_points
+
+    names = set(SOURCE_REGISTRY)
+    names.update(entry_point.name for entry_point in entry_points(group=ENTRY_POINT_GROUP))
+    return sorted(names)
+
+
+def load_source_class(name: str) -> Optional[Type[BaseSource]]:
+    """
+    Return the scraper class of a source, importing its module on first
+    use, or None if no such source is registered or installed.
+
+    Raises ImportError / AttributeError if the registered target is broken.
+    """
+    target = SOURCE_REGISTRY.get(name)
+    if target is None:
+        target = _entry_point_target(name)
+        if target is None:
+            return None
+    if isinstance(target, str):
+        module_name, _, class_name = target.partition(":")
+        module = importlib.import_module(module_name, package=__name__)
+        target = getattr(module, class_name)
+        SOURCE_REGISTRY[name] = target
+    return target
+
+
 def get_source_by_name(name: str) -> Optional[BaseSource]:
     """
     Return a new scraper instance for the given source name, or None if
     the source is not implemented yet.
     """
-    cls = SOURCE_REGISTRY.get(name)
+    cls = load_source_class(name)
     if not cls:
         return None
     return cls()
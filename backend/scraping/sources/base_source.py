@@ -1,9 +1,35 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-import requests
+if TYPE_CHECKING:
+    import requests
+
+
+def listing_timestamp(value: Any) -> Optional[str]:
+    """
+    Normalize a date found on an ad page (ISO 8601 date or datetime, or
+    epoch seconds / milliseconds) into the format of the a_*At columns
+    ("2024-05-01T08:30:00Z", UTC). Naive datetimes are taken as UTC.
+    Returns None if the value cannot be parsed.
+    """
+    if value is None or value == "":
+        return None
+    try:
+        if isinstance(value, (int, float)) or str(value).isdigit():
+            seconds = float(value)
+            if seconds > 1e11:  # milliseconds
+                seconds /= 1000
+            parsed = datetime.fromtimestamp(seconds, tz=timezone.utc)
+        else:
+            parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except (ValueError, OverflowError, OSError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
 
 class BaseSource(ABC):
@@ -15,6 +41,10 @@ class BaseSource(ABC):
     - list_ad_urls(search_url, max_pages)
     - fetch_ad_data(ad_url)
 
+    and should override list_ad_urls_page(search_url, page) if it can fetch
+    a single result page (used by the distributed workers, see
+    `queue_worker.py`; the default is built on list_ad_urls).
+
     `fetch_ad_data` must return a dict compatible with the `buildings` table
     (Table 1) using keys like:
 
@@ -27,15 +57,23 @@ class BaseSource(ABC):
         a_description
         a_images
         a_publicationDate
+        a_publishedAt    (the listing's own date, see `listing_timestamp()`)
         a_dpe
         a_ges
 
-    Other columns (llm_* and c_*) will be filled later by enrichment.
+    a_firstSeenAt / a_lastSeenAt are set when the ad is stored. Other columns (llm_* and c_*) will be filled later by enrichment.
     """
 
     name: str
 
+    # Minimum delay between two requests to this website, across all
+    # distributed workers (initial value of its source_politeness row).
+    min_request_interval_sec: float = 1.0
+
     def __init__(self, session: Optional[requests.Session] = None) -> None:
+        # Imported here: the registry imports this module without creating a source.
+        import requests
+
         self.session: requests.Session = session or requests.Session()
 
     @abstractmethod
@@ -43,6 +81,19 @@ class BaseSource(ABC):
         """Return a list of ad URLs for a given search URL."""
         raise NotImplementedError
 
+    def list_ad_urls_page(self, search_url: str, page: int) -> List[str]:
+        """
+        Return the ad URLs on one result page of a search (1-based).
+
+        By default, the URLs listed up to `page` that are not listed up to
+        the page before, which fetches `page` - 1 pages twice: sources that
+        can fetch a single result page should override this.
+        """
+        if page <= 1:
+            return self.list_ad_urls(search_url, max_pages=1)
+        seen = set(self.list_ad_urls(search_url, max_pages=page - 1))
+        return [url for url in self.list_ad_urls(search_url, max_pages=page) if url not in seen]
+
     @abstractmethod
     def fetch_ad_data(self, ad_url: str) -> Dict[str, object]:
         """
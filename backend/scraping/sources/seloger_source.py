@@ -24,7 +24,7 @@ from urllib.parse import urlparse, parse_qs
 import requests
 from bs4 import BeautifulSoup
 
-from .base_source import BaseSource
+from .base_source import BaseSource, listing_timestamp
 
 # -------------------- configuration --------------------
 
@@ -114,6 +114,27 @@ def _extract_from_head_meta(soup: BeautifulSoup, name: str) -> Optional[str]:
     return None
 
 
+# Also matches inside the escaped JSON.parse("...") payload (\"key\":\"value\").
+_PUBLISHED_JSON_RE = re.compile(
+    r'"(?:datePublished|publicationDate|firstPublicationDate|creationDate)\\?"\s*:\s*'
+    r'\\?"?([^"\\,}]+)'
+)
+
+
+def _extract_publication_date(soup: BeautifulSoup, html: str) -> Optional[str]:
+    """The listing's own publication date (ISO 8601 UTC), if the page has one."""
+    tag = soup.find("meta", attrs={"property": "article:published_time"})
+    if tag and tag.get("content"):
+        published = listing_timestamp(tag["content"])
+        if published:
+            return published
+    for m in _PUBLISHED_JSON_RE.finditer(html):
+        published = listing_timestamp(m.group(1))
+        if published:
+            return published
+    return None
+
+
 def _extract_canonical_url(soup: BeautifulSoup) -> Optional[str]:
     tag = soup.find("link", rel="canonical")
     if tag and tag.get("href"):
@@ -311,6 +332,7 @@ class Ad:
     surfaceArea: Optional[str]
     description: Optional[str]
     Images: Optional[str]
+    publishedAt: Optional[str] = None  # ISO 8601 UTC, if the page has a date
 
 
 # -------------------- step 1: collect ad URLs --------------------
@@ -318,6 +340,39 @@ class Ad:
 AD_HREF_RE = re.compile(r"https://www\.seloger\.com/\d+/detail\.htm")
 
 
+def _listing_page_url(search_url: str, page: int) -> str:
+    if page <= 1:
+        return search_url
+    if "page=" in search_url:
+        return re.sub(r"([?&])page=\d+", rf"\1page={page}", search_url)
+    sep = "&" if "?" in search_url else "?"
+    return f"{search_url}{sep}page={page}"
+
+
+def get_listing_page_urls(
+    search_url: str,
+    page: int,
+    session: Optional[requests.Session] = None,
+) -> List[str]:
+    """Return the ad URLs found on one result page of a search."""
+    html = _get_html(_listing_page_url(search_url, page), session=session)
+    soup = BeautifulSoup(html, "html.parser")
+
+    urls: List[str] = []
+    anchors = soup.select(
+        "a[data-testid='card-mfe-covering-link-testid'], a.css-1a6drk4"
+    )
+    for a in anchors:
+        href = (a.get("href") or "").strip()
+        if AD_HREF_RE.fullmatch(href):
+            urls.append(href)
+
+    for m in AD_HREF_RE.finditer(html):
+        urls.append(m.group(0))
+
+    return _unique(urls)
+
+
 def get_listing_urls(
     search_url: str,
     max_pages: int = 1,
@@ -328,29 +383,8 @@ def get_listing_urls(
     prev_count = 0
 
     for page in range(1, max_pages + 1):
-        url = search_url
-        if page > 1:
-            sep = "&" if "?" in search_url else "?"
-            if "page=" in search_url:
-                url = re.sub(r"([?&])page=\d+", rf"\1page={page}", search_url)
-            else:
-                url = f"{search_url}{sep}page={page}"
-
-        html = _get_html(url, session=sess)
-        soup = BeautifulSoup(html, "html.parser")
-
-        anchors = soup.select(
-            "a[data-testid='card-mfe-covering-link-testid'], a.css-1a6drk4"
-        )
-        for a in anchors:
-            href = (a.get("href") or "").strip()
-            if AD_HREF_RE.fullmatch(href):
-                all_urls.append(href)
-
-        for m in AD_HREF_RE.finditer(html):
-            all_urls.append(m.group(0))
-
-        all_urls = _unique(all_urls)
+        url = _listing_page_url(search_url, page)
+        all_urls = _unique(all_urls + get_listing_page_urls(search_url, page, session=sess))
 
         if page > 1 and url != search_url and len(all_urls) == prev_count:
             break
@@ -425,6 +459,7 @@ def parse_ad(
         surfaceArea=surface_num,
         description=description,
         Images=images_str,
+        publishedAt=_extract_publication_date(soup, raw_html),
     )
 
 
@@ -452,6 +487,9 @@ class SeLogerSource(BaseSource):
             session=self.session,
         )
 
+    def list_ad_urls_page(self, search_url: str, page: int) -> List[str]:
+        return get_listing_page_urls(search_url, page, session=self.session)
+
     def fetch_ad_data(self, ad_url: str) -> dict:
         """
         Fetch and parse a single ad page, and map to our buildings schema.
@@ -481,6 +519,7 @@ class SeLogerSource(BaseSource):
             "a_description": ad.description,
             "a_images": ad.Images,
             "a_publicationDate": publication_date,
+            "a_publishedAt": ad.publishedAt,
             "a_dpe": "",  # empty for now
             "a_ges": "",  # empty for now
             # llm_* and c_* fields will be filled later by enrichment
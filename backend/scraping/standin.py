@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+"""
+Local stand-in website for trying the distributed workers without
+touching a real source.
+
+Provides:
+
+- a small HTTP server serving deterministic result pages (`/search?page=N`)
+  and ad pages (`/ads/<n>`), optionally failing some requests, and keeping
+  request stats (`/_stats`) to check the global pacing
+- `StandInSource`, the matching scraper ("StandIn" source)
+- a demo that seeds a throw-away database and runs several worker
+  processes against the server
+
+Usage (from project root):
+
+    python -m backend.scraping.standin --workers 4 --pages 5
+"""
+
+import argparse
+import json
+import re
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .sources import register_source
+from .sources.base_source import BaseSource, listing_timestamp
+
+ADS_PER_PAGE = 20
+
+_AD_HREF_RE = re.compile(r'href="(/ads/\d+)"')
+_META_RE = re.compile(r'<meta name="ad:(\w+)" content="([^"]*)">')
+
+
+# -------------------- server --------------------
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    server: "StandInServer"
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass  # keep the demo output readable
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        if parsed.path == "/_stats":
+            self._send(200, json.dumps(self.server.stats()), "application/json")
+            return
+
+        self.server.record_request()
+        if self.server.should_fail():
+            self._send(503, "try again later")
+            return
+
+        if parsed.path == "/search":
+            page = int(parse_qs(parsed.query).get("page", ["1"])[0])
+            self._send(200, self.server.listing_html(page))
+        elif parsed.path.startswith("/ads/"):
+            self._send(200, self.server.ad_html(int(parsed.path.rsplit("/", 1)[1])))
+        else:
+            self._send(404, "not found")
+
+    def _send(self, status: int, body: str, content_type: str = "text/html") -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Stand-in listing website.
+
+    :param pages: number of non-empty result pages
+    :param fail_every: answer 503 to every n-th request (0 = never)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, pages: int = 5, fail_every: int = 0) -> None:
+        super().__init__(("127.0.0.1", port), _StandInHandler)
+        self.pages = pages
+        self.fail_every = fail_every
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._last_request: Optional[float] = None
+        self._min_gap: Optional[float] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def record_request(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._requests += 1
+            if self._last_request is not None:
+                gap = now - self._last_request
+                self._min_gap = gap if self._min_gap is None else min(self._min_gap, gap)
+            self._last_request = now
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return bool(self.fail_every) and self._requests % self.fail_every == 0
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {"requests": self._requests, "min_gap_sec": self._min_gap}
+
+    def listing_html(self, page: int) -> str:
+        links = ""
+        if 1 <= page <= self.pages:
+            first = (page - 1) * ADS_PER_PAGE + 1
+            links = "".join(
+                f'<a href="/ads/{n}">Ad {n}</a>\n' for n in range(first, first + ADS_PER_PAGE)
+            )
+        return f"<html><body><h1>Results page {page}</h1>\n{links}</body></html>"
+
+    def ad_html(self, n: int) -> str:
+        meta = {
+            "title": f"Immeuble de rapport {n}",
+            "city": "Lille" if n % 2 else "Roubaix",
+            "cp": "59000" if n % 2 else "59100",
+            "price": str(100000 + 1000 * n),
+            "surface": str(100 + n),
+            "published": f"2024-05-{1 + n % 28:02d}T09:00:00+02:00",
+        }
+        tags = "".join(f'<meta name="ad:{k}" content="{v}">\n' for k, v in meta.items())
+        return (
+            f"<html><head>{tags}</head><body>"
+            f"<p>Immeuble de {2 + n % 6} appartements, vendu loué.</p></body></html>"
+        )
+
+
+# -------------------- source --------------------
+
+
+class StandInSource(BaseSource):
+    """Scraper for the stand-in website ("StandIn" source)."""
+
+    name = "StandIn"
+    min_request_interval_sec = 0.02
+
+    def list_ad_urls(self, search_url: str, max_pages: int = 1) -> List[str]:
+        urls: List[str] = []
+        for page in range(1, max_pages + 1):
+            urls.extend(self.list_ad_urls_page(search_url, page))
+        return urls
+
+    def list_ad_urls_page(self, search_url: str, page: int) -> List[str]:
+        resp = self.session.get(f"{search_url}?page={page}", timeout=10)
+        resp.raise_for_status()
+        base = search_url.rsplit("/search", 1)[0]
+        return [base + href for href in _AD_HREF_RE.findall(resp.text)]
+
+    def fetch_ad_data(self, ad_url: str) -> Dict[str, object]:
+        resp = self.session.get(ad_url, timeout=10)
+        resp.raise_for_status()
+        meta = dict(_META_RE.findall(resp.text))
+        return {
+            "a_url": ad_url,
+            "a_title": meta.get("title"),
+            "a_city": meta.get("city"),
+            "a_postalCode": meta.get("cp"),
+            "a_price": int(meta["price"]) if meta.get("price") else None,
+            "a_surfaceArea": float(meta["surface"]) if meta.get("surface") else None,
+            "a_publishedAt": listing_timestamp(meta.get("published")),
+            "a_description": re.sub(r"<[^>]+>", " ", resp.text.split("<body>", 1)[-1]).strip(),
+        }
+
+
+def register() -> None:
+    """Make the "StandIn" source available to `get_source_by_name()`."""
+    register_source(StandInSource.name, StandInSource)
+
+
+# -------------------- demo --------------------
+
+
+def _use_database(db_path: str) -> None:
+    from ..db import connection, init_db
+
+    connection.DB_PATH = Path(db_path)
+    init_db.DB_PATH = Path(db_path)
+
+
+def _demo_worker(db_path: str, batch_size: int) -> None:
+    from .queue_worker import QueueWorker
+
+    _use_database(db_path)
+    register()
+    QueueWorker(batch_size=batch_size, idle_sleep_sec=0.2, exit_when_idle=True).run()
+
+
+def run_demo(workers: int = 4, pages: int = 5, fail_every: int = 0, batch_size: int = 5) -> None:
+    """Crawl the stand-in website with several worker processes."""
+    import multiprocessing
+
+    from ..db import init_db
+    from ..db import repositories as db_repo
+
+    db_path = str(Path(tempfile.mkdtemp(prefix="standin-")) / "standin.db")
+    _use_database(db_path)
+    init_db.init_db()
+
+    server = StandInServer(pages=pages, fail_every=fail_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    search_url = f"{server.base_url}/search"
+    db_repo.enqueue_work(
+        ("listing", StandInSource.name, search_url, page) for page in range(1, pages + 2)
+    )
+
+    started = time.monotonic()
+    ctx = multiprocessing.get_context("spawn")
+    procs = [
+        ctx.Process(target=_demo_worker, args=(db_path, batch_size)) for _ in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    elapsed = time.monotonic() - started
+
+    server.shutdown()
+    print(f"\nDatabase: {db_path}")
+    print(f"Queue: {db_repo.get_work_queue_stats()}")
+    print(f"Buildings: {db_repo.get_buildings_count()} (expected {pages * ADS_PER_PAGE})")
+    print(f"Server: {server.stats()} (min interval {StandInSource.min_request_interval_sec}s)")
+    print(f"Elapsed: {elapsed:.1f}s with {workers} workers")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run workers against a stand-in website.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=5)
+    parser.add_argument(
+        "--fail-every", type=int, default=0, help="answer 503 to every n-th request"
+    )
+    args = parser.parse_args()
+    run_demo(args.workers, args.pages, args.fail_every, args.batch)
+
+
+if __name__ == "__main__":
+    main()
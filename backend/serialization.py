@@ -0,0 +1,199 @@
+"""
+Fast JSON serialization for the API.
+
+- `FastJSONResponse`: JSONResponse rendered with orjson (several times
+  faster than `json.dumps`, and it handles the sqlite types natively).
+- `BuildingSnapshotCache`: pre-encoded JSON bytes per building and
+  projection. List responses are assembled by joining cached fragments, so
+  a building is encoded once and then reused until it changes.
+
+Snapshots are invalidated from the `building_changes` log (Table 5): before
+serving, the cache reads the latest change seq and drops the fragments of
+every building changed since its last check (all of them, if the log was
+pruned past that check). Writes from any process
+(scraper, enrichment) are therefore seen on the next request. Last-seen
+updates are not logged: when the "buildings_seen" data version moves, the
+whole cache is dropped.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+from .db import repositories as db_repo
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Response whose body is already-encoded JSON bytes."""
+
+    media_type = "application/json"
+
+
+SnapshotKey = Tuple[int, Optional[Tuple[str, ...]]]
+
+# (change seq, "buildings_seen" version) the cache is consistent with.
+SyncState = Tuple[int, int]
+
+
+class BuildingSnapshotCache:
+    """
+    LRU map (a_id, projection) -> encoded JSON object, invalidated through
+    the building change log.
+
+    :param maxsize: maximum number of fragments kept
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[SnapshotKey, bytes]" = OrderedDict()
+        self._keys_by_id: Dict[int, Set[SnapshotKey]] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._last_seq: Optional[int] = None
+        self._seen_version: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # -------------------- invalidation --------------------
+
+    def _drop(self, key: SnapshotKey) -> None:
+        # Caller holds self._lock.
+        self._data.pop(key, None)
+        self._unindex(key)
+
+    def _unindex(self, key: SnapshotKey) -> None:
+        # Caller holds self._lock.
+        keys = self._keys_by_id.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_id[key[0]]
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._keys_by_id.clear()
+
+    def sync(self) -> SyncState:
+        """
+        Drop the fragments of buildings changed since the last sync.
+        Returns the state (SyncState) the cache is now consistent with.
+        """
+        with self._sync_lock:
+            seq = db_repo.get_last_change_seq()
+            seen_version = db_repo.get_data_versions(["buildings_seen"])["buildings_seen"]
+            if (
+                self._last_seq is None
+                or seq < self._last_seq
+                or seen_version != self._seen_version
+            ):
+                # First use, the log was reset, or last-seen dates moved
+                # (not logged, so not per building): start from scratch.
+                self._clear()
+                self._last_seq = seq
+                self._seen_version = seen_version
+                return seq, seen_version
+            if seq == self._last_seq:
+                return seq, seen_version
+
+            if seq - self._last_seq > self.maxsize:
+                # More changes than fragments: cheaper to start over.
+                self._clear()
+            elif db_repo.get_first_change_seq() > self._last_seq + 1:
+                # Entries after our last sync were pruned from the log: the
+                # buildings they invalidated are unknown.
+                self._clear()
+            else:
+                changed = db_repo.get_changed_building_ids(self._last_seq, seq)
+                with self._lock:
+                    for a_id, _deleted in changed:
+                        for key in list(self._keys_by_id.get(a_id, ())):
+                            self._drop(key)
+                            self.invalidations += 1
+            self._last_seq = seq
+            return seq, seen_version
+
+    # -------------------- rendering --------------------
+
+    def render_list(
+        self,
+        a_ids: Sequence[int],
+        columns: Optional[Sequence[str]] = None,
+    ) -> bytes:
+        """
+        Return a JSON array of the given buildings (in the given order),
+        encoding only those without a current fragment.
+
+        Raises ValueError on an unknown column.
+        """
+        synced = self.sync()
+        projection = tuple(columns) if columns else None
+
+        fragments: Dict[int, bytes] = {}
+        missing: List[int] = []
+        with self._lock:
+            for a_id in a_ids:
+                key = (a_id, projection)
+                fragment = self._data.get(key)
+                if fragment is None:
+                    missing.append(a_id)
+                else:
+                    self._data.move_to_end(key)
+                    fragments[a_id] = fragment
+            self.hits += len(fragments)
+            self.misses += len(missing)
+
+        if missing:
+            rows = db_repo.get_buildings_by_ids(missing, columns)
+            encoded = {row["a_id"]: orjson.dumps(row) for row in rows}
+            fragments.update(encoded)
+            self._store(encoded, projection, synced)
+
+        return b"[" + b",".join(fragments[a_id] for a_id in a_ids if a_id in fragments) + b"]"
+
+    def _store(
+        self,
+        encoded: Dict[int, bytes],
+        projection: Optional[Tuple[str, ...]],
+        synced: SyncState,
+    ) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            # Another request synced past our state while we were reading:
+            # a change it already processed may postdate our rows, so they
+            # must not be cached.
+            if (self._last_seq, self._seen_version) != synced:
+                return
+            for a_id, fragment in encoded.items():
+                key = (a_id, projection)
+                self._data[key] = fragment
+                self._data.move_to_end(key)
+                self._keys_by_id.setdefault(a_id, set()).add(key)
+            while len(self._data) > self.maxsize:
+                oldest, _ = self._data.popitem(last=False)
+                self._unindex(oldest)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": "building_snapshots",
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -1,7 +1,31 @@
-import { request } from './client';
+import { request, buildQuery, eventSource } from './client';
 
-export async function fetchBuildings() {
-  return request('/buildings');
+// Fetch one page of buildings. `params` accepts the filters / sort / cursor
+// supported by GET /api/buildings; the next cursor comes back in a header,
+// as does the change seq the page is current with.
+export async function fetchBuildings(params = {}) {
+  const res = await request(`/buildings${buildQuery(params)}`, { raw: true });
+  const items = await res.json();
+  const changeSeq = res.headers.get('X-Change-Seq');
+  return {
+    items: Array.isArray(items) ? items : [],
+    nextCursor: res.headers.get('X-Next-Cursor'),
+    changeSeq: changeSeq === null ? null : Number(changeSeq)
+  };
+}
+
+// Subscribe to buildings inserted / updated / deleted from now on, or
+// since the change seq given as `params.after`. `onReset` is called when
+// those changes are no longer available (the data must be reloaded).
+// Returns a function that closes the stream.
+export function subscribeBuildingChanges({ onUpsert, onDelete, onReset }, params = {}) {
+  const source = eventSource(`/buildings/changes${buildQuery(params)}`);
+  source.addEventListener('upsert', (e) => onUpsert(JSON.parse(e.data)));
+  source.addEventListener('delete', (e) => onDelete(JSON.parse(e.data).a_id));
+  if (onReset) {
+    source.addEventListener('reset', (e) => onReset(JSON.parse(e.data).seq));
+  }
+  return () => source.close();
 }
 
 export async function fetchBuildingById(id) {
@@ -2,11 +2,12 @@ const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || '/api';
 
 async function request(path, options = {}) {
   const url = `${API_BASE_URL}${path}`;
-  const headers = options.headers || {};
+  const { raw = false, ...fetchOptions } = options;
+  const headers = fetchOptions.headers || {};
 
   const mergedOptions = {
     credentials: 'include',
-    ...options,
+    ...fetchOptions,
     headers: {
       'Content-Type': 'application/json',
       ...headers
@@ -20,6 +21,11 @@ async function request(path, options = {}) {
     throw new Error(`API error ${res.status}: ${text || res.statusText}`);
   }
 
+  // Caller wants the Response itself (e.g. to read headers)
+  if (raw) {
+    return res;
+  }
+
   // For CSV downloads, caller will handle response differently
   const contentType = res.headers.get('Content-Type') || '';
   if (contentType.includes('text/csv')) {
@@ -34,4 +40,21 @@ async function request(path, options = {}) {
   return res.text();
 }
 
-export { request };
+function buildQuery(params = {}) {
+  const query = new URLSearchParams();
+  Object.entries(params).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== '') {
+      query.set(key, value);
+    }
+  });
+  const str = query.toString();
+  return str ? `?${str}` : '';
+}
+
+// Open a server-sent events stream (EventSource reconnects on its own and
+// resumes from the last event id it received).
+function eventSource(path) {
+  return new EventSource(`${API_BASE_URL}${path}`, { withCredentials: true });
+}
+
+export { request, buildQuery, eventSource };
@@ -35,8 +35,9 @@ function formatPrice(value) {
 }
 
 function BuildingCard({ building }) {
-  const images = parseImageUrls(building.a_images);
-  const mainImage = images[0] || null;
+  // List endpoints return only `a_mainImage`; full rows carry `a_images`.
+  const mainImage =
+    building.a_mainImage || parseImageUrls(building.a_images)[0] || null;
   const category = building.llm_residential_office;
 
   return (
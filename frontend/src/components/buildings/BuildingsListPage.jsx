@@ -1,22 +1,33 @@
 import React, { useEffect, useState } from 'react';
-import { fetchBuildings } from '../../api/buildings';
+import { fetchBuildings, subscribeBuildingChanges } from '../../api/buildings';
 import BuildingCard from './BuildingCard';
 import EmptyState from '../ui/EmptyState';
 import LoadingState from '../ui/LoadingState';
 import Card from '../ui/Card';
+import Button from '../ui/Button';
+
+const PAGE_SIZE = 60;
 
 function BuildingsListPage() {
   const [buildings, setBuildings] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [changeSeq, setChangeSeq] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState('');
+  const [reloads, setReloads] = useState(0);
 
   useEffect(() => {
     async function load() {
       try {
         setLoading(true);
         setError('');
-        const data = await fetchBuildings();
-        setBuildings(Array.isArray(data) ? data : []);
+        const { items, nextCursor: cursor, changeSeq: seq } = await fetchBuildings({
+          limit: PAGE_SIZE
+        });
+        setBuildings(items);
+        setNextCursor(cursor);
+        setChangeSeq(seq);
       } catch (err) {
         console.error(err);
         setError('Failed to load buildings.');
@@ -25,7 +36,50 @@ function BuildingsListPage() {
       }
     }
     load();
-  }, []);
+  }, [reloads]);
+
+  // Apply live deltas once the first page is loaded, starting from the
+  // change seq it was read at, so nothing made meanwhile is missed. The
+  // list is sorted newest first, so new buildings go on top.
+  useEffect(() => {
+    if (loading || error) return undefined;
+    return subscribeBuildingChanges({
+      onUpsert: (building) =>
+        setBuildings((prev) => {
+          const index = prev.findIndex((b) => b.a_id === building.a_id);
+          if (index === -1) {
+            // Unknown ids older than the top of the list belong to pages
+            // not loaded yet.
+            return !prev.length || building.a_id > prev[0].a_id
+              ? [building, ...prev]
+              : prev;
+          }
+          const next = prev.slice();
+          next[index] = building;
+          return next;
+        }),
+      onDelete: (id) => setBuildings((prev) => prev.filter((b) => b.a_id !== id)),
+      // The changes since the page was read are gone from the log.
+      onReset: () => setReloads((n) => n + 1)
+    }, { after: changeSeq });
+  }, [loading, error, changeSeq]);
+
+  const handleLoadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const { items, nextCursor: cursor } = await fetchBuildings({
+        limit: PAGE_SIZE,
+        cursor: nextCursor
+      });
+      setBuildings((prev) => [...prev, ...items]);
+      setNextCursor(cursor);
+    } catch (err) {
+      console.error(err);
+      alert('Failed to load more buildings.');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   if (loading) {
     return <LoadingState message="Loading buildings…" />;
@@ -58,6 +112,7 @@ function BuildingsListPage() {
         <div className="page-header-meta">
           <span className="text-secondary">
             {buildings.length} {buildings.length === 1 ? 'building' : 'buildings'}
+            {nextCursor ? ' loaded' : ''}
           </span>
         </div>
       </div>
@@ -67,6 +122,18 @@ function BuildingsListPage() {
           <BuildingCard key={b.a_id} building={b} />
         ))}
       </div>
+
+      {nextCursor && (
+        <div className="buildings-load-more">
+          <Button
+            variant="secondary"
+            onClick={handleLoadMore}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Loading…' : 'Load more'}
+          </Button>
+        </div>
+      )}
     </section>
   );
 }
@@ -35,8 +35,9 @@ function formatPrice(value) {
 }
 
 function CartItemCard({ building, onRemove }) {
-  const images = parseImageUrls(building.a_images);
-  const mainImage = images[0] || null;
+  // List endpoints return only `a_mainImage`; full rows carry `a_images`.
+  const mainImage =
+    building.a_mainImage || parseImageUrls(building.a_images)[0] || null;
 
   const handleRemove = () => {
     onRemove(building.a_id);